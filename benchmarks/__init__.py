@@ -0,0 +1 @@
+"""Benchmarks for the ring buffers, run the suite with python -m benchmarks"""
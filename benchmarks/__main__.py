@@ -0,0 +1,138 @@
+"""Run the benchmark suite and write the results as JSON
+
+Run with: python -m benchmarks --output results.json
+Compare with a previous run: python -m benchmarks --compare results.json
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import typing as t
+
+from benchmarks import contention, journal, latency, throughput
+
+Result = t.Dict[str, t.Any]
+
+# fields which identify a result, the others are measures
+_KEY_FIELDS = ('benchmark', 'queue', 'mode', 'batch_size', 'producers',
+               'consumers')
+
+
+def _git_commit() -> str:
+    """commit of the working tree, empty outside of a git checkout"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def _key(result: Result) -> t.Tuple:
+    """fields which identify a result across runs"""
+    return tuple(result.get(field) for field in _KEY_FIELDS)
+
+
+def _score(result: Result) -> float:
+    """higher is better for every benchmark"""
+    if 'events_per_sec' in result:
+        return result['events_per_sec']
+    return 1 / max(result['p99_ns'], 1)
+
+
+def compare(baseline: t.List[Result],
+            results: t.List[Result],
+            tolerance: float) -> t.List[str]:
+    """Return the results slower than the baseline by more than tolerance
+
+    Args:
+        baseline (t.List[Result]): results of a previous run
+        results (t.List[Result]): results of this run
+        tolerance (float): allowed slowdown, 0.2 is 20%
+
+    Returns:
+        t.List[str]: description of each regression
+    """
+    previous = {_key(r): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(_key(result))
+        if old is None:
+            continue
+        change = _score(result) / _score(old) - 1
+        if change < -tolerance:
+            regressions.append(
+                f"{' '.join(str(k) for k in _key(result) if k is not None)}"
+                f': {change:+.1%}')
+    return regressions
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> int:
+    """Run the benchmarks
+
+    Args:
+        argv (t.Optional[t.List[str]], optional): command line arguments.
+            Defaults to None, which reads sys.argv.
+
+    Returns:
+        int: exit code, 1 if a regression is found
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('--events', type=int, default=200_000,
+                        help='events per throughput, contention and '
+                        'journal benchmark')
+    parser.add_argument('--latency-events', type=int, default=20_000,
+                        help='events per latency benchmark')
+    parser.add_argument('--max-workers', type=int, default=4,
+                        help='maximum number of producers and consumers')
+    parser.add_argument('--only', choices=('throughput', 'latency',
+                                           'contention', 'journal'),
+                        action='append', help='run only these benchmarks')
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--compare', help='results file of a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against --compare')
+    args = parser.parse_args(argv)
+
+    only = set(args.only or ('throughput', 'latency', 'contention',
+                             'journal'))
+    results: t.List[Result] = []
+    if 'throughput' in only:
+        results += throughput.run(args.events)
+    if 'latency' in only:
+        results += latency.run(args.latency_events)
+    if 'contention' in only:
+        results += contention.run(args.events, args.max_workers)
+    if 'journal' in only:
+        results += journal.run(args.events)
+
+    for result in results:
+        print(json.dumps(result))
+    report = {
+        'meta': {
+            'python': sys.version,
+            'platform': platform.platform(),
+            'time': datetime.datetime.now(
+                datetime.timezone.utc).isoformat(),
+            'commit': _git_commit(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = compare(baseline, results, args.tolerance)
+        for regression in regressions:
+            print('regression', regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Throughput with several producers and consumers, threads or processes
+"""
+import multiprocessing
+import threading
+import time
+import typing as t
+
+from benchmarks import queues
+from ring_buffer.model.event import Event
+
+Result = t.Dict[str, t.Any]
+
+_STOP = 'stop'
+
+
+def _produce(adapter_name: str, fifo: t.Any, n: int):
+    """put n events, run in a producer thread or process
+
+    Args:
+        adapter_name (str): name of the adapter of the queue
+        fifo (t.Any): the queue
+        n (int): number of events
+    """
+    adapter = queues.get_adapter(adapter_name)
+    e = Event('bench', 0)
+    for _ in range(n):
+        adapter.put(fifo, e)
+
+
+def _consume(adapter_name: str, fifo: t.Any, received: t.Any):
+    """get events until a stop event, run in a consumer thread or process
+
+    Args:
+        adapter_name (str): name of the adapter of the queue
+        fifo (t.Any): the queue
+        received (t.Any): multiprocessing.Value which sums the events
+            got by every consumer, the stop event is not counted
+    """
+    adapter = queues.get_adapter(adapter_name)
+    count = 0
+    while adapter.get(fifo).event_type != _STOP:
+        count += 1
+    with received.get_lock():
+        received.value += count
+
+
+def contention(adapter: queues.QueueAdapter,
+               n: int,
+               producers: int,
+               consumers: int,
+               use_processes: bool = False,
+               size: int = 2**10) -> Result:
+    """hand off n events from producers to consumers
+
+    Args:
+        adapter (queues.QueueAdapter): the queue
+        n (int): number of events, split between producers
+        producers (int): number of producers
+        consumers (int): number of consumers
+        use_processes (bool, optional): run producers and consumers in
+            processes instead of threads. Defaults to False.
+        size (int, optional): size of the queue. Defaults to 2**10.
+
+    Returns:
+        Result: result of the benchmark
+    """
+    worker_class = \
+        multiprocessing.Process if use_processes else threading.Thread
+    fifo = adapter.make(size)
+    per_producer = n // producers
+    received: t.Any = multiprocessing.Value('q', 0)
+    try:
+        consumer_workers = [
+            worker_class(target=_consume,
+                         args=(adapter.name, fifo, received))
+            for _ in range(consumers)]
+        producer_workers = [
+            worker_class(target=_produce,
+                         args=(adapter.name, fifo, per_producer))
+            for _ in range(producers)]
+        start = time.perf_counter()
+        for worker in consumer_workers + producer_workers:
+            worker.start()
+        for worker in producer_workers:
+            worker.join()
+        # each consumer stops at the first stop event it gets
+        for _ in range(consumers):
+            adapter.put(fifo, Event(_STOP, None))
+        for worker in consumer_workers:
+            worker.join()
+        seconds = time.perf_counter() - start
+    finally:
+        adapter.close(fifo)
+    return {
+        'benchmark': 'contention',
+        'queue': adapter.name,
+        'mode': 'processes' if use_processes else 'threads',
+        'producers': producers,
+        'consumers': consumers,
+        'events': received.value,
+        'seconds': seconds,
+        'events_per_sec': received.value / seconds,
+    }
+
+
+def run(n: int, max_workers: int = 4) -> t.List[Result]:
+    """Run the contention benchmark from 1 to max_workers producers and
+    consumers, with threads, and with processes for cross process queues
+
+    Args:
+        n (int): number of events of each benchmark
+        max_workers (int, optional): maximum number of producers and of
+            consumers. Defaults to 4.
+
+    Returns:
+        t.List[Result]: results of the benchmarks
+    """
+    counts = sorted({1, *range(2, max_workers + 1, 2), max_workers})
+    results = []
+    for adapter in queues.ADAPTERS:
+        modes = [False, True] if adapter.cross_process else [False]
+        for use_processes in modes:
+            for workers in counts:
+                if workers > 1 and not adapter.multi_producer_consumer:
+                    continue
+                results.append(contention(adapter, n, workers, workers,
+                                          use_processes))
+    return results
@@ -0,0 +1,134 @@
+"""Throughput of a RingBuffer with a journal against one without
+
+Run with: python -m benchmarks.journal
+"""
+import statistics
+import tempfile
+import time
+import typing as t
+
+from ring_buffer.model.event import Event
+from ring_buffer.services import buffer
+from ring_buffer.services import journal
+
+Result = t.Dict[str, t.Any]
+
+
+def _put_get(ring: buffer.RingBuffer, n: int, batch_size: int) -> float:
+    """put then get n events from one thread, batch_size at a time
+
+    Args:
+        ring (buffer.RingBuffer): the ring
+        n (int): number of events
+        batch_size (int): events per put/get, 1 uses put and get
+
+    Returns:
+        float: seconds
+    """
+    e = Event('bench', 0)
+    start = time.perf_counter()
+    if batch_size == 1:
+        for _ in range(n):
+            ring.put(e)
+            ring.get()
+    else:
+        batch = [e] * batch_size
+        for _ in range(n // batch_size):
+            ring.put_many(batch)
+            ring.get_many()
+    return time.perf_counter() - start
+
+
+def _journaled_put_get(n: int, batch_size: int, size: int) -> float:
+    """_put_get on a ring with a journal in a new directory
+
+    Args:
+        n (int): number of events
+        batch_size (int): events per put/get
+        size (int): size of the ring
+
+    Returns:
+        float: seconds
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        _journal = journal.Journal(directory)
+        try:
+            return _put_get(buffer.RingBuffer(size, journal=_journal), n,
+                            batch_size)
+        finally:
+            _journal.close()
+
+
+def journal_ratio(n: int,
+                  batch_size: int = 1,
+                  size: int = 2**10,
+                  rounds: int = 5) -> t.List[Result]:
+    """put then get n events with and without a journal. Runs of both
+    alternate and the median of rounds runs is kept, so a slower period
+    of the machine does not skew the ratio
+
+    Args:
+        n (int): number of events
+        batch_size (int, optional): events per put/get, 1 uses the single
+            event API. Defaults to 1.
+        size (int, optional): size of the ring. Defaults to 2**10.
+        rounds (int, optional): runs of each ring. Defaults to 5.
+
+    Returns:
+        t.List[Result]: results of the ring without and with a journal,
+            the latter has the ratio of their throughputs
+    """
+    n = n // batch_size * batch_size
+    memory, journaled = [], []
+    for _ in range(rounds):
+        memory.append(_put_get(buffer.RingBuffer(size), n, batch_size))
+        journaled.append(_journaled_put_get(n, batch_size, size))
+    results: t.List[Result] = []
+    for mode, seconds in (('memory', statistics.median(memory)),
+                          ('journal', statistics.median(journaled))):
+        results.append({
+            'benchmark': 'journal',
+            'queue': 'RingBuffer',
+            'mode': mode,
+            'batch_size': batch_size,
+            'events': n,
+            'seconds': seconds,
+            'events_per_sec': n / seconds,
+        })
+    results[1]['ratio'] = results[1]['events_per_sec'] / \
+        results[0]['events_per_sec']
+    return results
+
+
+def run(n: int, batch_sizes: t.Sequence[int] = (1, 64)) -> t.List[Result]:
+    """Run the journal benchmark for each batch size
+
+    Args:
+        n (int): number of events of each run
+        batch_sizes (t.Sequence[int], optional): batch sizes to measure.
+            Defaults to (1, 64).
+
+    Returns:
+        t.List[Result]: results of the benchmarks
+    """
+    results = []
+    for batch_size in batch_sizes:
+        results += journal_ratio(n, batch_size)
+    return results
+
+
+def main(n: int = 200_000):
+    """Print the throughput of a journaled ring relative to a plain one
+
+    Args:
+        n (int, optional): number of events. Defaults to 200_000.
+    """
+    for result in run(n):
+        if result['mode'] == 'journal':
+            print(f"batch {result['batch_size']:<4} "
+                  f"{result['events_per_sec']:>12,.0f} events/s "
+                  f"{result['ratio']:.2f}x of the ring without journal")
+
+
+if __name__ == '__main__':
+    main()
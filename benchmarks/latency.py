@@ -0,0 +1,78 @@
+"""Handoff latency from a producer thread to a consumer thread
+"""
+import threading
+import time
+import typing as t
+
+from benchmarks import queues
+from ring_buffer.model.event import Event
+
+Result = t.Dict[str, t.Any]
+
+
+def _percentile(sorted_values: t.List[int], percent: float) -> int:
+    """nearest-rank percentile of sorted values"""
+    index = min(len(sorted_values) - 1,
+                int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+def handoff(adapter: queues.QueueAdapter,
+            n: int,
+            interval_ns: int = 50_000,
+            size: int = 2**10) -> Result:
+    """measure put-to-get latency of n events put every interval_ns
+
+    Args:
+        adapter (queues.QueueAdapter): the queue
+        n (int): number of events
+        interval_ns (int, optional): pause between two puts, so the
+            latency is not only the time spent in a full queue. The pause
+            sleeps, a busy wait would hold the GIL and stall the consumer.
+            Defaults to 50_000.
+        size (int, optional): size of the queue. Defaults to 2**10.
+
+    Returns:
+        Result: result of the benchmark
+    """
+    fifo = adapter.make(size)
+    latencies: t.List[int] = []
+
+    def _consume():
+        for _ in range(n):
+            e = adapter.get(fifo)
+            latencies.append(time.perf_counter_ns() - e.data)
+
+    consumer_thread = threading.Thread(target=_consume)
+    consumer_thread.start()
+    try:
+        for _ in range(n):
+            adapter.put(fifo, Event('bench', time.perf_counter_ns()))
+            time.sleep(interval_ns / 1e9)
+        consumer_thread.join()
+    finally:
+        adapter.close(fifo)
+    latencies.sort()
+    return {
+        'benchmark': 'latency',
+        'queue': adapter.name,
+        'mode': 'producer_consumer_threads',
+        'events': n,
+        'interval_ns': interval_ns,
+        'p50_ns': _percentile(latencies, 50),
+        'p99_ns': _percentile(latencies, 99),
+        'p999_ns': _percentile(latencies, 99.9),
+        'max_ns': latencies[-1],
+    }
+
+
+def run(n: int) -> t.List[Result]:
+    """Run the latency benchmark on every queue
+
+    Args:
+        n (int): number of events of each benchmark
+
+    Returns:
+        t.List[Result]: results of the benchmarks
+    """
+    return [handoff(adapter, n) for adapter in queues.ADAPTERS]
@@ -0,0 +1,190 @@
+"""Uniform adapters over the queues compared by the benchmarks
+"""
+import collections
+import dataclasses
+import multiprocessing
+import queue
+import time
+import typing as t
+
+from ring_buffer.model.event import Event
+from ring_buffer.services import buffer
+from ring_buffer.services import shared_ring_buffer
+
+
+@dataclasses.dataclass
+class QueueAdapter:
+    """How a benchmark builds and uses one kind of queue"""
+    name: str
+    # build a queue able to hold size events
+    make: t.Callable[[int], t.Any]
+    # put one event, wait while the queue is full
+    put: t.Callable[[t.Any, Event], None]
+    # get one event, wait while the queue is empty
+    get: t.Callable[[t.Any], Event]
+    # put every event, wait while the queue is full
+    put_batch: t.Callable[[t.Any, t.List[Event]], None]
+    # get up to max_n events without waiting
+    get_batch: t.Callable[[t.Any, int], t.List[Event]]
+    # safe with several producers or consumers
+    multi_producer_consumer: bool = True
+    # can be shared with other processes
+    cross_process: bool = False
+    # release resources of the queue
+    close: t.Callable[[t.Any], None] = lambda fifo: None
+
+
+def _spin(done: t.Callable[[], bool]):
+    """yield the GIL until done returns True"""
+    while not done():
+        time.sleep(0)
+
+
+def _ring_put_batch(ring: t.Any, events: t.List[Event]):
+    """put every event in a ring, retry while it is full"""
+    put_count = 0
+    while put_count < len(events):
+        try:
+            put_count += ring.put_many(events[put_count:])
+        except buffer.RingFullError:
+            time.sleep(0)
+
+
+def _ring_get(ring: t.Any) -> Event:
+    """get one event from a ring, retry while it is empty"""
+    while True:
+        events = ring.get_many(1)
+        if events:
+            return events[0]
+        time.sleep(0)
+
+
+def _ring_put(ring: t.Any, e: Event):
+    """put one event in a ring, retry while it is full"""
+    while True:
+        try:
+            ring.put(e)
+            return
+        except buffer.RingFullError:
+            time.sleep(0)
+
+
+def _queue_put_batch(fifo: t.Any, events: t.List[Event]):
+    """put every event in a queue, one put each"""
+    for e in events:
+        fifo.put(e)
+
+
+def _queue_get_batch(fifo: t.Any, max_n: int) -> t.List[Event]:
+    """get up to max_n events from a queue without waiting"""
+    events: t.List[Event] = []
+    try:
+        while len(events) < max_n:
+            events.append(fifo.get_nowait())
+    except queue.Empty:
+        pass
+    return events
+
+
+def _simple_queue_get_batch(fifo: t.Any, max_n: int) -> t.List[Event]:
+    """get up to max_n events from a multiprocessing.SimpleQueue,
+    which has no get_nowait"""
+    events: t.List[Event] = []
+    while len(events) < max_n and not fifo.empty():
+        events.append(fifo.get())
+    return events
+
+
+def _deque_get(fifo: t.Deque[Event]) -> Event:
+    """get one event from a deque, retry while it is empty"""
+    while True:
+        try:
+            return fifo.popleft()
+        except IndexError:
+            time.sleep(0)
+
+
+def _deque_put(fifo: t.Deque[Event], e: Event):
+    """put one event in a bounded deque, wait while it is full"""
+    # a bounded deque drops events, so wait for room instead
+    _spin(lambda: len(fifo) < t.cast(int, fifo.maxlen))
+    fifo.append(e)
+
+
+def _deque_put_batch(fifo: t.Deque[Event], events: t.List[Event]):
+    """put every event in a bounded deque"""
+    for e in events:
+        _deque_put(fifo, e)
+
+
+def _deque_get_batch(fifo: t.Deque[Event], max_n: int) -> t.List[Event]:
+    """get up to max_n events from a deque without waiting"""
+    events: t.List[Event] = []
+    try:
+        while len(events) < max_n:
+            events.append(fifo.popleft())
+    except IndexError:
+        pass
+    return events
+
+
+def _make_shared_ring(size: int) -> shared_ring_buffer.SharedRingBuffer:
+    """build a SharedRingBuffer with a lock for several producers"""
+    return shared_ring_buffer.SharedRingBuffer(
+        size=size, slot_size=128, create=True, lock=multiprocessing.Lock())
+
+
+ADAPTERS: t.List[QueueAdapter] = [
+    QueueAdapter('RingBuffer', buffer.RingBuffer,
+                 lambda ring, e: ring.put(e, block=True),
+                 lambda ring: ring.get(block=True),
+                 _ring_put_batch,
+                 lambda ring, n: ring.get_many(n)),
+    QueueAdapter('SPSCRingBuffer',
+                 lambda size: buffer.SPSCRingBuffer(
+                     1 << max(size - 1, 1).bit_length()),
+                 _ring_put, _ring_get, _ring_put_batch,
+                 lambda ring, n: ring.get_many(n),
+                 multi_producer_consumer=False),
+    QueueAdapter('SharedRingBuffer', _make_shared_ring,
+                 lambda ring, e: ring.put(e, block=True),
+                 lambda ring: ring.get(block=True),
+                 _ring_put_batch,
+                 lambda ring, n: ring.get_many(n),
+                 cross_process=True,
+                 close=lambda ring: ring.shutdown()),
+    QueueAdapter('queue.Queue', queue.Queue,
+                 lambda fifo, e: fifo.put(e), lambda fifo: fifo.get(),
+                 _queue_put_batch, _queue_get_batch),
+    QueueAdapter('queue.SimpleQueue', lambda size: queue.SimpleQueue(),
+                 lambda fifo, e: fifo.put(e), lambda fifo: fifo.get(),
+                 _queue_put_batch, _queue_get_batch),
+    QueueAdapter('collections.deque',
+                 lambda size: collections.deque(maxlen=size),
+                 _deque_put, _deque_get, _deque_put_batch, _deque_get_batch),
+    QueueAdapter('multiprocessing.Queue', multiprocessing.Queue,
+                 lambda fifo, e: fifo.put(e), lambda fifo: fifo.get(),
+                 _queue_put_batch, _queue_get_batch,
+                 cross_process=True),
+    QueueAdapter('multiprocessing.SimpleQueue',
+                 lambda size: multiprocessing.SimpleQueue(),
+                 lambda fifo, e: fifo.put(e), lambda fifo: fifo.get(),
+                 _queue_put_batch, _simple_queue_get_batch,
+                 cross_process=True,
+                 close=lambda fifo: fifo.close()),
+]
+
+
+def get_adapter(name: str) -> QueueAdapter:
+    """Return the adapter of a queue by name
+
+    Args:
+        name (str): name of the adapter
+
+    Returns:
+        QueueAdapter: the adapter
+    """
+    for adapter in ADAPTERS:
+        if adapter.name == name:
+            return adapter
+    raise KeyError(name)
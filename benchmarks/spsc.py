@@ -0,0 +1,98 @@
+"""Compare SPSCRingBuffer against the locked RingBuffer
+
+Run with: python -m benchmarks.spsc
+"""
+import threading
+import time
+import typing as t
+
+from ring_buffer.model import event
+from ring_buffer.services import buffer
+
+RingFactory = t.Callable[[int], t.Any]
+
+
+def bench_single_thread(ring_factory: RingFactory,
+                        n: int = 10**6,
+                        size: int = 2**10) -> float:
+    """put then get n events from one thread
+
+    Args:
+        ring_factory (RingFactory): build a ring from a size
+        n (int, optional): number of events. Defaults to 10**6.
+        size (int, optional): size of the ring. Defaults to 2**10.
+
+    Returns:
+        float: events per second
+    """
+    ring = ring_factory(size)
+    e = event.Event('bench', 0)
+    start = time.perf_counter()
+    for _ in range(n):
+        ring.put(e)
+        ring.get()
+    return n / (time.perf_counter() - start)
+
+
+def bench_producer_consumer(ring_factory: RingFactory,
+                            n: int = 10**6,
+                            size: int = 2**10) -> float:
+    """one producer thread and one consumer thread hand off n events
+
+    Args:
+        ring_factory (RingFactory): build a ring from a size
+        n (int, optional): number of events. Defaults to 10**6.
+        size (int, optional): size of the ring. Defaults to 2**10.
+
+    Returns:
+        float: events per second
+    """
+    ring = ring_factory(size)
+    e = event.Event('bench', 0)
+
+    def _produce():
+        sent = 0
+        while sent < n:
+            try:
+                ring.put(e)
+                sent += 1
+            except buffer.RingFullError:
+                time.sleep(0)
+
+    def _consume():
+        received = 0
+        while received < n:
+            batch = ring.get_many()
+            if not batch:
+                time.sleep(0)
+            received += len(batch)
+
+    threads = [threading.Thread(target=_produce),
+               threading.Thread(target=_consume)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return n / (time.perf_counter() - start)
+
+
+def main(n: int = 10**6):
+    """Print throughput of both ring buffers
+
+    Args:
+        n (int, optional): number of events. Defaults to 10**6.
+    """
+    rings: t.Dict[str, RingFactory] = {
+        'RingBuffer': buffer.RingBuffer,
+        'SPSCRingBuffer': buffer.SPSCRingBuffer,
+    }
+    for name, factory in rings.items():
+        print(f'{name:<16} single thread     '
+              f'{bench_single_thread(factory, n):>14,.0f} events/s')
+        print(f'{name:<16} producer/consumer '
+              f'{bench_producer_consumer(factory, n):>14,.0f} events/s')
+
+
+if __name__ == '__main__':
+    main()
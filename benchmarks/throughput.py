@@ -0,0 +1,161 @@
+"""Throughput of single-event and batched put/get, and of Consumer/Pool
+"""
+import threading
+import time
+import typing as t
+
+from benchmarks import queues
+from ring_buffer.interface.producer import ProducerInterface
+from ring_buffer.model.event import Event
+from ring_buffer.services import buffer
+from ring_buffer.services import consumer
+from ring_buffer.services import pool
+
+Result = t.Dict[str, t.Any]
+
+
+def single_thread(adapter: queues.QueueAdapter,
+                  n: int,
+                  batch_size: int = 1,
+                  size: int = 2**10) -> Result:
+    """put then get n events from one thread, batch_size at a time
+
+    Args:
+        adapter (queues.QueueAdapter): the queue
+        n (int): number of events
+        batch_size (int, optional): events per put/get, 1 uses the single
+            event API. Defaults to 1.
+        size (int, optional): size of the queue. Defaults to 2**10.
+
+    Returns:
+        Result: result of the benchmark
+    """
+    fifo = adapter.make(size)
+    try:
+        e = Event('bench', 0)
+        batch = [e] * batch_size
+        rounds = n // batch_size
+        start = time.perf_counter()
+        if batch_size == 1:
+            for _ in range(rounds):
+                adapter.put(fifo, e)
+                adapter.get(fifo)
+        else:
+            for _ in range(rounds):
+                adapter.put_batch(fifo, batch)
+                received = 0
+                while received < batch_size:
+                    received += len(adapter.get_batch(fifo, batch_size))
+        seconds = time.perf_counter() - start
+    finally:
+        adapter.close(fifo)
+    return {
+        'benchmark': 'throughput',
+        'queue': adapter.name,
+        'mode': 'single_thread',
+        'batch_size': batch_size,
+        'events': rounds * batch_size,
+        'seconds': seconds,
+        'events_per_sec': rounds * batch_size / seconds,
+    }
+
+
+class _BenchProducer(ProducerInterface):
+    """Put n events in a ring, batch_size at a time"""
+
+    def __init__(self, ring: buffer.RingBuffer, n: int, batch_size: int):
+        """Init _BenchProducer
+
+        Args:
+            ring (buffer.RingBuffer): the ring
+            n (int): number of events
+            batch_size (int): events per put, 1 uses put
+        """
+        self._ring = ring
+        self._count = n
+        self._batch_size = batch_size
+        self._thread: t.Optional[threading.Thread] = None
+
+    def produce(self, e: Event) -> bool:
+        """put one event, wait while the ring is full"""
+        self._ring.put(e, block=True)
+        return True
+
+    def _produce_loop(self):
+        """put the events, body of the producer thread"""
+        e = Event('bench', 0)
+        if self._batch_size == 1:
+            for _ in range(self._count):
+                self.produce(e)
+            return
+        batch = [e] * self._batch_size
+        for _ in range(self._count // self._batch_size):
+            put_count = 0
+            while put_count < len(batch):
+                put_count += self._ring.put_many(batch[put_count:],
+                                                 block=True)
+
+    def start(self):
+        """put the events from a daemon thread"""
+        self._thread = threading.Thread(target=self._produce_loop,
+                                        daemon=True)
+        self._thread.start()
+
+
+def consumer_pool(n: int, batch_size: int = 1, size: int = 2**10) -> Result:
+    """end to end throughput of a Pool of one producer and one Consumer
+
+    Args:
+        n (int): number of events
+        batch_size (int, optional): events per put. Defaults to 1.
+        size (int, optional): size of the ring. Defaults to 2**10.
+
+    Returns:
+        Result: result of the benchmark
+    """
+    n = n // batch_size * batch_size
+    ring = buffer.RingBuffer(size)
+    _consumer = consumer.Consumer('bench', ring)
+    done = threading.Event()
+    received = [0]
+
+    def _callback(_: Event):
+        received[0] += 1
+        if received[0] == n:
+            done.set()
+
+    _consumer.register_callback(_callback)
+    _pool = pool.Pool(_BenchProducer(ring, n, batch_size), _consumer)
+    start = time.perf_counter()
+    _pool.start()
+    done.wait()
+    seconds = time.perf_counter() - start
+    _consumer.stop()
+    return {
+        'benchmark': 'throughput',
+        'queue': 'Consumer/Pool',
+        'mode': 'producer_consumer_threads',
+        'batch_size': batch_size,
+        'events': n,
+        'seconds': seconds,
+        'events_per_sec': n / seconds,
+    }
+
+
+def run(n: int, batch_sizes: t.Sequence[int] = (1, 64)) -> t.List[Result]:
+    """Run every throughput benchmark
+
+    Args:
+        n (int): number of events of each benchmark
+        batch_sizes (t.Sequence[int], optional): batch sizes to measure.
+            Defaults to (1, 64).
+
+    Returns:
+        t.List[Result]: results of the benchmarks
+    """
+    results = []
+    for batch_size in batch_sizes:
+        for adapter in queues.ADAPTERS:
+            results.append(single_thread(adapter, n, batch_size))
+        results.append(consumer_pool(n, batch_size))
+    return results
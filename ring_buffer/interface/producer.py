@@ -1,5 +1,6 @@
 """This module is about interface of producer"""
 import abc
+import typing as t
 
 from ring_buffer.model import event
 
@@ -30,3 +31,16 @@ class ProducerInterface(abc.ABC):
             NotImplementedError: raise if not implement
         """
         raise NotImplementedError()
+
+    def stop(self):
+        """Stop producing, a producer which ends on its own does not need
+        to override it
+        """
+
+    def join(self, timeout: t.Optional[float] = None):
+        """Wait for the producer to end after stop
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait,
+                None waits forever. Defaults to None.
+        """
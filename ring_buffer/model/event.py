@@ -1,12 +1,158 @@
 """Event model for Ring buffer"""
-import dataclasses
+import struct
+import sys
 import typing as t
 
 
-@dataclasses.dataclass
 class Event:
     """Event with bring the data from service to service
     """
-    event_type: str
-    data: t.Any
-    sid: str = ''
+    # no per-instance __dict__, an event only holds its three fields
+    __slots__ = ('event_type', 'data', 'sid')
+
+    def __init__(self,
+                 event_type: str,
+                 data: t.Any,
+                 sid: t.Union[str, bytes] = ''):
+        """Init Event
+
+        Args:
+            event_type (str): type of the event
+            data (t.Any): payload of the event
+            sid (t.Union[str, bytes], optional): id of the stream, bytes
+                for a BinaryEvent. Defaults to ''.
+        """
+        self.event_type = event_type
+        self.data = data
+        self.sid = sid
+
+    def __repr__(self):
+        """Return the constructor call of the event"""
+        return (f'{self.__class__.__name__}(event_type={self.event_type!r}, '
+                f'data={self.data!r}, sid={self.sid!r})')
+
+    def __eq__(self, other):
+        """Events of the same class are equal when their fields are"""
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.event_type, self.data, self.sid) == \
+            (other.event_type, other.data, other.sid)
+
+    __hash__ = None  # type: ignore
+
+
+# header of a packed BinaryEvent: type id, sid length, data length
+_BINARY_HEADER = struct.Struct('<HHI')
+_MAX_TYPE_ID = 2**16 - 1
+_MAX_SID_LENGTH = 2**16 - 1
+_MAX_DATA_LENGTH = 2**32 - 1
+
+
+class EventTypeRegistry:
+    """Map event type strings to small integers and back. Processes sharing
+    packed events must register the same types in the same order"""
+
+    def __init__(self):
+        """Init an empty EventTypeRegistry"""
+        self._ids: t.Dict[str, int] = {}
+        self._names: t.List[str] = []
+
+    def register(self, event_type: str) -> int:
+        """Return the id of an event type, register it if it is new
+
+        Args:
+            event_type (str): type of the event
+
+        Returns:
+            int: id of the event type
+        """
+        type_id = self._ids.get(event_type)
+        if type_id is None:
+            if len(self._names) > _MAX_TYPE_ID:
+                raise ValueError('too many event types')
+            type_id = len(self._names)
+            event_type = sys.intern(event_type)
+            self._ids[event_type] = type_id
+            self._names.append(event_type)
+        return type_id
+
+    def name(self, type_id: int) -> str:
+        """Return the interned event type of an id
+
+        Args:
+            type_id (int): id of the event type
+
+        Returns:
+            str: type of the event
+        """
+        return self._names[type_id]
+
+
+event_types = EventTypeRegistry()
+
+
+class BinaryEvent(Event):
+    """Compact Event with bytes sid and data. event_type is interned and
+    shared by all events of a type, it packs to a small integer id
+    """
+    __slots__ = ('_type_id',)
+
+    def __init__(self,
+                 event_type: str,
+                 data: t.Union[bytes, str],
+                 sid: t.Union[bytes, str] = b''):
+        """Init BinaryEvent
+
+        Args:
+            event_type (str): type of the event
+            data (t.Union[bytes, str]): payload, str is utf-8 encoded
+            sid (t.Union[bytes, str], optional): id of the stream, str is
+                utf-8 encoded. Defaults to b''.
+
+        Raises:
+            ValueError: sid or data is too long to be packed
+        """
+        type_id = event_types.register(event_type)
+        sid = sid.encode() if isinstance(sid, str) else bytes(sid)
+        data = data.encode() if isinstance(data, str) else bytes(data)
+        if len(sid) > _MAX_SID_LENGTH:
+            raise ValueError(f'sid is {len(sid)} bytes, the maximum is '
+                             f'{_MAX_SID_LENGTH}')
+        if len(data) > _MAX_DATA_LENGTH:
+            raise ValueError(f'data is {len(data)} bytes, the maximum is '
+                             f'{_MAX_DATA_LENGTH}')
+        super().__init__(event_types.name(type_id), data, sid)
+        self._type_id = type_id
+
+    @property
+    def type_id(self) -> int:
+        """Small integer id of event_type"""
+        return self._type_id
+
+    def pack(self) -> bytes:
+        """Pack the event in a struct
+
+        Returns:
+            bytes: header followed by sid and data
+        """
+        # __init__ stores sid as bytes
+        sid = t.cast(bytes, self.sid)
+        return _BINARY_HEADER.pack(self._type_id, len(sid),
+                                   len(self.data)) + sid + self.data
+
+    @classmethod
+    def unpack(cls, buf: t.Union[bytes, memoryview]) -> 'BinaryEvent':
+        """Build an event from the bytes of pack
+
+        Args:
+            buf (t.Union[bytes, memoryview]): packed event
+
+        Returns:
+            BinaryEvent: the event
+        """
+        type_id, sid_length, data_length = _BINARY_HEADER.unpack_from(buf)
+        start = _BINARY_HEADER.size
+        sid = bytes(buf[start:start + sid_length])
+        start += sid_length
+        data = bytes(buf[start:start + data_length])
+        return cls(event_types.name(type_id), data, sid)
@@ -0,0 +1,215 @@
+"""Preallocated arena of byte blocks, payloads are written in place and
+passed through rings as views without copying
+"""
+import threading
+import typing as t
+
+BytesLike = t.Union[bytes, bytearray, memoryview]
+
+# (block size, number of blocks) of each size class
+_DEFAULT_SIZE_CLASSES = ((2**8, 1024), (2**12, 256), (2**16, 64))
+
+
+class ArenaExhaustedError(Exception):
+    """No free block is big enough"""
+
+
+class ArenaBlock:
+    """A block of a ByteArena. The owner fills or reads it through view,
+    then calls release once, after which the view must not be used"""
+    __slots__ = ('_arena', '_size_class', '_index', '_memory', 'view')
+
+    def __init__(self,
+                 arena: 'ByteArena',
+                 size_class: int,
+                 index: int,
+                 memory: memoryview,
+                 length: int):
+        """Init ArenaBlock, blocks are built by ByteArena.alloc
+
+        Args:
+            arena (ByteArena): the arena which owns the block
+            size_class (int): index of the size class of the block
+            index (int): index of the block in its size class
+            memory (memoryview): the whole block
+            length (int): bytes of view
+        """
+        self._arena = arena
+        self._size_class = size_class
+        self._index = index
+        # the whole block, view is its first length bytes
+        self._memory = memory
+        self.view: memoryview = memory[:length]
+
+    def __len__(self) -> int:
+        """Return the length of view
+
+        Returns:
+            int: bytes of view
+        """
+        return len(self.view)
+
+    def __repr__(self):
+        """Return the length and the capacity of the block
+
+        Returns:
+            str: the representation
+        """
+        return f'ArenaBlock({len(self)} of {len(self._memory)} bytes)'
+
+    @property
+    def capacity(self) -> int:
+        """Bytes of the block"""
+        return len(self._memory)
+
+    def set_length(self, length: int):
+        """Change the length of view, such as after recv_into
+
+        Args:
+            length (int): new length, at most capacity
+        """
+        if not 0 <= length <= len(self._memory):
+            raise ValueError(f'length must be in [0, {len(self._memory)}]')
+        self.view.release()
+        self.view = self._memory[:length]
+
+    def release(self):
+        """Give the block back to its arena
+
+        Raises:
+            ValueError: the block is already released
+        """
+        if self._arena is None:
+            raise ValueError('block is already released')
+        arena, self._arena = self._arena, None
+        self.view.release()
+        # pylint: disable-next=protected-access
+        arena._free(self._size_class, self._index)
+
+
+class ByteArena:
+    """Fixed blocks of a few size classes carved out of preallocated
+    bytearrays. A payload takes the smallest free block that holds it,
+    nothing is allocated or copied once the arena is built.
+
+    Producers alloc a block and fill its view in place, with
+    socket.recv_into for example, or copy received bytes in once.
+    Consumers read the view, decode only what they need, and release it.
+    """
+
+    def __init__(self,
+                 size_classes: t.Sequence[t.Tuple[int, int]] =
+                 _DEFAULT_SIZE_CLASSES):
+        """Init ByteArena
+
+        Args:
+            size_classes (t.Sequence[t.Tuple[int, int]], optional): block
+                size and number of blocks of each size class.
+                Defaults to 256 B x 1024, 4 KB x 256 and 64 KB x 64.
+        """
+        if not size_classes:
+            raise ValueError('size_classes cannot be empty')
+        size_classes = sorted(size_classes)
+        for block_size, blocks in size_classes:
+            if block_size <= 0 or blocks <= 0:
+                raise ValueError('block size and blocks must be positive')
+        self._block_sizes: t.List[int] = [s for s, _ in size_classes]
+        self._memories: t.List[memoryview] = [
+            memoryview(bytearray(block_size * blocks))
+            for block_size, blocks in size_classes]
+        # free block indexes of each size class, used as stacks
+        self._free_blocks: t.List[t.List[int]] = [
+            list(range(blocks - 1, -1, -1)) for _, blocks in size_classes]
+        self._not_empty = threading.Condition()
+
+    @property
+    def max_block_size(self) -> int:
+        """Bytes of the biggest block"""
+        return self._block_sizes[-1]
+
+    def free_blocks(self) -> t.Dict[int, int]:
+        """Return the number of free blocks of each block size"""
+        with self._not_empty:
+            return {size: len(free) for size, free in
+                    zip(self._block_sizes, self._free_blocks)}
+
+    def _try_alloc(self, length: int) -> t.Optional[ArenaBlock]:
+        """take the smallest free block which holds length bytes, caller
+        must hold the lock"""
+        for size_class, block_size in enumerate(self._block_sizes):
+            if block_size < length or not self._free_blocks[size_class]:
+                continue
+            index = self._free_blocks[size_class].pop()
+            start = index * block_size
+            return ArenaBlock(
+                self, size_class, index,
+                self._memories[size_class][start:start + block_size], length)
+        return None
+
+    def alloc(self,
+              length: int,
+              block: bool = False,
+              timeout: t.Optional[float] = None) -> ArenaBlock:
+        """Take a block of at least length bytes, its view has length bytes
+
+        Args:
+            length (int): bytes of the payload
+            block (bool, optional): wait for a block to be released if none
+                is free. Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            ArenaBlock: the block
+
+        Raises:
+            ValueError: length is bigger than the biggest block
+            ArenaExhaustedError: no free block holds length bytes
+        """
+        if length > self._block_sizes[-1]:
+            raise ValueError(f'payload is {length} bytes, the biggest block '
+                             f'is {self._block_sizes[-1]}')
+        allocated: t.List[ArenaBlock] = []
+
+        def try_alloc() -> bool:
+            arena_block = self._try_alloc(length)
+            if arena_block is not None:
+                allocated.append(arena_block)
+            return arena_block is not None
+
+        with self._not_empty:
+            if not try_alloc() and not (
+                    block and self._not_empty.wait_for(try_alloc, timeout)):
+                raise ArenaExhaustedError(f'no free block of {length} bytes')
+            return allocated[0]
+
+    def copy(self,
+             data: BytesLike,
+             block: bool = False,
+             timeout: t.Optional[float] = None) -> ArenaBlock:
+        """Copy bytes in a new block, the only copy of the payload
+
+        Args:
+            data (BytesLike): the payload
+            block (bool, optional): see alloc. Defaults to False.
+            timeout (t.Optional[float], optional): see alloc.
+                Defaults to None.
+
+        Returns:
+            ArenaBlock: the block
+        """
+        arena_block = self.alloc(len(data), block, timeout)
+        arena_block.view[:] = data
+        return arena_block
+
+    def _free(self, size_class: int, index: int):
+        """Put a released block back on the free stack of its size class and
+        wake up a producer waiting in alloc
+
+        Args:
+            size_class (int): index of the size class of the block
+            index (int): index of the block in its size class
+        """
+        with self._not_empty:
+            self._free_blocks[size_class].append(index)
+            self._not_empty.notify()
@@ -0,0 +1,312 @@
+"""asyncio RingBuffer
+"""
+import asyncio
+import collections
+import typing as t
+
+from ring_buffer.model.event import Event
+from ring_buffer.services.buffer import RingEmptyError, RingFullError
+
+if t.TYPE_CHECKING:
+    import concurrent.futures
+
+
+class AsyncRingBuffer:
+    """A circular queue for asyncio. Waiting producers and consumers are
+    woken through event loop futures, never by sleeping.
+
+    Every method except put_threadsafe must be called from the thread of
+    the event loop. Threads feed the ring with put_threadsafe, one call
+    per batch of events.
+    """
+
+    def __init__(self,
+                 size: int = 2**10,
+                 loop: t.Optional[asyncio.AbstractEventLoop] = None):
+        """Init AsyncRingBuffer
+
+        Args:
+            size (int, optional): size of the queue. Defaults to 2**10.
+            loop (t.Optional[asyncio.AbstractEventLoop], optional): event
+                loop of the ring, bound to the running loop at the first
+                await when None. Defaults to None.
+        """
+        if size <= 0:
+            raise ValueError('Size cannot be lesser than 0')
+        self._size: int = size
+        self._ring: t.List[t.Optional[Event]] = [None] * size
+        self._producer_sequence: int = 0
+        self._consumer_sequence: int = 0
+        self._loop = loop
+        self._getters: t.Deque[asyncio.Future] = collections.deque()
+        self._putters: t.Deque[asyncio.Future] = collections.deque()
+        self._closed = False
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """event loop of the ring, bound to the running one on first use
+
+        Returns:
+            asyncio.AbstractEventLoop: the event loop
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    @staticmethod
+    def _wake(waiters: t.Deque[asyncio.Future], n: int = 1):
+        """wake up to n waiting futures
+
+        Args:
+            waiters (t.Deque[asyncio.Future]): waiting futures
+            n (int, optional): number of futures to wake. Defaults to 1.
+        """
+        while waiters and n > 0:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                n -= 1
+
+    async def _wait(self, waiters: t.Deque[asyncio.Future]):
+        """wait until another coroutine wakes this one
+
+        Args:
+            waiters (t.Deque[asyncio.Future]): queue of waiting futures
+        """
+        waiter = self._get_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # pass the wake up on if it was already given to this waiter
+            if waiter.done() and not waiter.cancelled():
+                self._wake(waiters)
+            raise
+
+    def qsize(self) -> int:
+        """Return size of the ring buffer
+
+        Returns:
+            int: the size of ring
+        """
+        return self._producer_sequence - self._consumer_sequence
+
+    def is_full(self) -> bool:
+        """Check if the ring is full or not
+
+        Returns:
+            bool: True if the ring is full
+        """
+        return self.qsize() >= self._size
+
+    def is_empty(self) -> bool:
+        """Check if the ring is empty or not
+
+        Returns:
+            bool: True if empty
+        """
+        return self.qsize() == 0
+
+    def is_closed(self) -> bool:
+        """Check if the ring is closed
+
+        Returns:
+            bool: True if closed
+        """
+        return self._closed
+
+    def close(self):
+        """Close the ring, async iteration stops once it is drained"""
+        self._closed = True
+        self._wake(self._getters, len(self._getters))
+
+    def put_nowait(self, event: Event) -> int:
+        """put a new event in ring buffer
+
+        Args:
+            event (Event): New event is put by a producer
+
+        Returns:
+            int: index of event in ring buffer
+
+        Raises:
+            RingFullError: Ring is full
+        """
+        if not isinstance(event, Event):
+            raise ValueError('Cannot put anything other than Event in queue')
+        if self.is_full():
+            raise RingFullError('ring is full')
+        index = self._producer_sequence % self._size
+        self._ring[index] = event
+        self._producer_sequence += 1
+        self._wake(self._getters)
+        return index
+
+    def put_many_nowait(self, events: t.Sequence[Event]) -> int:
+        """put a run of events in ring buffer
+
+        Args:
+            events (t.Sequence[Event]): New events are put by a producer
+
+        Returns:
+            int: number of events put, may be less than len(events) if the
+                ring is filled up. The caller should retry the rest
+
+        Raises:
+            RingFullError: Ring is full and no event can be put
+            ValueError: an item is not an Event
+        """
+        for e in events:
+            if not isinstance(e, Event):
+                raise ValueError(
+                    'Cannot put anything other than Event in queue')
+        if not events:
+            return 0
+        free = self._size - self.qsize()
+        if free == 0:
+            raise RingFullError('ring is full')
+        n = min(free, len(events))
+        start = self._producer_sequence % self._size
+        first_run = min(n, self._size - start)
+        self._ring[start:start + first_run] = events[:first_run]
+        if first_run < n:
+            self._ring[:n - first_run] = events[first_run:n]
+        self._producer_sequence += n
+        self._wake(self._getters, n)
+        return n
+
+    def get_many_nowait(self, max_n: t.Optional[int] = None) -> t.List[Event]:
+        """get up to max_n events
+
+        Args:
+            max_n (t.Optional[int], optional): maximum number of events.
+                Defaults to None, which takes every available event.
+
+        Returns:
+            t.List[Event]: events in order, empty if the ring is empty
+        """
+        n = self.qsize()
+        if max_n is not None:
+            n = min(n, max_n)
+        if n <= 0:
+            return []
+        start = self._consumer_sequence % self._size
+        first_run = min(n, self._size - start)
+        events = self._ring[start:start + first_run]
+        self._ring[start:start + first_run] = [None] * first_run
+        if first_run < n:
+            events += self._ring[:n - first_run]
+            self._ring[:n - first_run] = [None] * (n - first_run)
+        self._consumer_sequence += n
+        self._wake(self._putters, n)
+        # taken slots always hold an Event
+        return t.cast(t.List[Event], events)
+
+    def get_nowait(self) -> Event:
+        """get the first event in the queue
+
+        Returns:
+            Event: The first event
+
+        Raises:
+            RingEmptyError: Ring is Empty
+        """
+        events = self.get_many_nowait(1)
+        if not events:
+            raise RingEmptyError('Ring is empty')
+        return events[0]
+
+    async def put(self, event: Event) -> int:
+        """put a new event, wait while the ring is full
+
+        Args:
+            event (Event): New event is put by a producer
+
+        Returns:
+            int: index of event in ring buffer
+        """
+        while self.is_full():
+            await self._wait(self._putters)
+        return self.put_nowait(event)
+
+    async def put_many(self, events: t.Sequence[Event]) -> int:
+        """put every event, wait while the ring is full
+
+        Args:
+            events (t.Sequence[Event]): New events are put by a producer
+
+        Returns:
+            int: number of events put
+        """
+        put_count = 0
+        while put_count < len(events):
+            while self.is_full():
+                await self._wait(self._putters)
+            put_count += self.put_many_nowait(events[put_count:])
+        return put_count
+
+    async def get_many(self, max_n: t.Optional[int] = None) -> t.List[Event]:
+        """get up to max_n events, wait while the ring is empty
+
+        Args:
+            max_n (t.Optional[int], optional): maximum number of events.
+                Defaults to None, which takes every available event.
+
+        Returns:
+            t.List[Event]: events in order, empty only if the ring is
+                closed and drained
+        """
+        while self.is_empty() and not self._closed:
+            await self._wait(self._getters)
+        return self.get_many_nowait(max_n)
+
+    async def get(self) -> Event:
+        """get the first event, wait while the ring is empty
+
+        Returns:
+            Event: The first event
+
+        Raises:
+            RingEmptyError: the ring is closed and drained
+        """
+        events = await self.get_many(1)
+        if not events:
+            raise RingEmptyError('Ring is closed')
+        return events[0]
+
+    def __aiter__(self) -> 'AsyncRingBuffer':
+        """iterate over events until the ring is closed and drained"""
+        return self
+
+    async def __anext__(self) -> Event:
+        """next event, wait while the ring is empty
+
+        Raises:
+            StopAsyncIteration: the ring is closed and drained
+        """
+        try:
+            return await self.get()
+        except RingEmptyError:
+            raise StopAsyncIteration  # pylint: disable=raise-missing-from
+
+    def put_threadsafe(self,
+                       events: t.Sequence[Event]
+                       ) -> 'concurrent.futures.Future[int]':
+        """put a batch of events from another thread, with one
+        loop.call_soon_threadsafe hop per batch
+
+        Args:
+            events (t.Sequence[Event]): New events are put by a producer
+
+        Returns:
+            concurrent.futures.Future[int]: resolves to the number of
+                events put once they are all in the ring, wait on it for
+                backpressure
+
+        Raises:
+            RuntimeError: the ring is not bound to an event loop yet
+        """
+        if self._loop is None:
+            raise RuntimeError('ring is not bound to an event loop, '
+                               'pass loop to AsyncRingBuffer')
+        return asyncio.run_coroutine_threadsafe(
+            self.put_many(list(events)), self._loop)
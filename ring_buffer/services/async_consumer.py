@@ -0,0 +1,157 @@
+"""This module is about asyncio consumer of ring buffer
+"""
+import asyncio
+import typing as t
+
+from ring_buffer.model import event
+from ring_buffer.services import async_buffer
+from ring_buffer.services.consumer import (ConsumerAlreadyRunningError,
+                                           ConsumerIsNotStopError)
+
+AsyncCallback = t.Callable[[event.Event], t.Awaitable[None]]
+
+
+class AsyncConsumer:
+    """asyncio Consumer, it awaits a coroutine callback for each event with
+    at most `concurrency` callbacks running at the same time. Events are
+    handled in order only when concurrency is 1"""
+
+    def __init__(self,
+                 name: str,
+                 ring_buffer: async_buffer.AsyncRingBuffer,
+                 concurrency: int = 1):
+        """Init consumer
+
+        Args:
+            name (str): name of the consumer
+            ring_buffer (async_buffer.AsyncRingBuffer): AsyncRingBuffer
+            concurrency (int, optional): maximum number of callbacks
+                running at the same time. Defaults to 1.
+        """
+        if concurrency <= 0:
+            raise ValueError('concurrency cannot be lesser than 1')
+        self.name = name
+        self._ring_buffer = ring_buffer
+        self._concurrency = concurrency
+        self._callback: t.Optional[AsyncCallback] = None
+        self._task: t.Optional[asyncio.Task] = None
+        self._running: t.Set[asyncio.Task] = set()
+        self._semaphore: t.Optional[asyncio.Semaphore] = None
+        self._is_stop: bool = False
+
+    def register_callback(self, callback: AsyncCallback):
+        """Add coroutine callback function
+
+        Args:
+            callback (AsyncCallback): coroutine function which receives an
+                Event
+        """
+        self._callback = callback
+
+    def is_running(self) -> bool:
+        """Check if the consumer is running or stop
+
+        Returns:
+            bool: True if it's running
+        """
+        return self._task is not None and not self._task.done()
+
+    def _on_callback_done(self, task: asyncio.Task):
+        """free the slot of a finished callback and report its error
+
+        Args:
+            task (asyncio.Task): task of the callback
+        """
+        self._running.discard(task)
+        if self._semaphore is not None:
+            self._semaphore.release()
+        if not task.cancelled() and task.exception() is not None:
+            task.get_loop().call_exception_handler({
+                'message': f'callback of consumer {self.name} failed',
+                'exception': task.exception(),
+                'task': task,
+            })
+
+    async def _consume(self):
+        """consume events from the ring until it is closed and drained
+        """
+        semaphore = self._semaphore
+        callback = self._callback
+        while True:
+            events = await self._ring_buffer.get_many()
+            if not events:
+                break
+            await self._dispatch(semaphore, callback, events)
+        await self.join()
+
+    async def _dispatch(self,
+                        semaphore: asyncio.Semaphore,
+                        callback: AsyncCallback,
+                        events: t.List[event.Event]):
+        """start the callback of each event once a slot is free. The
+        events are already taken from the ring, so a stop while waiting
+        for a slot still dispatches the rest of them, then cancels
+
+        Args:
+            semaphore (asyncio.Semaphore): slots of the running callbacks
+            callback (AsyncCallback): the callback
+            events (t.List[event.Event]): the events
+        """
+        cancelled = False
+        for e in events:
+            while True:
+                try:
+                    await semaphore.acquire()
+                    break
+                except asyncio.CancelledError:
+                    cancelled = True
+            task = asyncio.ensure_future(callback(e))
+            self._running.add(task)
+            task.add_done_callback(self._on_callback_done)
+        if cancelled:
+            raise asyncio.CancelledError()
+
+    def start(self) -> asyncio.Task:
+        """Start consume from ring buffer, call it from a running event loop
+
+        Returns:
+            asyncio.Task: task of the consumer
+
+        Raises:
+            ValueError: callback function cannot be None
+            ConsumerAlreadyRunningError: the consumer is already running
+        """
+        if self._callback is None:
+            raise ValueError("callback function cannot be None")
+        if self.is_running():
+            raise ConsumerAlreadyRunningError('consumer is already running')
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        self._is_stop = False
+        task = asyncio.ensure_future(self._consume())
+        self._task = task
+        return task
+
+    def stop(self):
+        """Stop reading from the ring, running callbacks are not cancelled.
+        Events already taken from the ring are still dispatched, as
+        concurrency allows, call join to wait for them
+        """
+        self._is_stop = True
+        if self._task is not None:
+            self._task.cancel()
+
+    async def join(self):
+        """Wait until every running callback is done, after stop also
+        the callbacks of the events the consumer took before it stopped
+
+        Raises:
+            ConsumerIsNotStopError: called before start
+        """
+        if self._semaphore is None:
+            raise ConsumerIsNotStopError('consumer is not started')
+        task = self._task
+        if self._is_stop and task is not None and \
+                task is not asyncio.current_task():
+            await asyncio.wait({task})
+        while self._running:
+            await asyncio.wait(set(self._running))
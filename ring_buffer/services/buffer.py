@@ -1,9 +1,13 @@
 """RingBuffer
 """
+import enum
 import typing as t
 import threading
 
 from ring_buffer.model.event import Event
+from ring_buffer.services.arena import ArenaBlock, ByteArena, BytesLike
+from ring_buffer.services.journal import Journal
+from ring_buffer.services.stats import RingBufferStats, RingStats
 
 
 class RingFullError(Exception):
@@ -18,23 +22,115 @@ class NullEventError(Exception):
     """Event in ring is Null/None"""
 
 
+class OverflowPolicy(str, enum.Enum):
+    """What RingBuffer.put does when the ring is full"""
+    # raise RingFullError
+    RAISE = 'raise'
+    # wait for a free slot
+    BLOCK = 'block'
+    # drop the oldest event in the ring to make room
+    OVERWRITE_OLDEST = 'overwrite_oldest'
+    # drop the new event
+    DROP_NEWEST = 'drop_newest'
+
+
+def _check_events(events: t.Sequence[Event]):
+    """Check that every item of a batch is an Event, a None would be taken
+    for an empty slot
+
+    Args:
+        events (t.Sequence[Event]): the events
+
+    Raises:
+        ValueError: an item is not an Event
+    """
+    for e in events:
+        if not isinstance(e, Event):
+            raise ValueError('Cannot put anything other than Event in queue')
+
+
 class RingBuffer:
     """A circular queue, faster than normal queue
     """
 
-    def __init__(self, size: int = 2**10):
+    def __init__(self,
+                 size: int = 2**10,
+                 overflow_policy: t.Union[OverflowPolicy, str] =
+                 OverflowPolicy.RAISE,
+                 enable_stats: bool = False,
+                 latency_sample_every: int = 0,
+                 journal: t.Optional[Journal] = None,
+                 journal_auto_commit: bool = True,
+                 journal_commit_every: int = 64,
+                 arena: t.Optional[ByteArena] = None):
         """Init RingBuffer
 
         Args:
             size (int, optional): size of the queue. Defaults to 2**10.
+            overflow_policy (t.Union[OverflowPolicy, str], optional):
+                what put does when the ring is full, 'raise', 'block',
+                'overwrite_oldest' or 'drop_newest'.
+                Defaults to OverflowPolicy.RAISE.
+            enable_stats (bool, optional): keep the counters returned by
+                stats. Defaults to False.
+            latency_sample_every (int, optional): with enable_stats,
+                measure put-to-get latency of one event every this number
+                of puts, 0 turns it off. Defaults to 0.
+            journal (t.Optional[Journal], optional): append every put
+                event to this journal, and replay its unconsumed events
+                in the ring now. Defaults to None.
+            journal_auto_commit (bool, optional): commit events in the
+                journal as they leave the ring, else call commit once they
+                are handled. Defaults to True.
+            journal_commit_every (int, optional): with journal_auto_commit,
+                commit once this number of events left the ring, a crash
+                of the process replays at most this number of taken
+                events, commit flushes it. Defaults to 64.
+            arena (t.Optional[ByteArena], optional): arena of put_bytes
+                for payloads which are not in an ArenaBlock yet.
+                Defaults to None.
         """
         if size <= 0:
             raise ValueError('Size cannot be lesser than 0')
+        if journal_commit_every <= 0:
+            raise ValueError('journal_commit_every must be greater than 0')
         self._size: int = size
-        self._ring: t.List[t.Optional[Event]] = [None] * size
+        self._overflow_policy = OverflowPolicy(overflow_policy)
+        self._dropped_count: int = 0
+        self._ring: t.List[t.Optional[t.Union[Event, ArenaBlock]]] = \
+            [None] * size
         self._producer_counter: int = 0
         self._consumer_counter: int = 0
         self._lock = threading.Lock()
+        # wake blocked producers/consumers as soon as the ring changes
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._stats: t.Optional[RingBufferStats] = \
+            RingBufferStats(latency_sample_every) if enable_stats else None
+        self._journal = journal
+        self._journal_auto_commit = journal_auto_commit
+        self._journal_commit_every = journal_commit_every
+        # journal sequence of the oldest event in the ring
+        self._journal_head: int = 0
+        # events taken since the last auto commit
+        self._journal_uncommitted: int = 0
+        self._arena = arena
+        if journal is not None:
+            self._replay_journal(journal)
+
+    def _replay_journal(self, journal: Journal):
+        """Put the unconsumed events of the journal in the ring
+
+        Args:
+            journal (Journal): the journal
+        """
+        events = [e for _, e in journal.replay()]
+        if len(events) > self._size:
+            raise ValueError(f'journal has {len(events)} unconsumed events, '
+                             f'ring size is {self._size}')
+        self._ring[:len(events)] = events
+        self._producer_counter = len(events) % self._size
+        self._journal_head = journal.committed_sequence
 
     def _get_new_event_index(self) -> int:
         """Get the index of new event in ring
@@ -66,6 +162,25 @@ class RingBuffer:
         """
         return self._consumer_counter == self._producer_counter
 
+    def _qsize(self) -> int:
+        """Return number of events in the ring, caller must hold the lock
+
+        Returns:
+            int: the number of events in ring
+        """
+        if self._consumer_counter < self._producer_counter:
+            return self._producer_counter - self._consumer_counter
+        if self._consumer_counter > self._producer_counter:
+            return self._size - self._consumer_counter + self._producer_counter
+        if self._ring[self._consumer_counter] is None:
+            return 0
+        return self._size
+
+    @property
+    def size(self) -> int:
+        """Number of slots in the ring"""
+        return self._size
+
     def qsize(self) -> int:
         """Return size of the ring buffer
 
@@ -73,12 +188,83 @@ class RingBuffer:
             int: the size of ring
         """
         with self._lock:
-            if self._consumer_counter <= self._producer_counter:
-                return self._producer_counter - self._consumer_counter
-            return self._size - self._consumer_counter + self._producer_counter
+            return self._qsize()
+
+    def commit(self, sequence: t.Optional[int] = None):
+        """Commit consumed events in the journal, needed when
+        journal_auto_commit is off, else it flushes the batched commit
+
+        Args:
+            sequence (t.Optional[int], optional): journal sequence of the
+                first event not handled yet. Defaults to None, which
+                commits every event taken out of the ring.
+        """
+        with self._lock:
+            if self._journal is None:
+                return
+            if sequence is None:
+                self._journal_uncommitted = 0
+            self._journal.commit(self._journal_head if sequence is None
+                                 else min(sequence, self._journal_head))
+
+    @property
+    def sequence(self) -> int:
+        """Journal sequence of the next event to get, 0 without journal"""
+        return self._journal_head
+
+    def seek(self, sequence: int):
+        """Refill the ring with the journal events from a sequence, so
+        that a consumer resumes from its checkpoint. Events before it are
+        dropped from the ring, events after it are replayed, they must
+        not be committed yet, so use journal_auto_commit=False
+
+        Args:
+            sequence (int): journal sequence of the next event to get
+
+        Raises:
+            ValueError: the ring has no journal, the sequence is not in
+                the journal, or its events do not fit in the ring
+        """
+        with self._lock:
+            if self._journal is None:
+                raise ValueError('seek needs a journal')
+            if sequence == self._journal_head:
+                return
+            if not self._journal.committed_sequence <= sequence <= \
+                    self._journal.next_sequence:
+                raise ValueError(
+                    f'sequence {sequence} is not in the journal, which '
+                    f'holds [{self._journal.committed_sequence}, '
+                    f'{self._journal.next_sequence})')
+            events = [e for _, e in self._journal.replay(sequence)]
+            if len(events) > self._size:
+                raise ValueError(f'journal has {len(events)} events from '
+                                 f'{sequence}, ring size is {self._size}')
+            self._ring = [None] * self._size
+            self._ring[:len(events)] = events
+            self._consumer_counter = 0
+            self._producer_counter = len(events) % self._size
+            self._journal_head = sequence
+            self._journal_uncommitted = 0
+            self._not_full.notify_all()
+            if events:
+                self._not_empty.notify_all()
+
+    def stats(self) -> t.Optional[RingStats]:
+        """Return a snapshot of the statistics of the ring in O(1)
+
+        Returns:
+            t.Optional[RingStats]: statistics, None if enable_stats is off
+        """
+        with self._lock:
+            if self._stats is None:
+                return None
+            return self._stats.snapshot(self._size, self._qsize(),
+                                        self._dropped_count)
 
     def count_none_pointer(self) -> int:
-        """return the total number of None in ring
+        """return the total number of None in ring, it scans the whole
+        ring. Use qsize or stats for monitoring
 
         Returns:
             int: The total number of None type in ring
@@ -110,43 +296,566 @@ class RingBuffer:
             return self._ring[self._consumer_counter] is None
         return False
 
-    def put(self, event: Event) -> int:
+    @property
+    def overflow_policy(self) -> OverflowPolicy:
+        """What put does when the ring is full"""
+        return self._overflow_policy
+
+    @property
+    def dropped_count(self) -> int:
+        """Number of events dropped by a lossy overflow policy"""
+        return self._dropped_count
+
+    def _drop_oldest(self, n: int):
+        """advance the consumer counter over the n oldest events, caller
+        must hold the lock
+
+        Args:
+            n (int): number of events to drop
+        """
+        dropped = self._take(n, dropped=True)
+        for e in dropped:
+            if isinstance(e, ArenaBlock):
+                # nobody will read it, give it back to its arena
+                e.release()
+        self._dropped_count += len(dropped)
+
+    def _make_room(self,
+                   n: int,
+                   block: t.Optional[bool],
+                   timeout: t.Optional[float]) -> int:
+        """apply the overflow policy before putting n events, caller must
+        hold the lock
+
+        Args:
+            n (int): number of events to put
+            block (t.Optional[bool]): wait for a free slot, None lets the
+                overflow policy decide
+            timeout (t.Optional[float]): maximum seconds to wait
+
+        Returns:
+            int: number of free slots, 0 if the events are dropped
+
+        Raises:
+            RingFullError: Ring is full
+        """
+        free = self._size - self._qsize()
+        if free >= n:
+            return free
+        if self._overflow_policy is OverflowPolicy.OVERWRITE_OLDEST:
+            self._drop_oldest(min(n, self._size) - free)
+            return self._size - self._qsize()
+        if self._overflow_policy is OverflowPolicy.DROP_NEWEST:
+            self._dropped_count += n - free
+            return free
+        if free > 0:
+            return free
+        if block is None:
+            block = self._overflow_policy is OverflowPolicy.BLOCK
+        self._wait_not_full(block, timeout)
+        return self._size - self._qsize()
+
+    def _wait_not_full(self, block: bool, timeout: t.Optional[float]):
+        """wait until the ring has a free slot, caller must hold the lock
+
+        Args:
+            block (bool): wait for a free slot if True, else fail at once
+            timeout (t.Optional[float]): maximum seconds to wait,
+                None waits forever
+
+        Raises:
+            RingFullError: Ring is still full
+        """
+        if not self.is_full():
+            return
+        if not block or not self._not_full.wait_for(
+                lambda: not self.is_full(), timeout):
+            if self._stats is not None:
+                self._stats.full_rejections += 1
+            raise RingFullError('ring is full')
+
+    def _wait_not_empty(self, block: bool, timeout: t.Optional[float]):
+        """wait until the ring has an event, caller must hold the lock
+
+        Args:
+            block (bool): wait for an event if True, else fail at once
+            timeout (t.Optional[float]): maximum seconds to wait,
+                None waits forever
+
+        Raises:
+            RingEmptyError: Ring is still empty
+        """
+        if not self.is_empty():
+            return
+        if not block or not self._not_empty.wait_for(
+                lambda: not self.is_empty(), timeout):
+            raise RingEmptyError('Ring is empty')
+
+    def wait_not_empty(self, timeout: t.Optional[float] = None) -> bool:
+        """block until the ring has an event or the timeout expires
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait,
+                None waits forever. Defaults to None.
+
+        Returns:
+            bool: True if the ring has an event
+        """
+        with self._lock:
+            return self._not_empty.wait_for(lambda: not self.is_empty(),
+                                            timeout)
+
+    def put(self,
+            event: Event,
+            block: t.Optional[bool] = None,
+            timeout: t.Optional[float] = None) -> int:
         """put a new event in ring buffer
 
         Args:
             event (Event): New event is put by a producer
+            block (t.Optional[bool], optional): wait for a free slot if the
+                ring is full. Defaults to None, which blocks only with the
+                'block' overflow policy. Lossy policies never block.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when blocking, None waits forever. Defaults to None.
 
         Returns:
-            int: index of event in ring buffer
+            int: index of event in ring buffer, -1 if the event is dropped
 
         Raises:
             RingFullError: Ring is full
         """
         if not isinstance(event, Event):
             raise ValueError('Cannot put anything other than Event in queue')
+        if self._journal is None:
+            return self._put(event, block, timeout)
+        # encode outside of the lock, only the copy is serialized
+        return self._put(event, block, timeout,
+                         self._journal.encode((event,)))
+
+    def put_bytes(self,
+                  payload: t.Union[ArenaBlock, BytesLike],
+                  block: t.Optional[bool] = None,
+                  timeout: t.Optional[float] = None) -> int:
+        """put a raw payload without wrapping it in an Event. An ArenaBlock
+        filled in place is put as is, other bytes are copied once in a
+        block of the arena of the ring. Consumers get the ArenaBlock, read
+        its view and release it. get, get_many and every consumer built on
+        them return these ArenaBlocks among the Events of the ring, so any
+        consumer of Events of a ring which gets payloads must handle
+        ArenaBlock, which has no event_type, data or sid
+
+        Args:
+            payload (t.Union[ArenaBlock, BytesLike]): the payload
+            block (t.Optional[bool], optional): see put. Defaults to None.
+            timeout (t.Optional[float], optional): see put.
+                Defaults to None.
+
+        Returns:
+            int: index of the payload in ring buffer, -1 if it is dropped,
+                its block is released then
+
+        Raises:
+            RingFullError: Ring is full, the caller still owns its block
+            ValueError: no arena to copy bytes in, or the ring has a
+                journal, which cannot store views
+            ArenaExhaustedError: the arena has no free block
+        """
+        if self._journal is not None:
+            raise ValueError('put_bytes is not supported with a journal')
+        if isinstance(payload, ArenaBlock):
+            arena_block = payload
+        elif self._arena is None:
+            raise ValueError('the ring has no arena to copy bytes in')
+        else:
+            arena_block = self._arena.copy(payload)
+        try:
+            index = self._put(arena_block, block, timeout)
+        except RingFullError:
+            if arena_block is not payload:
+                arena_block.release()
+            raise
+        if index == -1:
+            arena_block.release()
+        return index
+
+    def _put(self,
+             event: t.Union[Event, ArenaBlock],
+             block: t.Optional[bool],
+             timeout: t.Optional[float],
+             frames: t.Optional[t.List[t.Tuple[bytes, int]]] = None) -> int:
+        """put an event or a block, see put
+
+        Args:
+            event (t.Union[Event, ArenaBlock]): New event or block
+            block (t.Optional[bool]): see put
+            timeout (t.Optional[float]): see put
+            frames (t.Optional[t.List[t.Tuple[bytes, int]]], optional):
+                journal frames of the event. Defaults to None.
+
+        Returns:
+            int: index of event in ring buffer, -1 if the event is dropped
+        """
         with self._lock:
-            if self.is_full():
-                raise RingFullError('ring is full')
+            if self.is_full() and not self._make_room(1, block, timeout):
+                return -1
+            if frames is not None and self._journal is not None:
+                self._journal.append_frames(frames)
             new_event_index = self._get_new_event_index()
             self._ring[new_event_index] = event
+            self._not_empty.notify()
+            if self._stats is not None:
+                self._stats.on_put(1, self._qsize())
             return new_event_index
 
-    def get(self) -> Event:
+    def put_many(self,
+                 events: t.Sequence[Event],
+                 block: t.Optional[bool] = None,
+                 timeout: t.Optional[float] = None) -> int:
+        """put a run of events in ring buffer under one lock acquisition.
+        Events are copied into the ring with at most two slice assignments
+
+        Args:
+            events (t.Sequence[Event]): New events are put by a producer
+            block (t.Optional[bool], optional): wait for a free slot if the
+                ring is full. Defaults to None, which blocks only with the
+                'block' overflow policy. Lossy policies never block.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when blocking, None waits forever. Defaults to None.
+
+        Returns:
+            int: number of events put, may be less than len(events) if the
+                ring is filled up or events are dropped. With the 'raise'
+                and 'block' policies the caller should retry the rest
+
+        Raises:
+            RingFullError: Ring is full and no event can be put
+            ValueError: an item is not an Event
+        """
+        if not events:
+            return 0
+        _check_events(events)
+        frames = None
+        encoded = len(events)
+        if self._journal is not None:
+            # encode outside of the lock, only the copy is serialized
+            frames = self._journal.encode(events)
+        with self._lock:
+            free = self._make_room(len(events), block, timeout)
+            if len(events) > free and \
+                    self._overflow_policy is OverflowPolicy.OVERWRITE_OLDEST:
+                # more events than slots, only the newest ones are kept
+                self._dropped_count += len(events) - free
+                events = events[len(events) - free:]
+            n = min(free, len(events))
+            if n == 0:
+                return 0
+            if frames is not None and self._journal is not None:
+                if n != encoded:
+                    # only part of the batch fits, rare, encode it again
+                    frames = self._journal.encode(events[:n])
+                self._journal.append_frames(frames)
+            start = self._producer_counter
+            first_run = min(n, self._size - start)
+            self._ring[start:start + first_run] = events[:first_run]
+            if first_run < n:
+                self._ring[:n - first_run] = events[first_run:n]
+            self._producer_counter = (start + n) % self._size
+            self._not_empty.notify(n)
+            if self._stats is not None:
+                self._stats.on_put(n, self._qsize())
+            return n
+
+    def _take(self,
+              max_n: t.Optional[int],
+              dropped: bool = False) -> t.List[t.Union[Event, ArenaBlock]]:
+        """take up to max_n events out of the ring, caller must hold the lock
+
+        Args:
+            max_n (t.Optional[int]): maximum number of events, None for all
+            dropped (bool, optional): True if the events are overwritten
+                instead of read. Defaults to False.
+
+        Returns:
+            t.List[t.Union[Event, ArenaBlock]]: events in order, empty if
+                the ring is empty
+        """
+        n = self._qsize()
+        if max_n is not None:
+            n = min(n, max_n)
+        if n <= 0:
+            return []
+        start = self._consumer_counter
+        first_run = min(n, self._size - start)
+        events = self._ring[start:start + first_run]
+        self._ring[start:start + first_run] = [None] * first_run
+        if first_run < n:
+            events += self._ring[:n - first_run]
+            self._ring[:n - first_run] = [None] * (n - first_run)
+        self._consumer_counter = (start + n) % self._size
+        self._not_full.notify(n)
+        if self._stats is not None:
+            self._stats.on_take(n, dropped)
+        if self._journal is not None:
+            self._journal_head += n
+            self._journal_uncommitted += n
+            if self._journal_auto_commit and self._journal_uncommitted >= \
+                    self._journal_commit_every:
+                self._journal_uncommitted = 0
+                self._journal.commit(self._journal_head)
+        # taken slots always hold an event
+        return t.cast(t.List[t.Union[Event, ArenaBlock]], events)
+
+    def get_many(self,
+                 max_n: t.Optional[int] = None,
+                 block: bool = False,
+                 timeout: t.Optional[float] = None
+                 ) -> t.List[t.Union[Event, ArenaBlock]]:
+        """get up to max_n events in one critical section
+
+        Args:
+            max_n (t.Optional[int], optional): maximum number of events.
+                Defaults to None, which takes every available event.
+            block (bool, optional): wait for at least one event if the ring
+                is empty. Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            t.List[t.Union[Event, ArenaBlock]]: events in order, empty if
+                the ring is empty or the timeout expired
+        """
+        with self._lock:
+            try:
+                self._wait_not_empty(block, timeout)
+            except RingEmptyError:
+                return []
+            return self._take(max_n)
+
+    def drain_into(self,
+                   events: t.List[t.Union[Event, ArenaBlock]]) -> int:
+        """move every available event to the end of a list
+
+        Args:
+            events (t.List[t.Union[Event, ArenaBlock]]): list which
+                receives the events
+
+        Returns:
+            int: number of events moved
+        """
+        with self._lock:
+            taken = self._take(None)
+        events.extend(taken)
+        return len(taken)
+
+    def get(self,
+            block: bool = False,
+            timeout: t.Optional[float] = None
+            ) -> t.Union[Event, ArenaBlock]:
         """get the first event in the queue, this equivalent to popleft
 
+        Args:
+            block (bool, optional): wait for an event if the ring is empty.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
         Returns:
-            Event: The first event
+            t.Union[Event, ArenaBlock]: The first event, or ArenaBlock if
+                put by put_bytes
 
         Raises:
             RingEmptyError: Ring is Empty
         """
         with self._lock:
-            if self.is_empty():
-                raise RingEmptyError('Ring is empty')
+            try:
+                self._wait_not_empty(block, timeout)
+            except RingEmptyError:
+                # an empty get_many is an idle poll, only get rejects
+                if self._stats is not None:
+                    self._stats.empty_rejections += 1
+                raise
             first_event_index = self._get_first_event_index()
             first_event = self._ring[first_event_index]
-            if not isinstance(first_event, Event):
+            if first_event is None:
                 raise NullEventError(f"Event get from ring buffer is not \
                     Event, receive {first_event}")
             self._ring[first_event_index] = None
+            self._not_full.notify()
+            if self._stats is not None:
+                self._stats.on_take(1)
+            if self._journal is not None:
+                self._journal_head += 1
+                self._journal_uncommitted += 1
+                if self._journal_auto_commit and \
+                        self._journal_uncommitted >= \
+                        self._journal_commit_every:
+                    self._journal_uncommitted = 0
+                    self._journal.commit(self._journal_head)
             return first_event
+
+
+class SPSCRingBuffer:
+    """A lock-free circular queue for one producer and one consumer.
+
+    The producer only writes the producer sequence and the consumer only
+    writes the consumer sequence, both increase monotonically. The index of
+    a sequence in the ring is ``sequence & mask``, so size must be a power
+    of two. It is not safe with more than one producer or consumer thread.
+    """
+
+    def __init__(self, size: int = 2**10):
+        """Init SPSCRingBuffer
+
+        Args:
+            size (int, optional): size of the queue, must be a power of two.
+                Defaults to 2**10.
+        """
+        if size <= 0:
+            raise ValueError('Size cannot be lesser than 0')
+        if size & (size - 1):
+            raise ValueError('Size must be a power of two')
+        self._size: int = size
+        self._mask: int = size - 1
+        self._ring: t.List[t.Optional[Event]] = [None] * size
+        self._producer_sequence: int = 0
+        self._consumer_sequence: int = 0
+
+    def qsize(self) -> int:
+        """Return size of the ring buffer
+
+        Returns:
+            int: the size of ring
+        """
+        return self._producer_sequence - self._consumer_sequence
+
+    def is_full(self) -> bool:
+        """Check if the ring is full or not
+
+        Returns:
+            bool: True if the ring is full
+        """
+        return self._producer_sequence - self._consumer_sequence >= self._size
+
+    def is_empty(self) -> bool:
+        """Check if the ring is empty or not
+
+        Returns:
+            bool: True if empty
+        """
+        return self._producer_sequence == self._consumer_sequence
+
+    def put(self, event: Event) -> int:
+        """put a new event in ring buffer, only call from the producer thread
+
+        Args:
+            event (Event): New event is put by a producer
+
+        Returns:
+            int: index of event in ring buffer
+
+        Raises:
+            RingFullError: Ring is full
+        """
+        if not isinstance(event, Event):
+            raise ValueError('Cannot put anything other than Event in queue')
+        sequence = self._producer_sequence
+        if sequence - self._consumer_sequence >= self._size:
+            raise RingFullError('ring is full')
+        index = sequence & self._mask
+        self._ring[index] = event
+        # publish only after the slot is written
+        self._producer_sequence = sequence + 1
+        return index
+
+    def put_many(self, events: t.Sequence[Event]) -> int:
+        """put a run of events in ring buffer, only call from the producer
+        thread
+
+        Args:
+            events (t.Sequence[Event]): New events are put by a producer
+
+        Returns:
+            int: number of events put, may be less than len(events) if the
+                ring is filled up. The caller should retry the rest
+
+        Raises:
+            RingFullError: Ring is full and no event can be put
+            ValueError: an item is not an Event
+        """
+        if not events:
+            return 0
+        _check_events(events)
+        sequence = self._producer_sequence
+        free = self._size - (sequence - self._consumer_sequence)
+        if free == 0:
+            raise RingFullError('ring is full')
+        n = min(free, len(events))
+        start = sequence & self._mask
+        first_run = min(n, self._size - start)
+        self._ring[start:start + first_run] = events[:first_run]
+        if first_run < n:
+            self._ring[:n - first_run] = events[first_run:n]
+        self._producer_sequence = sequence + n
+        return n
+
+    def get(self) -> Event:
+        """get the first event in the queue, only call from the consumer
+        thread
+
+        Returns:
+            Event: The first event
+
+        Raises:
+            RingEmptyError: Ring is Empty
+        """
+        sequence = self._consumer_sequence
+        if sequence == self._producer_sequence:
+            raise RingEmptyError('Ring is empty')
+        index = sequence & self._mask
+        first_event = self._ring[index]
+        self._ring[index] = None
+        # release the slot only after it is read
+        self._consumer_sequence = sequence + 1
+        return t.cast(Event, first_event)
+
+    def get_many(self, max_n: t.Optional[int] = None) -> t.List[Event]:
+        """get up to max_n events, only call from the consumer thread
+
+        Args:
+            max_n (t.Optional[int], optional): maximum number of events.
+                Defaults to None, which takes every available event.
+
+        Returns:
+            t.List[Event]: events in order, empty if the ring is empty
+        """
+        sequence = self._consumer_sequence
+        n = self._producer_sequence - sequence
+        if max_n is not None:
+            n = min(n, max_n)
+        if n <= 0:
+            return []
+        start = sequence & self._mask
+        first_run = min(n, self._size - start)
+        events = self._ring[start:start + first_run]
+        self._ring[start:start + first_run] = [None] * first_run
+        if first_run < n:
+            events += self._ring[:n - first_run]
+            self._ring[:n - first_run] = [None] * (n - first_run)
+        self._consumer_sequence = sequence + n
+        # taken slots always hold an event
+        return t.cast(t.List[Event], events)
+
+    def drain_into(self, events: t.List[Event]) -> int:
+        """move every available event to the end of a list, only call from
+        the consumer thread
+
+        Args:
+            events (t.List[Event]): list which receives the events
+
+        Returns:
+            int: number of events moved
+        """
+        taken = self.get_many()
+        events.extend(taken)
+        return len(taken)
@@ -0,0 +1,132 @@
+"""Memory-mapped checkpoint of the position of a consumer, a restarted
+consumer resumes from it instead of acknowledging every event
+"""
+import mmap
+import os
+import struct
+import time
+import typing as t
+import zlib
+
+# committed sequence and crc32 of it, written with one pack_into
+_CHECKPOINT = struct.Struct('<QI')
+_SEQUENCE = struct.Struct('<Q')
+_CHECKPOINT_SIZE = mmap.PAGESIZE
+
+
+def _crc(sequence: int) -> int:
+    """Return the crc32 of a packed sequence"""
+    return zlib.crc32(_SEQUENCE.pack(sequence))
+
+
+class Checkpoint:
+    """Sequence of the first event a consumer has not handled yet, stored
+    in a small memory-mapped file.
+
+    The consumer advances the position after each batch it handles, the
+    position is committed every commit_every events or commit_interval_ms
+    milliseconds, so one sync covers many events. A crash replays the
+    events handled since the last commit, delivery is at least once.
+
+    A torn or empty file fails its crc32 and reads as no checkpoint, the
+    consumer then starts from the position of its ring.
+    """
+
+    def __init__(self,
+                 path: str,
+                 commit_every: int = 1024,
+                 commit_interval_ms: float = 100.0,
+                 sync: bool = True):
+        """Open or create a checkpoint
+
+        Args:
+            path (str): path of the checkpoint file
+            commit_every (int, optional): commit after this number of
+                handled events. Defaults to 1024.
+            commit_interval_ms (float, optional): commit handled events
+                this number of milliseconds after the last commit.
+                Defaults to 100.0.
+            sync (bool, optional): flush the file to disk on each commit,
+                else a commit is only safe from a crash of the process.
+                Defaults to True.
+        """
+        if commit_every <= 0:
+            raise ValueError('commit_every must be greater than 0')
+        if commit_interval_ms < 0:
+            raise ValueError('commit_interval_ms cannot be negative')
+        # a new file, or one cut short by a crash, cannot be mapped whole.
+        # Its missing bytes read as zeros and fail the crc32
+        if not os.path.exists(path) or \
+                os.path.getsize(path) < _CHECKPOINT_SIZE:
+            with open(path, 'ab') as checkpoint_file:
+                checkpoint_file.truncate(_CHECKPOINT_SIZE)
+        self.path = path
+        self._commit_every = commit_every
+        self._commit_interval = commit_interval_ms / 1000
+        self._sync = sync
+        self._file = open(path, 'r+b')  # pylint: disable=consider-using-with
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        sequence, crc = _CHECKPOINT.unpack_from(self._map, 0)
+        self._committed: t.Optional[int] = \
+            sequence if crc == _crc(sequence) else None
+        self._position: t.Optional[int] = self._committed
+        self._pending: int = 0
+        self._last_commit = time.monotonic()
+
+    @property
+    def committed_sequence(self) -> t.Optional[int]:
+        """Last committed sequence, None if nothing was committed"""
+        return self._committed
+
+    @property
+    def position(self) -> t.Optional[int]:
+        """Sequence of the first event not handled yet, committed or not"""
+        return self._position
+
+    def seek(self, sequence: int):
+        """Set the position, such as the one of the ring on a first start
+
+        Args:
+            sequence (int): sequence of the first event not handled yet
+        """
+        self._position = sequence
+        self._pending = 0
+
+    def advance(self, n: int) -> bool:
+        """Count handled events, and commit when commit_every events or
+        commit_interval_ms are reached. advance(0) only checks the time
+
+        Args:
+            n (int): number of events handled since the last call
+
+        Returns:
+            bool: True if the position was committed
+        """
+        if self._position is None:
+            raise ValueError('checkpoint has no position, seek first')
+        self._position += n
+        self._pending += n
+        if self._pending >= self._commit_every or (
+                self._pending and
+                time.monotonic() - self._last_commit >= self._commit_interval):
+            self.commit()
+            return True
+        return False
+
+    def commit(self):
+        """Store the position now"""
+        self._last_commit = time.monotonic()
+        self._pending = 0
+        if self._position is None or self._position == self._committed:
+            return
+        _CHECKPOINT.pack_into(self._map, 0, self._position,
+                              _crc(self._position))
+        if self._sync:
+            self._map.flush()
+        self._committed = self._position
+
+    def close(self):
+        """Commit and close the file"""
+        self.commit()
+        self._map.close()
+        self._file.close()
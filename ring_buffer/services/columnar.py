@@ -0,0 +1,233 @@
+"""RingBuffer of numeric records in a NumPy structured array
+"""
+import typing as t
+import threading
+
+from ring_buffer.services.buffer import RingFullError
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only this module needs it
+    np = None  # type: ignore[assignment]
+
+
+class ColumnarRingBuffer:
+    """A circular queue of records in a NumPy structured array with a user
+    declared dtype, for example::
+
+        ring = ColumnarRingBuffer([('id', 'i8'), ('symbol', 'S8'),
+                                   ('qty', 'i8'), ('price', 'f8')])
+
+    get_batch returns a zero-copy view of a contiguous run of records, so a
+    consumer can aggregate a whole batch with vectorized operations. The
+    view is valid until the next get_batch call or release. There must be
+    only one consumer.
+    """
+
+    def __init__(self, dtype: t.Any, size: int = 2**16):
+        """Init ColumnarRingBuffer
+
+        Args:
+            dtype (t.Any): NumPy dtype of a record, or anything np.dtype
+                accepts
+            size (int, optional): number of records. Defaults to 2**16.
+
+        Raises:
+            ImportError: numpy is not installed
+        """
+        if np is None:
+            raise ImportError('ColumnarRingBuffer requires numpy')
+        if size <= 0:
+            raise ValueError('Size cannot be lesser than 0')
+        self._size: int = size
+        self._dtype = np.dtype(dtype)
+        self._ring = np.zeros(size, dtype=self._dtype)
+        self._producer_sequence: int = 0
+        # next sequence to read by the consumer
+        self._consumer_sequence: int = 0
+        # records before this sequence can be overwritten by producers
+        self._released_sequence: int = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    @property
+    def dtype(self) -> t.Any:
+        """NumPy dtype of a record"""
+        return self._dtype
+
+    def qsize(self) -> int:
+        """Return number of records the consumer has not read
+
+        Returns:
+            int: the size of ring
+        """
+        return self._producer_sequence - self._consumer_sequence
+
+    def _free(self) -> int:
+        """Return number of slots a producer can write, slots of a batch
+        read but not released yet are not free
+
+        Returns:
+            int: free slots
+        """
+        return self._size - (self._producer_sequence -
+                             self._released_sequence)
+
+    def is_full(self) -> bool:
+        """Check if the ring is full or not
+
+        Returns:
+            bool: True if the ring is full
+        """
+        return self._free() == 0
+
+    def is_empty(self) -> bool:
+        """Check if the ring is empty or not
+
+        Returns:
+            bool: True if empty
+        """
+        return self._producer_sequence == self._consumer_sequence
+
+    def _wait_not_full(self, block: bool, timeout: t.Optional[float]):
+        """wait until a record is free, caller must hold the lock
+
+        Args:
+            block (bool): wait for a free record if True, else fail at once
+            timeout (t.Optional[float]): maximum seconds to wait,
+                None waits forever
+
+        Raises:
+            RingFullError: Ring is still full
+        """
+        if self._free() > 0:
+            return
+        if not block or not self._not_full.wait_for(
+                lambda: self._free() > 0, timeout):
+            raise RingFullError('ring is full')
+
+    def put(self,
+            record: t.Any,
+            block: bool = False,
+            timeout: t.Optional[float] = None) -> int:
+        """put a new record in ring buffer
+
+        Args:
+            record (t.Any): tuple or structured scalar of the dtype
+            block (bool, optional): wait for a free record if the ring is
+                full. Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            int: index of record in ring buffer
+
+        Raises:
+            RingFullError: Ring is full
+        """
+        with self._lock:
+            self._wait_not_full(block, timeout)
+            index = self._producer_sequence % self._size
+            self._ring[index] = record
+            self._producer_sequence += 1
+            self._not_empty.notify()
+            return index
+
+    def put_many(self,
+                 records: t.Any,
+                 block: bool = False,
+                 timeout: t.Optional[float] = None) -> int:
+        """put records in ring buffer with at most two slice copies
+
+        Args:
+            records (t.Any): structured array of the dtype, or a sequence
+                of tuples
+            block (bool, optional): wait for a free record if the ring is
+                full. Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            int: number of records put, may be less than len(records) if
+                the ring is filled up. The caller should retry the rest
+
+        Raises:
+            RingFullError: Ring is full and no record can be put
+        """
+        if isinstance(records, np.ndarray):
+            records = records.astype(self._dtype, copy=False)
+        else:
+            records = np.array(list(records), dtype=self._dtype)
+        if len(records) == 0:
+            return 0
+        with self._lock:
+            self._wait_not_full(block, timeout)
+            n = min(self._free(), len(records))
+            start = self._producer_sequence % self._size
+            first_run = min(n, self._size - start)
+            self._ring[start:start + first_run] = records[:first_run]
+            if first_run < n:
+                self._ring[:n - first_run] = records[first_run:n]
+            self._producer_sequence += n
+            self._not_empty.notify()
+            return n
+
+    def release(self):
+        """Give the records of the last batch back to producers, views
+        returned by get_batch must not be used after that"""
+        if self._released_sequence == self._consumer_sequence:
+            return
+        with self._lock:
+            self._released_sequence = self._consumer_sequence
+            self._not_full.notify_all()
+
+    def wait_not_empty(self, timeout: t.Optional[float] = None) -> bool:
+        """block until the ring has a record or the timeout expires
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait,
+                None waits forever. Defaults to None.
+
+        Returns:
+            bool: True if the ring has a record
+        """
+        with self._lock:
+            return self._not_empty.wait_for(lambda: not self.is_empty(),
+                                            timeout)
+
+    def get_batch(self, max_n: t.Optional[int] = None) -> t.Any:
+        """release the previous batch and return a view of the next
+        contiguous run of records, only call from the consumer thread.
+        A run stops at the end of the array, the rest comes with the
+        next call
+
+        Args:
+            max_n (t.Optional[int], optional): maximum number of records.
+                Defaults to None, which takes the whole run.
+
+        Returns:
+            t.Any: structured array view, empty if the ring is empty
+        """
+        self.release()
+        sequence = self._consumer_sequence
+        start = sequence % self._size
+        n = min(self._producer_sequence - sequence, self._size - start)
+        if max_n is not None:
+            n = min(n, max_n)
+        self._consumer_sequence = sequence + n
+        return self._ring[start:start + n]
+
+    def get_many(self, max_n: t.Optional[int] = None) -> t.Any:
+        """same as get_batch but returns a copy, so the ring can be given
+        to a Consumer, whose batch callbacks keep records across reads.
+        Use get_batch for zero copy
+
+        Args:
+            max_n (t.Optional[int], optional): maximum number of records.
+                Defaults to None, which takes the whole run.
+
+        Returns:
+            t.Any: structured array, empty if the ring is empty
+        """
+        return self.get_batch(max_n).copy()
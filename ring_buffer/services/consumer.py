@@ -1,11 +1,18 @@
 """This module is about consumer of ring buffer
 """
+import abc
+import sys
 import time
 import typing as t
 import threading
 
 from ring_buffer.model import event
 from ring_buffer.services import buffer
+from ring_buffer.services import checkpoint as cp
+from ring_buffer.services import stats
+
+# seconds a consumer blocks on an empty ring before checking the stop flag
+_STOP_CHECK_INTERVAL = 0.1
 
 
 class ConsumerIsNotStopError(Exception):
@@ -16,19 +23,274 @@ class ConsumerAlreadyRunningError(Exception):
     """Something wrong when start consumer"""
 
 
+class WaitStrategy(abc.ABC):
+    """Strategy of a consumer waiting for new events on a drained ring,
+    it trades CPU usage for latency"""
+
+    @abc.abstractmethod
+    def wait(self, ring_buffer: buffer.RingBuffer, idle_count: int):
+        """Wait once after the consumer found the ring empty
+
+        Args:
+            ring_buffer (buffer.RingBuffer): the drained ring
+            idle_count (int): number of empty polls in a row before this
+                one, it is reset to 0 when an event arrives
+
+        Raises:
+            NotImplementedError: raise if not implement
+        """
+        raise NotImplementedError()
+
+
+class BusySpinWaitStrategy(WaitStrategy):
+    """Poll the ring again at once. Lowest latency, burn a whole core,
+    use it on a pinned core only"""
+
+    def wait(self, ring_buffer: buffer.RingBuffer, idle_count: int):
+        return
+
+
+class YieldingWaitStrategy(WaitStrategy):
+    """Spin for a number of polls, then yield the GIL and the CPU to
+    other threads between polls"""
+
+    def __init__(self, spin_tries: int = 100):
+        """Init YieldingWaitStrategy
+
+        Args:
+            spin_tries (int, optional): number of busy polls before
+                yielding. Defaults to 100.
+        """
+        self._spin_tries = spin_tries
+
+    def wait(self, ring_buffer: buffer.RingBuffer, idle_count: int):
+        if idle_count >= self._spin_tries:
+            time.sleep(0)
+
+
+class SleepingWaitStrategy(WaitStrategy):
+    """Sleep between polls, the sleep time doubles from min_sleep up to
+    max_sleep while the ring stays empty"""
+
+    def __init__(self, min_sleep: float = 0.0001, max_sleep: float = 0.01):
+        """Init SleepingWaitStrategy
+
+        Args:
+            min_sleep (float, optional): first sleep in seconds.
+                Defaults to 0.0001.
+            max_sleep (float, optional): maximum sleep in seconds.
+                Defaults to 0.01.
+        """
+        if min_sleep <= 0 or max_sleep < min_sleep:
+            raise ValueError('need 0 < min_sleep <= max_sleep')
+        self._min_sleep = min_sleep
+        self._max_sleep = max_sleep
+        # past this idle count the sleep is always max_sleep
+        self._max_exponent = int(max_sleep / min_sleep).bit_length()
+
+    def wait(self, ring_buffer: buffer.RingBuffer, idle_count: int):
+        exponent = min(idle_count, self._max_exponent)
+        time.sleep(min(self._min_sleep * 2 ** exponent, self._max_sleep))
+
+
+class BlockingWaitStrategy(WaitStrategy):
+    """Block on the not-empty condition of the ring, the consumer is woken
+    as soon as a producer puts an event. Rings without wait_not_empty fall
+    back to sleeping"""
+
+    def __init__(self, timeout: float = _STOP_CHECK_INTERVAL,
+                 fallback_sleep: float = 0.001):
+        """Init BlockingWaitStrategy
+
+        Args:
+            timeout (float, optional): maximum seconds to block, the
+                consumer checks its stop flag after that.
+                Defaults to _STOP_CHECK_INTERVAL.
+            fallback_sleep (float, optional): seconds to sleep on rings
+                without wait_not_empty. Defaults to 0.001.
+        """
+        self._timeout = timeout
+        self._fallback_sleep = fallback_sleep
+
+    def wait(self, ring_buffer: buffer.RingBuffer, idle_count: int):
+        wait_not_empty = getattr(ring_buffer, 'wait_not_empty', None)
+        if wait_not_empty is None:
+            time.sleep(self._fallback_sleep)
+            return
+        wait_not_empty(self._timeout)
+
+
+def _each(handler: t.Callable[[event.Event], None]
+          ) -> t.Callable[[t.List[event.Event]], None]:
+    """Turn a handler of one event into a handler of a list of events"""
+    def handle_each(events: t.List[event.Event]):
+        for e in events:
+            handler(e)
+    return handle_each
+
+
+def _event_type(e: t.Any) -> str:
+    """Return the event_type of an event, RAW_EVENT_TYPE for payloads
+    without one such as ArenaBlocks"""
+    return getattr(e, 'event_type', stats.RAW_EVENT_TYPE)
+
+
+class EventDispatcher:
+    """Table of handlers by event_type, an event goes to the handler of
+    its type with one dict lookup, instead of comparing event_type
+    strings for each event. Event types are interned when registered.
+
+    With handlers of single events, events are dispatched in order. Once
+    a batch handler is registered, a batch of events is grouped by
+    event_type and each group goes to its handler: events of a type keep
+    their order, events of different types may be handled out of order.
+
+    Payloads put with put_bytes are ArenaBlocks without event_type, they
+    go to the fallback handler, or are counted as unhandled.
+
+    It is a batch callback, so it can be given to register_batch_callback
+    of any consumer.
+    """
+
+    def __init__(self):
+        """Create a dispatcher without handlers"""
+        self._handlers: t.Dict[str, t.Callable] = {}
+        self._batch_types: t.Set[str] = set()
+        self._fallback: t.Optional[t.Callable] = None
+        self._batch_fallback: bool = False
+        # compiled by _compile, every handler of _groups takes a list
+        self._table: t.Dict[
+            t.Optional[str], t.Callable[[event.Event], None]] = {}
+        self._groups: t.Dict[
+            t.Optional[str], t.Callable[[t.List[event.Event]], None]] = {}
+        self._default: t.Callable = self._count_unhandled
+        self._grouped: bool = False
+        # events without handler and without fallback handler
+        self.unhandled: int = 0
+
+    def _count_unhandled(self, event_or_group: t.Any):
+        """Default handler, count the events it receives"""
+        self.unhandled += len(event_or_group) if self._grouped else 1
+
+    def _compile(self):
+        """Build the dispatch tables of the registered handlers"""
+        self._grouped = bool(self._batch_types) or self._batch_fallback
+        self._table = dict(self._handlers)
+        self._groups = {
+            event_type: handler if event_type in self._batch_types
+            else _each(handler)
+            for event_type, handler in self._handlers.items()}
+        if self._fallback is None:
+            self._default = self._count_unhandled
+        elif self._grouped and not self._batch_fallback:
+            self._default = _each(self._fallback)
+        else:
+            self._default = self._fallback
+
+    def register(self,
+                 event_type: str,
+                 handler: t.Callable,
+                 batch: bool = False):
+        """Add the handler of an event type, it replaces the previous one
+
+        Args:
+            event_type (str): type of the events
+            handler (t.Callable): handler of each event, or of the list of
+                events of this type in a batch if batch is True
+            batch (bool, optional): handler receives lists of events.
+                Defaults to False.
+        """
+        event_type = sys.intern(event_type)
+        self._handlers[event_type] = handler
+        if batch:
+            self._batch_types.add(event_type)
+        else:
+            self._batch_types.discard(event_type)
+        self._compile()
+
+    def register_fallback(self, handler: t.Callable, batch: bool = False):
+        """Add the handler of the events whose type has no handler
+
+        Args:
+            handler (t.Callable): handler of each event, or of the list of
+                events of a type if batch is True
+            batch (bool, optional): handler receives lists of events.
+                Defaults to False.
+        """
+        self._fallback = handler
+        self._batch_fallback = batch
+        self._compile()
+
+    def __call__(self, events: t.List[t.Any]):
+        """Dispatch a batch of events to the handlers of their types
+
+        Args:
+            events (t.List[t.Any]): the events, and the ArenaBlocks which
+                go to the fallback handler
+        """
+        if not self._grouped:
+            get_handler = self._table.get
+            default = self._default
+            for e in events:
+                get_handler(getattr(e, 'event_type', None), default)(e)
+            return
+        groups: t.Dict[t.Optional[str], t.List[t.Any]] = {}
+        for e in events:
+            event_type = getattr(e, 'event_type', None)
+            group = groups.get(event_type)
+            if group is None:
+                groups[event_type] = [e]
+            else:
+                group.append(e)
+        get_group_handler = self._groups.get
+        default = self._default
+        for event_type, group in groups.items():
+            get_group_handler(event_type, default)(group)
+
+
 class Consumer:
     """Simple one Consumer"""
 
-    def __init__(self, name: str, ring_buffer: buffer.RingBuffer):
+    def __init__(self,
+                 name: str,
+                 ring_buffer: buffer.RingBuffer,
+                 wait_strategy: t.Optional[WaitStrategy] = None,
+                 enable_metrics: bool = False,
+                 metrics_sample_every: int = 64,
+                 slowest_callbacks: int = 10):
         """Init consumer
 
         Args:
             name (str): name of the consumer
             ring_buffer (buffer.RingBuffer): RingBuffer
+            wait_strategy (t.Optional[WaitStrategy], optional): how to wait
+                on a drained ring. Defaults to BlockingWaitStrategy.
+            enable_metrics (bool, optional): keep the metrics returned by
+                metrics. Defaults to False.
+            metrics_sample_every (int, optional): with enable_metrics,
+                time one callback call every this number of calls.
+                Defaults to 64.
+            slowest_callbacks (int, optional): with enable_metrics, number
+                of slowest timed calls to keep. Defaults to 10.
         """
         self.name = name
         self._ring_buffer = ring_buffer
+        self._wait_strategy: WaitStrategy = \
+            wait_strategy or BlockingWaitStrategy()
         self._callback: t.Optional[t.Callable[[event.Event], None]] = None
+        self._batch_callback: t.Optional[
+            t.Callable[[t.List[event.Event]], None]] = None
+        self._max_batch: int = 0
+        self._max_linger: float = 0
+        self._dispatcher: t.Optional[EventDispatcher] = None
+        self._stats: t.Optional[stats.ConsumerStats] = \
+            stats.ConsumerStats(metrics_sample_every, slowest_callbacks) \
+            if enable_metrics else None
+        self._reporter: t.Optional[
+            t.Callable[[stats.ConsumerMetrics], None]] = None
+        self._report_interval: float = 0
+        self._reporter_stop = threading.Event()
+        self._checkpoint: t.Optional[cp.Checkpoint] = None
         self._thread: t.Optional[threading.Thread] = None
         self._is_stop: bool = True
 
@@ -36,6 +298,7 @@ class Consumer:
         """Stop the consumer thread
         """
         self._is_stop = True
+        self._reporter_stop.set()
 
     def is_running(self) -> bool:
         """Check if the consumer is running or stop
@@ -45,6 +308,124 @@ class Consumer:
         """
         return not self._is_stop
 
+    def is_alive(self) -> bool:
+        """Check if the consumer thread is alive, after stop it is until it
+        handled the events it already took
+
+        Returns:
+            bool: True if the thread is alive
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: t.Optional[float] = None):
+        """Wait for the consumer thread to exit after stop, the events it
+        already took are handled before it exits
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait,
+                None waits forever. Defaults to None.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def set_wait_strategy(self, wait_strategy: WaitStrategy):
+        """Change how the consumer waits on a drained ring
+
+        Args:
+            wait_strategy (WaitStrategy): the new wait strategy
+        """
+        self._wait_strategy = wait_strategy
+
+    def set_checkpoint(self, checkpoint: t.Optional[cp.Checkpoint]):
+        """Commit the position of the consumer to a checkpoint. On start
+        the consumer seeks its ring to the committed sequence, so the ring
+        must have seek and commit: a RingBuffer with a journal and
+        journal_auto_commit off, or a SharedRingBuffer with auto_commit
+        off and one consumer. The ring commits events only after the
+        checkpoint stored them
+
+        Args:
+            checkpoint (t.Optional[cp.Checkpoint]): the checkpoint, None
+                removes it
+        """
+        self._checkpoint = checkpoint
+
+    def _seek_checkpoint(self):
+        """resume from the committed sequence of the checkpoint, or start
+        the checkpoint from the position of the ring"""
+        checkpoint = self._checkpoint
+        if checkpoint.committed_sequence is None:
+            checkpoint.seek(self._ring_buffer.sequence)
+        else:
+            self._ring_buffer.seek(checkpoint.committed_sequence)
+            checkpoint.seek(checkpoint.committed_sequence)
+
+    def _advance_checkpoint(self, n: int):
+        """count handled events in the checkpoint
+
+        Args:
+            n (int): number of events handled, 0 only commits on time
+        """
+        checkpoint = self._checkpoint
+        if checkpoint is not None and checkpoint.advance(n):
+            self._ring_buffer.commit(checkpoint.committed_sequence)
+
+    def _commit_checkpoint(self):
+        """commit the position of the checkpoint, then the events it
+        stored in the ring"""
+        checkpoint = self._checkpoint
+        if checkpoint is not None:
+            checkpoint.commit()
+            self._ring_buffer.commit(checkpoint.committed_sequence)
+
+    def metrics(self) -> t.Optional[stats.ConsumerMetrics]:
+        """Return a snapshot of the metrics of the consumer, the
+        throughput is measured since the previous snapshot
+
+        Returns:
+            t.Optional[stats.ConsumerMetrics]: metrics, None if
+                enable_metrics is off
+        """
+        if self._stats is None:
+            return None
+        return self._stats.snapshot(self.name, self._ring_buffer.qsize())
+
+    def set_reporter(self,
+                     reporter: t.Callable[[stats.ConsumerMetrics], None],
+                     interval: float = 1.0):
+        """Call reporter with a metrics snapshot every interval seconds
+        while the consumer runs, from a thread of its own
+
+        Args:
+            reporter (t.Callable[[stats.ConsumerMetrics], None]): function
+                which receives the metrics, such as a logger or exporter
+            interval (float, optional): seconds between two reports.
+                Defaults to 1.0.
+
+        Raises:
+            ValueError: enable_metrics is off
+        """
+        if self._stats is None:
+            raise ValueError('metrics are not enabled')
+        if interval <= 0:
+            raise ValueError('interval must be greater than 0')
+        self._reporter = reporter
+        self._report_interval = interval
+
+    def _report(self, reporter_stop: threading.Event):
+        """call the reporter until the consumer is stopped
+
+        Args:
+            reporter_stop (threading.Event): set when the consumer stops
+        """
+        reporter = self._reporter
+        consumer_stats = self._stats
+        if reporter is None or consumer_stats is None:
+            return
+        while not reporter_stop.wait(self._report_interval):
+            reporter(consumer_stats.snapshot(self.name,
+                                             self._ring_buffer.qsize()))
+
     def register_callback(self,
                           callback: t.Callable[[event.Event], None]):
         """Add callback function
@@ -54,20 +435,232 @@ class Consumer:
                 callback function should receive Event and return None
         """
         self._callback = callback
+        self._batch_callback = None
+        self._dispatcher = None
+
+    def register_handler(self,
+                         event_type: str,
+                         handler: t.Callable,
+                         batch: bool = False):
+        """Add the handler of an event type, instead of the callback of
+        register_callback. Each drained batch is grouped by event_type and
+        dispatched with one dict lookup per type, see EventDispatcher
+
+        Args:
+            event_type (str): type of the events
+            handler (t.Callable): handler of each event, or of the list of
+                events of this type in a batch if batch is True
+            batch (bool, optional): handler receives lists of events.
+                Defaults to False.
+        """
+        if self._dispatcher is None:
+            self._dispatcher = EventDispatcher()
+        self._dispatcher.register(event_type, handler, batch)
+        self._callback = None
+        self._batch_callback = None
+
+    def register_fallback_handler(self,
+                                  handler: t.Callable,
+                                  batch: bool = False):
+        """Add the handler of the events whose type has no handler, else
+        they are only counted in EventDispatcher.unhandled
+
+        Args:
+            handler (t.Callable): handler of each event, or of the list of
+                events of a type if batch is True
+            batch (bool, optional): handler receives lists of events.
+                Defaults to False.
+        """
+        if self._dispatcher is None:
+            self._dispatcher = EventDispatcher()
+        self._dispatcher.register_fallback(handler, batch)
+        self._callback = None
+        self._batch_callback = None
+
+    def register_batch_callback(
+            self,
+            callback: t.Callable[[t.List[event.Event]], None],
+            max_batch: int = 256,
+            max_linger_ms: float = 5.0):
+        """Add callback function which receives lists of events, instead of
+        the callback of register_callback. A batch is delivered when it
+        has max_batch events, or max_linger_ms after its first event.
+
+        Rings which reuse the events of a batch on the next get_many,
+        such as PreallocatedRingBuffer, need max_linger_ms=0, then each
+        batch of get_many is delivered as it is
+
+        Args:
+            callback (t.Callable[[t.List[event.Event]], None]): callback
+                function should receive a list of events and return None
+            max_batch (int, optional): maximum events of a batch.
+                Defaults to 256.
+            max_linger_ms (float, optional): maximum milliseconds the
+                first event of a batch waits for more events.
+                Defaults to 5.0.
+        """
+        if max_batch <= 0:
+            raise ValueError('max_batch must be greater than 0')
+        if max_linger_ms < 0:
+            raise ValueError('max_linger_ms cannot be negative')
+        self._batch_callback = callback
+        self._max_batch = max_batch
+        self._max_linger = max_linger_ms / 1000
+        self._callback = None
+        self._dispatcher = None
 
     def _consume(self):
         """consume message from ring buffer
         """
+        idle_count = 0
+        callback = self._callback
+        dispatcher = self._dispatcher
+        consumer_stats = self._stats
+        checkpoint = self._checkpoint
+        while not self._is_stop:
+            # drain every available event with one lock round-trip, len
+            # instead of truth, get_many may return a NumPy array
+            events = self._ring_buffer.get_many()
+            if len(events) == 0:
+                if checkpoint is not None:
+                    self._advance_checkpoint(0)
+                self._wait_strategy.wait(self._ring_buffer, idle_count)
+                idle_count += 1
+                continue
+            idle_count = 0
+            if consumer_stats is not None:
+                consumer_stats.events += len(events)
+                if dispatcher is not None:
+                    self._sampled_batch_call(consumer_stats, dispatcher,
+                                             events)
+                else:
+                    self._sampled_calls(consumer_stats, callback, events)
+            elif dispatcher is not None:
+                dispatcher(events)
+            else:
+                for e in events:
+                    callback(e)
+            if checkpoint is not None:
+                self._advance_checkpoint(len(events))
+        self._commit_checkpoint()
+
+    @staticmethod
+    def _sampled_calls(consumer_stats: stats.ConsumerStats,
+                       callback: t.Callable[[event.Event], None],
+                       events: t.List[event.Event]):
+        """call the callback on each event, timing one call every
+        sample_every calls, the other calls run untimed
+
+        Args:
+            consumer_stats (stats.ConsumerStats): stats of the consumer
+            callback (t.Callable[[event.Event], None]): callback
+            events (t.List[event.Event]): the events
+        """
+        i, n = 0, len(events)
+        while True:
+            sampled = i + consumer_stats.until_sample
+            if sampled >= n:
+                for e in events[i:]:
+                    callback(e)
+                consumer_stats.until_sample -= n - i
+                return
+            for e in events[i:sampled]:
+                callback(e)
+            e = events[sampled]
+            start = time.perf_counter_ns()
+            callback(e)
+            consumer_stats.on_callback(time.perf_counter_ns() - start,
+                                       _event_type(e))
+            consumer_stats.until_sample = consumer_stats.sample_every - 1
+            i = sampled + 1
+
+    @staticmethod
+    def _sampled_batch_call(consumer_stats: stats.ConsumerStats,
+                            callback: t.Callable[[t.List[event.Event]], None],
+                            events: t.List[event.Event]):
+        """call a batch callback, timing one call every sample_every
+        calls. A timed call is recorded with the event_type of its first
+        event
+
+        Args:
+            consumer_stats (stats.ConsumerStats): stats of the consumer
+            callback (t.Callable[[t.List[event.Event]], None]): callback
+            events (t.List[event.Event]): the events
+        """
+        if consumer_stats.until_sample:
+            consumer_stats.until_sample -= 1
+            callback(events)
+            return
+        consumer_stats.until_sample = consumer_stats.sample_every - 1
+        start = time.perf_counter_ns()
+        callback(events)
+        consumer_stats.on_callback(time.perf_counter_ns() - start,
+                                   _event_type(events[0]))
+
+    def _wait_until(self, deadline: float):
+        """wait for new events, at most until deadline
+
+        Args:
+            deadline (float): time.monotonic() of the end of the wait
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        wait_not_empty = getattr(self._ring_buffer, 'wait_not_empty', None)
+        if wait_not_empty is None:
+            time.sleep(min(remaining, 0.001))
+        else:
+            wait_not_empty(remaining)
+
+    def _consume_batches(self):
+        """consume message from ring buffer in batches of max_batch events
+        or max_linger seconds
+        """
+        idle_count = 0
+        batch_callback = self._batch_callback
+        batch: t.List[event.Event] = []
+        deadline = 0.0
         while not self._is_stop:
-            qsize = self._ring_buffer.qsize()
-            for _ in range(qsize):
-                # get the event from buffer
-                # put message input callback function
-                try:
-                    self._callback(self._ring_buffer.get())
-                except buffer.RingEmptyError:
-                    break
-            time.sleep(0.01)
+            events = self._ring_buffer.get_many(self._max_batch - len(batch))
+            if len(events) > 0:
+                idle_count = 0
+                if not batch:
+                    deadline = time.monotonic() + self._max_linger
+                batch.extend(events)
+            if batch and (len(batch) >= self._max_batch or
+                          time.monotonic() >= deadline):
+                self._deliver(batch_callback, batch)
+                batch = []
+            elif batch:
+                self._wait_until(deadline)
+            elif len(events) == 0:
+                if self._checkpoint is not None:
+                    self._advance_checkpoint(0)
+                self._wait_strategy.wait(self._ring_buffer, idle_count)
+                idle_count += 1
+        # events already taken out of the ring are not lost on stop
+        if batch:
+            self._deliver(batch_callback, batch)
+        self._commit_checkpoint()
+
+    def _deliver(self,
+                 batch_callback: t.Callable[[t.List[event.Event]], None],
+                 batch: t.List[event.Event]):
+        """call the batch callback on a batch
+
+        Args:
+            batch_callback (t.Callable[[t.List[event.Event]], None]): the
+                batch callback
+            batch (t.List[event.Event]): the batch
+        """
+        consumer_stats = self._stats
+        if consumer_stats is None:
+            batch_callback(batch)
+        else:
+            consumer_stats.events += len(batch)
+            self._sampled_batch_call(consumer_stats, batch_callback, batch)
+        if self._checkpoint is not None:
+            self._advance_checkpoint(len(batch))
 
     def start(self):
         """Start consume from ring buffer
@@ -76,15 +669,270 @@ class Consumer:
             ValueError: callback function cannot be None
             ConsumerIsNotStopError: consumer is not stopped
             ConsumerAlreadyRunningError: a thread is already running
+            ValueError: the ring cannot seek to the checkpoint
         """
-        if self._callback is None:
+        if self._callback is None and self._batch_callback is None and \
+                self._dispatcher is None:
             raise ValueError("callback function cannot be None")
         if self._is_stop is False:
             raise ConsumerIsNotStopError('consumer is not stopped')
         if self._thread and self._thread.is_alive():
             raise ConsumerAlreadyRunningError('a thread is already running')
+        if self._checkpoint is not None:
+            self._seek_checkpoint()
+        # clear the flag first, else the new thread may see it and exit
+        self._is_stop = False
+        target = self._consume if self._batch_callback is None \
+            else self._consume_batches
         self._thread = threading.Thread(name=self.name,
-                                        target=self._consume,
+                                        target=target,
                                         daemon=True)
         self._thread.start()
+        if self._reporter is not None:
+            # a new event, a reporter of a previous run may still wait
+            self._reporter_stop = threading.Event()
+            threading.Thread(name=f'{self.name}-reporter',
+                             target=self._report,
+                             args=(self._reporter_stop,),
+                             daemon=True).start()
+
+
+def adapt_claim(claim: int, taken: int, max_claim: int) -> int:
+    """Return the next claim of a worker competing for a ring. It doubles
+    while claims come back full and halves when they come back short
+
+    Args:
+        claim (int): events of the last claim
+        taken (int): events the last claim got
+        max_claim (int): maximum events of a claim
+
+    Returns:
+        int: events of the next claim
+    """
+    if taken == claim:
+        return min(claim * 2, max_claim)
+    return max(claim // 2, 1)
+
+
+class _Worker:
+    """Thread and counters of a worker of a ConsumerGroup, the counters
+    are only written by the thread"""
+
+    def __init__(self, name: str, claim: int):
+        """Init _Worker
+
+        Args:
+            name (str): name of the worker and of its thread
+            claim (int): events of its first claim
+        """
+        self.name = name
+        self.thread: t.Optional[threading.Thread] = None
+        self.claim = claim
+        self.events: int = 0
+        self.batches: int = 0
+        self.busy_seconds: float = 0
+        self.idle_polls: int = 0
+
+    def metrics(self) -> stats.WorkerMetrics:
+        """Return a snapshot of the counters
+
+        Returns:
+            stats.WorkerMetrics: the counters
+        """
+        return stats.WorkerMetrics(self.name, self.events, self.batches,
+                                   self.busy_seconds, self.idle_polls,
+                                   self.claim)
+
+
+class ConsumerGroup:
+    """N worker threads competing for the events of one ring, for
+    callbacks which release the GIL, such as I/O, NumPy or hashlib.
+
+    Each worker claims a batch with one get_many. The claim of a worker
+    doubles up to max_claim while its claims come back full, so a
+    backlog is taken with few lock round-trips, and halves when they come
+    back short, so a trickle of events is spread over the idle workers.
+    Events of different workers are handled out of order, use a
+    PartitionedRingBuffer when the order of a sid matters.
+
+    The ring must allow several consumers, such as RingBuffer, or
+    SharedRingBuffer with a lock.
+    """
+
+    def __init__(self,
+                 name: str,
+                 ring_buffer: buffer.RingBuffer,
+                 workers: int = 4,
+                 wait_strategy: t.Optional[WaitStrategy] = None,
+                 max_claim: int = 256):
+        """Init ConsumerGroup
+
+        Args:
+            name (str): name of the group, worker i is named name-i
+            ring_buffer (buffer.RingBuffer): RingBuffer
+            workers (int, optional): number of worker threads.
+                Defaults to 4.
+            wait_strategy (t.Optional[WaitStrategy], optional): how a
+                worker waits on a drained ring, shared by the workers.
+                Defaults to BlockingWaitStrategy.
+            max_claim (int, optional): maximum events of a claim.
+                Defaults to 256.
+        """
+        if workers <= 0:
+            raise ValueError('workers must be greater than 0')
+        if max_claim <= 0:
+            raise ValueError('max_claim must be greater than 0')
+        self.name = name
+        self._ring_buffer = ring_buffer
+        self._wait_strategy: WaitStrategy = \
+            wait_strategy or BlockingWaitStrategy()
+        self._max_claim = max_claim
+        # max_claim, or max_batch of the batch callback if lower
+        self._claim_limit = max_claim
+        self._workers: t.List[_Worker] = [_Worker(f'{name}-{i}', 1)
+                                          for i in range(workers)]
+        self._callback: t.Optional[t.Callable[[event.Event], None]] = None
+        self._batch_callback: t.Optional[
+            t.Callable[[t.List[event.Event]], None]] = None
+        self._is_stop: bool = True
+
+    @property
+    def workers(self) -> int:
+        """Number of worker threads"""
+        return len(self._workers)
+
+    def set_wait_strategy(self, wait_strategy: WaitStrategy):
+        """Change how the workers wait on a drained ring
+
+        Args:
+            wait_strategy (WaitStrategy): the new wait strategy
+        """
+        self._wait_strategy = wait_strategy
+
+    def register_callback(self,
+                          callback: t.Callable[[event.Event], None]):
+        """Add callback function, it is called from every worker thread
+
+        Args:
+            callback (t.Callable[[event.Event], None]): callback function
+                should receive Event and return None
+        """
+        self._callback = callback
+        self._batch_callback = None
+        self._claim_limit = self._max_claim
+
+    def register_batch_callback(
+            self,
+            callback: t.Callable[[t.List[event.Event]], None],
+            max_batch: int = 256,
+            max_linger_ms: float = 0.0):
+        """Add callback function which receives each claimed batch,
+        instead of the callback of register_callback.
+
+        The signature is the one of Consumer.register_batch_callback, but
+        a batch is a claim: max_batch caps the claims of the workers, and
+        a worker does not linger for more events, it delivers each claim
+        at once, so max_linger_ms must be 0
+
+        Args:
+            callback (t.Callable[[t.List[event.Event]], None]): callback
+                function should receive a list of events and return None
+            max_batch (int, optional): maximum events of a batch, the
+                claims stay under max_claim too. Defaults to 256.
+            max_linger_ms (float, optional): must be 0. Defaults to 0.0.
+        """
+        if max_batch <= 0:
+            raise ValueError('max_batch must be greater than 0')
+        if max_linger_ms != 0:
+            raise ValueError('a ConsumerGroup delivers each claim at once, '
+                             'max_linger_ms must be 0')
+        self._batch_callback = callback
+        self._callback = None
+        self._claim_limit = min(self._max_claim, max_batch)
+
+    def _work(self, worker: _Worker):
+        """claim and handle batches until the group is stopped
+
+        Args:
+            worker (_Worker): the worker of this thread
+        """
+        idle_count = 0
+        while not self._is_stop:
+            # blocks of put_bytes are handed to the callbacks as they are
+            events = t.cast(t.List[event.Event],
+                            self._ring_buffer.get_many(
+                                min(worker.claim, self._claim_limit)))
+            if not events:
+                worker.idle_polls += 1
+                self._wait_strategy.wait(self._ring_buffer, idle_count)
+                idle_count += 1
+                continue
+            idle_count = 0
+            worker.claim = adapt_claim(worker.claim, len(events),
+                                       self._claim_limit)
+            start = time.perf_counter()
+            batch_callback, callback = self._batch_callback, self._callback
+            if batch_callback is not None:
+                batch_callback(events)
+            elif callback is not None:
+                for e in events:
+                    callback(e)
+            worker.busy_seconds += time.perf_counter() - start
+            worker.events += len(events)
+            worker.batches += 1
+
+    def start(self):
+        """Start the worker threads
+
+        Raises:
+            ValueError: callback function cannot be None
+            ConsumerIsNotStopError: group is not stopped
+            ConsumerAlreadyRunningError: a worker thread is still running
+        """
+        if self._callback is None and self._batch_callback is None:
+            raise ValueError("callback function cannot be None")
+        if self._is_stop is False:
+            raise ConsumerIsNotStopError('consumer group is not stopped')
+        for worker in self._workers:
+            if worker.thread and worker.thread.is_alive():
+                raise ConsumerAlreadyRunningError(
+                    f'worker {worker.name} is still running')
         self._is_stop = False
+        for worker in self._workers:
+            worker.thread = threading.Thread(name=worker.name,
+                                             target=self._work,
+                                             args=(worker,),
+                                             daemon=True)
+            worker.thread.start()
+
+    def stop(self):
+        """Stop the worker threads, each one finishes its current batch
+        """
+        self._is_stop = True
+
+    def join(self, timeout: t.Optional[float] = None):
+        """Wait for the worker threads to exit after stop
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                for each worker, None waits forever. Defaults to None.
+        """
+        for worker in self._workers:
+            if worker.thread is not None:
+                worker.thread.join(timeout)
+
+    def is_running(self) -> bool:
+        """Check if the group is running or stop
+
+        Returns:
+            bool: True if it's running
+        """
+        return not self._is_stop
+
+    def metrics(self) -> t.List[stats.WorkerMetrics]:
+        """Return a snapshot of the counters of every worker
+
+        Returns:
+            t.List[stats.WorkerMetrics]: counters of each worker
+        """
+        return [worker.metrics() for worker in self._workers]
@@ -0,0 +1,552 @@
+"""Durable memory-mapped journal of events
+"""
+import functools
+import itertools
+import mmap
+import os
+import pickle
+import struct
+import time
+import typing as t
+import zlib
+
+from ring_buffer.model.event import Event
+
+# frame of a batch of events: payload length, crc32 of payload, number of
+# events, payload
+_FRAME_HEADER = struct.Struct('<III')
+# payload of plain Events: one byte of the encoding of the data, then
+# the prefix of 1 if the sid is bytes, length of the event_type and of
+# the sid shared by the events, these two, and the data
+_PREFIX = struct.Struct('<BHH')
+_MAX_SHARED_LENGTH = 2**16 - 1
+# encodings of the data, none of them is the first byte of a pickle
+_PICKLED = b'\x01'
+_RAW_BYTES = b'\x02'
+_RAW_STR = b'\x03'
+_RAW_INT = b'\x04'
+_INT = struct.Struct('<q')
+_NO_PREFIX = _PREFIX.pack(0, 0, 0)
+_PICKLE_OPCODE = pickle.PROTO[0]
+_SEQUENCE = struct.Struct('<Q')
+_SEGMENT_SUFFIX = '.journal'
+_OFFSETS_FILE = 'offsets'
+_OFFSETS_SIZE = mmap.PAGESIZE
+
+
+@functools.lru_cache(maxsize=1024)
+def _prefix(event_type: str, sid: t.Union[str, bytes]) -> t.Optional[bytes]:
+    """Return the prefix of a payload of events which share an event_type
+    and a sid, cached as most events share a few of them
+
+    Args:
+        event_type (str): the event_type, exactly a str
+        sid (t.Union[str, bytes]): the sid, exactly a str or bytes
+
+    Returns:
+        t.Optional[bytes]: the prefix, None if one of them is too long
+    """
+    type_bytes = event_type.encode('utf-8', 'surrogatepass')
+    is_bytes_sid = sid.__class__ is bytes
+    sid_bytes = t.cast(bytes, sid) if is_bytes_sid \
+        else t.cast(str, sid).encode('utf-8', 'surrogatepass')
+    if len(type_bytes) > _MAX_SHARED_LENGTH or \
+            len(sid_bytes) > _MAX_SHARED_LENGTH:
+        return None
+    return _PREFIX.pack(is_bytes_sid, len(type_bytes), len(sid_bytes)) + \
+        type_bytes + sid_bytes
+
+
+def _shared_prefix(event_type: t.Any, sid: t.Any) -> t.Optional[bytes]:
+    """Return the prefix of events which share an event_type and a sid
+
+    Args:
+        event_type (t.Any): the event_type
+        sid (t.Any): the sid
+
+    Returns:
+        t.Optional[bytes]: the prefix, None if they cannot be stored in it
+    """
+    if event_type.__class__ is str and \
+            (sid.__class__ is str or sid.__class__ is bytes):
+        return _prefix(event_type, sid)
+    return None
+
+
+def _pickled(prefix: bytes,
+             columns: t.Tuple[t.Optional[list], list,
+                              t.Optional[list]]) -> bytes:
+    """Return a payload of plain Events whose data are pickled
+
+    Args:
+        prefix (bytes): prefix of the shared event_type and sid,
+            _NO_PREFIX if they are columns
+        columns (t.Tuple[t.Optional[list], list, t.Optional[list]]):
+            event types, data and sids, None for the shared columns
+
+    Returns:
+        bytes: the payload
+    """
+    return _PICKLED + prefix + \
+        pickle.dumps(columns, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _encode_columns(events: t.Sequence[Event]) -> t.Optional[bytes]:
+    """Encode plain Events which do not share their event_type and sid,
+    or cannot store them in the prefix
+
+    Args:
+        events (t.Sequence[Event]): the events
+
+    Returns:
+        t.Optional[bytes]: the payload, None if an event is of a subclass
+            of Event
+    """
+    if list(map(type, events)).count(Event) != len(events):
+        return None
+    return _pickled(_NO_PREFIX, ([e.event_type for e in events],
+                                 [e.data for e in events],
+                                 [e.sid for e in events]))
+
+
+def _encode_events(events: t.Sequence[Event]) -> t.Optional[bytes]:
+    """Encode plain Events with a fixed header, as BinaryEvent.pack does.
+    The data of a single event of bytes, str or int follows as is. Other
+    data, and the data of a batch, are pickled as one list, which costs
+    less than a header per event. The event_type and sid shared by the
+    events are stored once
+
+    Args:
+        events (t.Sequence[Event]): the events
+
+    Returns:
+        t.Optional[bytes]: the payload, None if an event is of a subclass
+            of Event
+    """
+    first = events[0]
+    event_type, sid = first.event_type, first.sid
+    if len(events) > 1:
+        # one pass for the usual batch of one event_type and sid
+        datas = [e.data for e in events if e.__class__ is Event and
+                 e.event_type == event_type and e.sid == sid]
+        if len(datas) != len(events):
+            return _encode_columns(events)
+        prefix = _shared_prefix(event_type, sid)
+        if prefix is None:
+            return _encode_columns(events)
+        return _pickled(prefix, (None, datas, None))
+    if first.__class__ is not Event:
+        return None
+    prefix = _shared_prefix(event_type, sid)
+    if prefix is None:
+        return _encode_columns(events)
+    return _encode_data(prefix, first.data)
+
+
+def _encode_data(prefix: bytes, data: t.Any) -> bytes:
+    """Encode a single plain Event, its data as is if it is bytes, str or
+    an int of 64 bits, pickled otherwise
+
+    Args:
+        prefix (bytes): prefix of its event_type and sid
+        data (t.Any): its data
+
+    Returns:
+        bytes: the payload
+    """
+    if data.__class__ is bytes:
+        return _RAW_BYTES + prefix + data
+    if data.__class__ is str:
+        return _RAW_STR + prefix + data.encode('utf-8', 'surrogatepass')
+    if data.__class__ is int and -2**63 <= data < 2**63:
+        return _RAW_INT + prefix + _INT.pack(data)
+    return _pickled(prefix, (None, [data], None))
+
+
+def _frame(events: t.Sequence[Event]) -> bytes:
+    """Build the frame of a batch of events. Plain Events are encoded by
+    _encode_events, a batch with an Event of a subclass is pickled at
+    once, each plain Event as a tuple
+
+    Args:
+        events (t.Sequence[Event]): the events
+
+    Returns:
+        bytes: header and payload
+    """
+    payload = _encode_events(events)
+    if payload is None:
+        records = [(e.event_type, e.data, e.sid) if e.__class__ is Event
+                   else e for e in events]
+        payload = pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL)
+    return _FRAME_HEADER.pack(len(payload), zlib.crc32(payload),
+                              len(events)) + payload
+
+
+def _unframe(payload: bytes, count: int) -> t.List[Event]:
+    """Return the events of the payload of a frame
+
+    Args:
+        payload (bytes): payload of a frame
+        count (int): number of events of the frame
+
+    Returns:
+        t.List[Event]: the events
+    """
+    if payload[0] == _PICKLE_OPCODE:
+        return [Event(*e) if e.__class__ is tuple else e
+                for e in pickle.loads(payload)]
+    encoding = payload[:1]
+    is_bytes_sid, type_length, sid_length = _PREFIX.unpack_from(payload, 1)
+    start = 1 + _PREFIX.size
+    event_type = payload[start:start + type_length].decode(
+        'utf-8', 'surrogatepass')
+    start += type_length
+    sid_bytes = payload[start:start + sid_length]
+    sid: t.Union[str, bytes] = sid_bytes if is_bytes_sid \
+        else sid_bytes.decode('utf-8', 'surrogatepass')
+    start += sid_length
+    if encoding == _RAW_BYTES:
+        return [Event(event_type, payload[start:], sid)]
+    if encoding == _RAW_STR:
+        return [Event(event_type,
+                      payload[start:].decode('utf-8', 'surrogatepass'),
+                      sid)]
+    if encoding == _RAW_INT:
+        return [Event(event_type, _INT.unpack_from(payload, start)[0],
+                      sid)]
+    types, datas, sids = pickle.loads(payload[start:])
+    return [Event(*e) for e in zip(
+        types or itertools.repeat(event_type, count), datas,
+        sids or itertools.repeat(sid, count))]
+
+
+class _Segment:
+    """A fixed-size memory-mapped file of frames, the sequence of an event
+    is first_sequence plus the number of events before it in the file"""
+
+    def __init__(self, path: str, first_sequence: int, size: int = 0):
+        """Open a segment, create it when size is given
+
+        Args:
+            path (str): path of the file
+            first_sequence (int): sequence of the first frame
+            size (int, optional): size of a new file. Defaults to 0.
+        """
+        self.path = path
+        self.first_sequence = first_sequence
+        if size:
+            with open(path, 'wb') as segment_file:
+                segment_file.truncate(size)
+        self._file = open(path, 'r+b')  # pylint: disable=consider-using-with
+        self.map = mmap.mmap(self._file.fileno(), 0)
+        self.size = len(self.map)
+
+    def frames(self) -> t.Iterator[t.Tuple[int, int, bytes]]:
+        """Iterate over the valid frames, a torn or empty frame ends it
+
+        Yields:
+            t.Tuple[int, int, bytes]: offset of the end of the frame,
+                number of events, payload
+        """
+        offset = 0
+        while offset + _FRAME_HEADER.size <= self.size:
+            length, crc, count = _FRAME_HEADER.unpack_from(self.map, offset)
+            start = offset + _FRAME_HEADER.size
+            if length == 0 or start + length > self.size:
+                return
+            payload = self.map[start:start + length]
+            if zlib.crc32(payload) != crc:
+                return
+            offset = start + length
+            yield offset, count, payload
+
+    def events(self, start: int) -> t.Iterator[t.Tuple[int, Event]]:
+        """Iterate over the events of the valid frames from a sequence,
+        frames which end before it are not decoded
+
+        Args:
+            start (int): first sequence
+
+        Yields:
+            t.Tuple[int, Event]: sequence and event
+        """
+        sequence = self.first_sequence
+        for _, count, payload in self.frames():
+            if sequence + count <= start:
+                sequence += count
+                continue
+            for e in _unframe(payload, count):
+                if sequence >= start:
+                    yield sequence, e
+                sequence += 1
+
+    def write(self, offset: int, frame: bytes) -> int:
+        """Write a frame with one copy, a torn frame fails its crc32 and
+        ends the segment when it is read
+
+        Args:
+            offset (int): offset of the frame
+            frame (bytes): frame built by _frame
+
+        Returns:
+            int: offset of the end of the frame
+        """
+        end = offset + len(frame)
+        self.map[offset:end] = frame
+        return end
+
+    def sync(self):
+        """Flush the file to disk"""
+        self.map.flush()
+
+    def close(self):
+        """Close the map and the file"""
+        self.map.close()
+        self._file.close()
+
+
+class Journal:
+    """Append-only journal of events in memory-mapped segment files.
+
+    Each append is a frame of its length, crc32, number of events and the
+    encoded events, see _frame. A new segment is started when the active
+    one is full, and segments whose events are all committed are deleted,
+    so the files stay bounded. The committed sequence, the sequence of the
+    first event not consumed yet, is stored in a memory-mapped offsets
+    file next to the segments.
+
+    Data is synced to disk every sync_every appends and every
+    sync_interval seconds, in between it is only safe from a crash of
+    the process, not of the machine.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 segment_size: int = 2**26,
+                 sync_every: int = 0,
+                 sync_interval: float = 1.0):
+        """Open or create a journal
+
+        Args:
+            directory (str): directory of the segment and offsets files
+            segment_size (int, optional): bytes of a segment file.
+                Defaults to 2**26.
+            sync_every (int, optional): sync after this number of appends,
+                0 turns it off. Defaults to 0.
+            sync_interval (float, optional): sync when an append happens
+                this number of seconds after the last sync, 0 turns it off.
+                Defaults to 1.0.
+        """
+        if segment_size <= _FRAME_HEADER.size:
+            raise ValueError('segment_size is too small')
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._segment_size = segment_size
+        self._sync_every = sync_every
+        self._sync_interval = sync_interval
+        self._unsynced: int = 0
+        self._last_sync = time.monotonic()
+
+        offsets_path = os.path.join(directory, _OFFSETS_FILE)
+        if not os.path.exists(offsets_path):
+            with open(offsets_path, 'wb') as offsets_file:
+                offsets_file.truncate(_OFFSETS_SIZE)
+        self._offsets_file = open(  # pylint: disable=consider-using-with
+            offsets_path, 'r+b')
+        self._offsets = mmap.mmap(self._offsets_file.fileno(), 0)
+        self._committed: int = _SEQUENCE.unpack_from(self._offsets, 0)[0]
+
+        # first sequence of every segment, the last one is active
+        self._segments: t.List[int] = sorted(
+            int(name[:-len(_SEGMENT_SUFFIX)])
+            for name in os.listdir(directory)
+            if name.endswith(_SEGMENT_SUFFIX))
+        if self._segments:
+            self._active = _Segment(self._segment_path(self._segments[-1]),
+                                    self._segments[-1])
+            # the end of the last valid frame is the write position
+            position, count = 0, 0
+            for position, frame_count, _ in self._active.frames():
+                count += frame_count
+            self._position = position
+            self._next_sequence: int = self._segments[-1] + count
+        else:
+            self._next_sequence = self._committed
+            self._segments.append(self._committed)
+            self._active = _Segment(self._segment_path(self._committed),
+                                    self._committed, segment_size)
+            self._position = 0
+
+    def _segment_path(self, first_sequence: int) -> str:
+        """Path of the segment file which starts at a sequence
+
+        Args:
+            first_sequence (int): sequence of its first event
+
+        Returns:
+            str: the path
+        """
+        return os.path.join(self._directory,
+                            f'{first_sequence:020d}{_SEGMENT_SUFFIX}')
+
+    @property
+    def next_sequence(self) -> int:
+        """Sequence of the next appended event"""
+        return self._next_sequence
+
+    @property
+    def committed_sequence(self) -> int:
+        """Sequence of the first event not consumed yet"""
+        return self._committed
+
+    def _rotate(self):
+        """Start a new active segment"""
+        self._active.sync()
+        self._active.close()
+        self._segments.append(self._next_sequence)
+        self._active = _Segment(self._segment_path(self._next_sequence),
+                                self._next_sequence, self._segment_size)
+        self._position = 0
+        # make the new file itself durable
+        directory_fd = os.open(self._directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+    def encode(self,
+               events: t.Sequence[Event]) -> t.List[t.Tuple[bytes, int]]:
+        """Build the frames of events without touching the journal, so a
+        ring encodes them outside of its lock. A batch is split until each
+        frame fits in a segment
+
+        Args:
+            events (t.Sequence[Event]): the events
+
+        Returns:
+            t.List[t.Tuple[bytes, int]]: the frames and their number of
+                events, to give to append_frames
+
+        Raises:
+            ValueError: an event is bigger than a segment
+        """
+        frame = _frame(events)
+        if len(frame) <= self._segment_size:
+            return [(frame, len(events))]
+        if len(events) == 1:
+            raise ValueError(f'frame is {len(frame)} bytes, '
+                             f'segment_size is {self._segment_size}')
+        half = len(events) // 2
+        return self.encode(events[:half]) + self.encode(events[half:])
+
+    def append_frames(self, frames: t.Sequence[t.Tuple[bytes, int]]) -> int:
+        """Write frames built by encode in the active segment, rotate when
+        a frame does not fit
+
+        Args:
+            frames (t.Sequence[t.Tuple[bytes, int]]): frames and their
+                number of events
+
+        Returns:
+            int: sequence of the first event
+        """
+        sequence = self._next_sequence
+        for frame, count in frames:
+            if self._position and \
+                    self._position + len(frame) > self._segment_size:
+                self._rotate()
+            self._position = self._active.write(self._position, frame)
+            self._next_sequence += count
+        self._unsynced += self._next_sequence - sequence
+        if (self._sync_every and self._unsynced >= self._sync_every) or \
+                (self._sync_interval and time.monotonic() - self._last_sync
+                 >= self._sync_interval):
+            self.sync()
+        return sequence
+
+    def append(self, event: Event) -> int:
+        """Append an event
+
+        Args:
+            event (Event): the event
+
+        Returns:
+            int: sequence of the event
+
+        Raises:
+            ValueError: event is bigger than a segment
+        """
+        return self.append_frames(self.encode((event,)))
+
+    def append_many(self, events: t.Sequence[Event]) -> int:
+        """Append events
+
+        Args:
+            events (t.Sequence[Event]): the events
+
+        Returns:
+            int: sequence of the first event
+
+        Raises:
+            ValueError: an event is bigger than a segment
+        """
+        if not events:
+            return self._next_sequence
+        return self.append_frames(self.encode(events))
+
+    def commit(self, sequence: int):
+        """Store the sequence of the first event not consumed yet, and
+        delete segments whose events are all consumed
+
+        Args:
+            sequence (int): every event before it is consumed
+        """
+        if sequence <= self._committed:
+            return
+        self._committed = min(sequence, self._next_sequence)
+        _SEQUENCE.pack_into(self._offsets, 0, self._committed)
+        while len(self._segments) > 1 and \
+                self._segments[1] <= self._committed:
+            os.remove(self._segment_path(self._segments.pop(0)))
+
+    def replay(self,
+               start: t.Optional[int] = None
+               ) -> t.Iterator[t.Tuple[int, Event]]:
+        """Iterate over the events from a sequence
+
+        Args:
+            start (t.Optional[int], optional): first sequence. Defaults to
+                None, which starts from the committed sequence.
+
+        Yields:
+            t.Tuple[int, Event]: sequence and event
+        """
+        if start is None:
+            start = self._committed
+        for i, first_sequence in enumerate(self._segments):
+            if i + 1 < len(self._segments) and \
+                    self._segments[i + 1] <= start:
+                continue
+            is_active = first_sequence == self._segments[-1]
+            segment = self._active if is_active else _Segment(
+                self._segment_path(first_sequence), first_sequence)
+            try:
+                yield from segment.events(start)
+            finally:
+                if not is_active:
+                    segment.close()
+
+    def sync(self):
+        """Flush the active segment and the offsets to disk"""
+        self._active.sync()
+        self._offsets.flush()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Sync and close the files"""
+        self.sync()
+        self._active.close()
+        self._offsets.close()
+        self._offsets_file.close()
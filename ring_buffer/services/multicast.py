@@ -0,0 +1,440 @@
+"""Multicast RingBuffer, every reader sees every event of the ring
+"""
+import typing as t
+import threading
+
+from ring_buffer.model.event import Event
+from ring_buffer.services.buffer import RingEmptyError, RingFullError, \
+    _check_events
+
+
+class ReaderAlreadyRegisteredError(Exception):
+    """A reader with the same name is already registered"""
+
+
+class MulticastRingBuffer:
+    """A circular queue which broadcasts each event to all of its readers.
+
+    Events are written once in a slot and never copied. Each reader keeps
+    its own read sequence over the same slots, a slot is reused only when
+    the slowest reader has passed it, so producers are gated on the
+    minimum reader sequence. Register readers before producing, events put
+    while there is no reader are not kept for readers registered later.
+
+    A reader may depend on other readers, then it only sees the events
+    they have handled (sequence barrier), which chains stages over the
+    same slots without copying events from ring to ring.
+    """
+
+    def __init__(self, size: int = 2**10):
+        """Init MulticastRingBuffer
+
+        Args:
+            size (int, optional): size of the queue, must be a power of two.
+                Defaults to 2**10.
+        """
+        if size <= 0:
+            raise ValueError('Size cannot be lesser than 0')
+        if size & (size - 1):
+            raise ValueError('Size must be a power of two')
+        self._size: int = size
+        self._mask: int = size - 1
+        self._ring: t.List[t.Optional[Event]] = [None] * size
+        self._producer_sequence: int = 0
+        self._readers: t.Dict[str, 'MulticastReader'] = {}
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    @property
+    def size(self) -> int:
+        """Number of slots in the ring"""
+        return self._size
+
+    @property
+    def producer_sequence(self) -> int:
+        """Sequence of the next event put in the ring"""
+        return self._producer_sequence
+
+    def register_reader(
+            self,
+            name: str,
+            depends_on: t.Sequence['MulticastReader'] = (),
+            lazy_commit: bool = False) -> 'MulticastReader':
+        """Add a reader, it starts after the last event put in the ring
+
+        Args:
+            name (str): unique name of the reader
+            depends_on (t.Sequence[MulticastReader], optional): readers
+                which must handle an event before this reader gets it.
+                Defaults to ().
+            lazy_commit (bool, optional): the events of a read are handled
+                only when the reader reads again or commits, instead of
+                at once. Readers which others depend on need it.
+                Defaults to False.
+
+        Returns:
+            MulticastReader: reader to give to a Consumer
+
+        Raises:
+            ReaderAlreadyRegisteredError: name is already used
+        """
+        with self._lock:
+            if name in self._readers:
+                raise ReaderAlreadyRegisteredError(
+                    f'reader {name} is already registered')
+            for dependency in depends_on:
+                if self._readers.get(dependency.name) is not dependency:
+                    raise ValueError(f'reader {dependency.name} is not '
+                                     f'registered in this ring')
+            reader = MulticastReader(self, name, self._producer_sequence,
+                                     depends_on, lazy_commit)
+            self._readers[name] = reader
+            return reader
+
+    def remove_reader(self, name: str):
+        """Remove a reader, producers are not gated on it anymore
+
+        Args:
+            name (str): name of the reader
+        """
+        with self._lock:
+            self._readers.pop(name, None)
+            self._not_full.notify_all()
+
+    def _gating_sequence(self) -> int:
+        """Return the sequence of the slowest reader, caller must hold the
+        lock
+
+        Returns:
+            int: minimum reader sequence
+        """
+        if not self._readers:
+            return self._producer_sequence
+        return min(r.sequence for r in self._readers.values())
+
+    def _free(self) -> int:
+        """Return number of free slots, caller must hold the lock
+
+        Returns:
+            int: number of free slots
+        """
+        return self._size - (self._producer_sequence -
+                             self._gating_sequence())
+
+    def qsize(self) -> int:
+        """Return number of events not read by the slowest reader
+
+        Returns:
+            int: the size of ring
+        """
+        with self._lock:
+            return self._size - self._free()
+
+    def is_full(self) -> bool:
+        """Check if the ring is full or not
+
+        Returns:
+            bool: True if the slowest reader is a whole ring behind
+        """
+        with self._lock:
+            return self._free() == 0
+
+    def _wait_not_full(self, block: bool, timeout: t.Optional[float]):
+        """wait until the slowest reader frees a slot, caller must hold
+        the lock
+
+        Args:
+            block (bool): wait for a free slot if True, else fail at once
+            timeout (t.Optional[float]): maximum seconds to wait,
+                None waits forever
+
+        Raises:
+            RingFullError: Ring is still full
+        """
+        if self._free() > 0:
+            return
+        if not block or not self._not_full.wait_for(
+                lambda: self._free() > 0, timeout):
+            raise RingFullError('ring is full')
+
+    def put(self,
+            event: Event,
+            block: bool = False,
+            timeout: t.Optional[float] = None) -> int:
+        """put a new event in ring buffer
+
+        Args:
+            event (Event): New event is put by a producer
+            block (bool, optional): wait for a free slot if the ring is full.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            int: sequence of the event
+
+        Raises:
+            RingFullError: Ring is full
+        """
+        if not isinstance(event, Event):
+            raise ValueError('Cannot put anything other than Event in queue')
+        with self._lock:
+            self._wait_not_full(block, timeout)
+            sequence = self._producer_sequence
+            self._ring[sequence & self._mask] = event
+            self._producer_sequence = sequence + 1
+            self._not_empty.notify_all()
+            return sequence
+
+    def put_many(self,
+                 events: t.Sequence[Event],
+                 block: bool = False,
+                 timeout: t.Optional[float] = None) -> int:
+        """put a run of events in ring buffer under one lock acquisition
+
+        Args:
+            events (t.Sequence[Event]): New events are put by a producer
+            block (bool, optional): wait for a free slot if the ring is full.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            int: number of events put, may be less than len(events) if the
+                ring is filled up. The caller should retry the rest
+
+        Raises:
+            RingFullError: Ring is full and no event can be put
+            ValueError: an item is not an Event
+        """
+        if not events:
+            return 0
+        _check_events(events)
+        with self._lock:
+            self._wait_not_full(block, timeout)
+            n = min(self._free(), len(events))
+            sequence = self._producer_sequence
+            start = sequence & self._mask
+            first_run = min(n, self._size - start)
+            self._ring[start:start + first_run] = events[:first_run]
+            if first_run < n:
+                self._ring[:n - first_run] = events[first_run:n]
+            self._producer_sequence = sequence + n
+            self._not_empty.notify_all()
+            return n
+
+    def _barrier(self, reader: 'MulticastReader') -> int:
+        """Return the sequence a reader can read up to, caller must hold
+        the lock
+
+        Args:
+            reader (MulticastReader): the reader
+
+        Returns:
+            int: sequence after the last event the reader can read
+        """
+        if not reader.depends_on:
+            return self._producer_sequence
+        return min(d.sequence for d in reader.depends_on)
+
+    def _commit(self, reader: 'MulticastReader'):
+        """mark the events read by a reader as handled, caller must hold
+        the lock
+
+        Args:
+            reader (MulticastReader): the reader
+        """
+        if reader.sequence == reader.cursor:
+            return
+        reader.sequence = reader.cursor
+        self._not_full.notify_all()
+        # readers which depend on this one may read further
+        self._not_empty.notify_all()
+
+    def read(self,
+             reader: 'MulticastReader',
+             max_n: t.Optional[int],
+             block: bool,
+             timeout: t.Optional[float]) -> t.List[Event]:
+        """read up to max_n events from the sequence of a reader, use the
+        get methods of the reader instead
+
+        Args:
+            reader (MulticastReader): the reader
+            max_n (t.Optional[int]): maximum number of events, None for all
+            block (bool): wait for at least one event
+            timeout (t.Optional[float]): maximum seconds to wait
+
+        Returns:
+            t.List[Event]: events in order, empty if nothing is available
+        """
+        with self._lock:
+            # the previous read of a lazy reader is handled now
+            self._commit(reader)
+            if reader.cursor == self._barrier(reader) and (
+                    not block or not self._not_empty.wait_for(
+                        lambda: reader.cursor < self._barrier(reader),
+                        timeout)):
+                return []
+            sequence = reader.cursor
+            n = self._barrier(reader) - sequence
+            if max_n is not None:
+                n = min(n, max_n)
+            start = sequence & self._mask
+            first_run = min(n, self._size - start)
+            events = self._ring[start:start + first_run]
+            if first_run < n:
+                events += self._ring[:n - first_run]
+            reader.cursor = sequence + n
+            if not reader.lazy_commit:
+                self._commit(reader)
+            # slots up to the barrier always hold an event
+            return t.cast(t.List[Event], events)
+
+    def commit_reader(self, reader: 'MulticastReader'):
+        """commit the events a reader read so far, use
+        MulticastReader.commit instead
+
+        Args:
+            reader (MulticastReader): the reader
+        """
+        with self._lock:
+            self._commit(reader)
+
+    def wait_reader(self,
+                    reader: 'MulticastReader',
+                    timeout: t.Optional[float]) -> bool:
+        """block until the reader has an event or the timeout expires, use
+        MulticastReader.wait_not_empty instead
+
+        Args:
+            reader (MulticastReader): the reader
+            timeout (t.Optional[float]): maximum seconds to wait
+
+        Returns:
+            bool: True if the reader has an event
+        """
+        with self._lock:
+            return self._not_empty.wait_for(
+                lambda: reader.cursor < self._barrier(reader), timeout)
+
+
+class MulticastReader:
+    """Read side of a MulticastRingBuffer with its own sequence. It has the
+    consumer API of RingBuffer, so it can be given to a Consumer"""
+
+    def __init__(self,
+                 ring: MulticastRingBuffer,
+                 name: str,
+                 sequence: int,
+                 depends_on: t.Sequence['MulticastReader'] = (),
+                 lazy_commit: bool = False):
+        """Init MulticastReader, use MulticastRingBuffer.register_reader
+
+        Args:
+            ring (MulticastRingBuffer): the shared ring
+            name (str): name of the reader
+            sequence (int): sequence of the first event to read
+            depends_on (t.Sequence[MulticastReader], optional): readers
+                this one waits for. Defaults to ().
+            lazy_commit (bool, optional): commit a read on the next read.
+                Defaults to False.
+        """
+        self.name = name
+        # every event before sequence is handled
+        self.sequence = sequence
+        # next event to read, events from sequence to cursor are in progress
+        self.cursor = sequence
+        self.depends_on: t.Tuple['MulticastReader', ...] = tuple(depends_on)
+        self.lazy_commit = lazy_commit
+        self._ring = ring
+
+    def qsize(self) -> int:
+        """Return number of events this reader has not handled yet
+
+        Returns:
+            int: the lag of the reader
+        """
+        return self._ring.producer_sequence - self.sequence
+
+    def is_empty(self) -> bool:
+        """Check if this reader has nothing to read now
+
+        Returns:
+            bool: True if empty
+        """
+        if not self.depends_on:
+            return self._ring.producer_sequence == self.cursor
+        return min(d.sequence for d in self.depends_on) == self.cursor
+
+    def commit(self):
+        """Mark the events read so far as handled, for a lazy reader which
+        will not read again soon, such as a stopped consumer"""
+        self._ring.commit_reader(self)
+
+    def wait_not_empty(self, timeout: t.Optional[float] = None) -> bool:
+        """block until there is an event or the timeout expires
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait,
+                None waits forever. Defaults to None.
+
+        Returns:
+            bool: True if there is an event
+        """
+        return self._ring.wait_reader(self, timeout)
+
+    def get(self,
+            block: bool = False,
+            timeout: t.Optional[float] = None) -> Event:
+        """get the next event of this reader
+
+        Args:
+            block (bool, optional): wait for an event if there is none.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            Event: The next event
+
+        Raises:
+            RingEmptyError: No event for this reader
+        """
+        events = self._ring.read(self, 1, block, timeout)
+        if not events:
+            raise RingEmptyError('Ring is empty')
+        return events[0]
+
+    def get_many(self,
+                 max_n: t.Optional[int] = None,
+                 block: bool = False,
+                 timeout: t.Optional[float] = None) -> t.List[Event]:
+        """get up to max_n events of this reader in one critical section
+
+        Args:
+            max_n (t.Optional[int], optional): maximum number of events.
+                Defaults to None, which takes every available event.
+            block (bool, optional): wait for at least one event.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            t.List[Event]: events in order, empty if nothing is available
+        """
+        return self._ring.read(self, max_n, block, timeout)
+
+    def drain_into(self, events: t.List[Event]) -> int:
+        """move every available event to the end of a list
+
+        Args:
+            events (t.List[Event]): list which receives the events
+
+        Returns:
+            int: number of events moved
+        """
+        taken = self._ring.read(self, None, False, None)
+        events.extend(taken)
+        return len(taken)
@@ -0,0 +1,467 @@
+"""Ring buffer split in partitions keyed by Event.sid, events of the same
+sid keep their order while partitions are consumed in parallel
+"""
+import itertools
+import threading
+import typing as t
+import zlib
+
+from ring_buffer.model.event import Event
+from ring_buffer.services import buffer
+from ring_buffer.services import consumer as c
+
+
+class PartitionFullError(buffer.RingFullError):
+    """Some events of a put_many were not put because their partition is
+    full, they are not the tail of the batch so a count cannot tell them
+    """
+
+    def __init__(self, put_count: int, events: t.List[Event]):
+        """Init PartitionFullError
+
+        Args:
+            put_count (int): number of events put
+            events (t.List[Event]): events not put, in their order in
+                the batch
+        """
+        super().__init__(f'{len(events)} events not put, their partitions '
+                         'are full')
+        self.put_count = put_count
+        self.events = events
+
+
+def partition_of(sid: t.Union[str, bytes], partitions: int) -> int:
+    """Stable partition of a sid, the same in every process and run
+
+    Args:
+        sid (t.Union[str, bytes]): sid of an event
+        partitions (int): number of partitions
+
+    Returns:
+        int: index of the partition
+    """
+    if isinstance(sid, str):
+        sid = sid.encode()
+    return zlib.crc32(sid) % partitions
+
+
+class PartitionedRingBuffer:
+    """N RingBuffers, an event goes to the partition of its sid. Events
+    with an empty sid are spread round-robin, they have no order to keep.
+
+    Each partition has its own lock, so producers of different partitions
+    do not contend with each other, and one consumer per partition keeps
+    the order of every sid.
+    """
+
+    def __init__(self,
+                 partitions: int = 4,
+                 size: int = 2**10,
+                 overflow_policy: t.Union[buffer.OverflowPolicy, str] =
+                 buffer.OverflowPolicy.RAISE,
+                 enable_stats: bool = False):
+        """Init PartitionedRingBuffer
+
+        Args:
+            partitions (int, optional): number of partitions. Defaults to 4.
+            size (int, optional): size of each partition. Defaults to 2**10.
+            overflow_policy (t.Union[buffer.OverflowPolicy, str], optional):
+                overflow policy of each partition. Defaults to 'raise'.
+            enable_stats (bool, optional): keep statistics of each
+                partition. Defaults to False.
+        """
+        if partitions <= 0:
+            raise ValueError('partitions must be greater than 0')
+        self._size = size
+        self._overflow_policy = buffer.OverflowPolicy(overflow_policy)
+        self._enable_stats = enable_stats
+        self._rings: t.List[buffer.RingBuffer] = \
+            self._create_rings(partitions)
+        self._round_robin = itertools.count()
+        # puts in progress, rebalance waits for them with _gate
+        self._gate = threading.Condition()
+        self._active_puts: int = 0
+        self._is_paused: bool = False
+
+    def _create_rings(self, partitions: int) -> t.List[buffer.RingBuffer]:
+        """Create the ring of each partition
+
+        Args:
+            partitions (int): number of partitions
+
+        Returns:
+            t.List[buffer.RingBuffer]: the rings
+        """
+        return [buffer.RingBuffer(self._size, self._overflow_policy,
+                                  self._enable_stats)
+                for _ in range(partitions)]
+
+    @property
+    def partitions(self) -> int:
+        """Number of partitions"""
+        return len(self._rings)
+
+    @property
+    def size(self) -> int:
+        """Size of each partition"""
+        return self._size
+
+    def partition(self, index: int) -> buffer.RingBuffer:
+        """Return the ring of a partition
+
+        Args:
+            index (int): index of the partition
+
+        Returns:
+            buffer.RingBuffer: the ring
+        """
+        return self._rings[index]
+
+    def _partition_of(self, event: Event, partitions: int) -> int:
+        """Partition of an event, round-robin when it has no sid
+
+        Args:
+            event (Event): the event
+            partitions (int): number of partitions
+
+        Returns:
+            int: index of the partition
+        """
+        if not event.sid:
+            return next(self._round_robin) % partitions
+        return partition_of(event.sid, partitions)
+
+    def _enter_put(self) -> t.List[buffer.RingBuffer]:
+        """Wait while paused, then count a put in progress
+
+        Returns:
+            t.List[buffer.RingBuffer]: the rings of the put
+        """
+        with self._gate:
+            while self._is_paused:
+                self._gate.wait()
+            self._active_puts += 1
+            return self._rings
+
+    def _exit_put(self):
+        """Count a put as done, and wake a waiting rebalance"""
+        with self._gate:
+            self._active_puts -= 1
+            if self._active_puts == 0:
+                self._gate.notify_all()
+
+    def put(self,
+            event: Event,
+            block: t.Optional[bool] = None,
+            timeout: t.Optional[float] = None) -> int:
+        """put an event in the partition of its sid
+
+        Args:
+            event (Event): New event
+            block (t.Optional[bool], optional): see RingBuffer.put.
+                Defaults to None.
+            timeout (t.Optional[float], optional): see RingBuffer.put.
+                Defaults to None.
+
+        Returns:
+            int: index of the event in its partition, -1 if it is dropped
+
+        Raises:
+            RingFullError: the partition is full
+        """
+        rings = self._enter_put()
+        try:
+            ring = rings[self._partition_of(event, len(rings))]
+            return ring.put(event, block, timeout)
+        finally:
+            self._exit_put()
+
+    def put_many(self,
+                 events: t.Sequence[Event],
+                 block: t.Optional[bool] = None,
+                 timeout: t.Optional[float] = None) -> int:
+        """put events grouped by partition, one put_many per partition
+
+        Args:
+            events (t.Sequence[Event]): New events
+            block (t.Optional[bool], optional): see RingBuffer.put_many.
+                Defaults to None.
+            timeout (t.Optional[float], optional): see RingBuffer.put_many.
+                Defaults to None.
+
+        Returns:
+            int: number of events put, every event unless a lossy overflow
+                policy dropped some
+
+        Raises:
+            PartitionFullError: with the 'raise' and 'block' policies, a
+                partition was filled up. Its events which were not put
+                are attached, events of the other partitions are put
+        """
+        if not events:
+            return 0
+        rings = self._enter_put()
+        try:
+            groups: t.List[t.List[Event]] = [[] for _ in rings]
+            # index of each event in the batch, to report the ones not put
+            positions: t.List[t.List[int]] = [[] for _ in rings]
+            for i, e in enumerate(events):
+                partition = self._partition_of(e, len(rings))
+                groups[partition].append(e)
+                positions[partition].append(i)
+            n = 0
+            not_put: t.List[int] = []
+            for ring, group, group_positions in zip(rings, groups,
+                                                    positions):
+                if not group:
+                    continue
+                try:
+                    put_count = ring.put_many(group, block, timeout)
+                except buffer.RingFullError:
+                    put_count = 0
+                n += put_count
+                if put_count < len(group) and self._overflow_policy in (
+                        buffer.OverflowPolicy.RAISE,
+                        buffer.OverflowPolicy.BLOCK):
+                    not_put += group_positions[put_count:]
+            if not_put:
+                not_put.sort()
+                raise PartitionFullError(n, [events[i] for i in not_put])
+            return n
+        finally:
+            self._exit_put()
+
+    def qsize(self) -> int:
+        """Number of events in every partition"""
+        return sum(ring.qsize() for ring in self._rings)
+
+    def is_empty(self) -> bool:
+        """Check if every partition is empty
+
+        Returns:
+            bool: True if empty
+        """
+        return all(ring.is_empty() for ring in self._rings)
+
+    def pause(self, timeout: t.Optional[float] = None) -> bool:
+        """Stop new puts and wait for the puts in progress. A put blocked
+        on a full partition needs its consumer to finish
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait,
+                None waits forever. Defaults to None.
+
+        Returns:
+            bool: False if puts are still in progress after timeout, the
+                ring is not paused then
+        """
+        with self._gate:
+            self._is_paused = True
+            if not self._gate.wait_for(lambda: self._active_puts == 0,
+                                       timeout):
+                self._is_paused = False
+                self._gate.notify_all()
+                return False
+            return True
+
+    def resume(self):
+        """Let puts go on after pause"""
+        with self._gate:
+            self._is_paused = False
+            self._gate.notify_all()
+
+    def repartition(self, partitions: int):
+        """Move every event to new partitions, only call while paused and
+        without running consumer. Events are moved partition by partition
+        in order, so every sid keeps its order
+
+        Args:
+            partitions (int): new number of partitions
+
+        Raises:
+            ValueError: a new partition cannot hold its events
+        """
+        # partitions have no arena, they only hold events
+        old_events = [t.cast(t.List[Event], ring.get_many())
+                      for ring in self._rings]
+        groups: t.List[t.List[Event]] = [[] for _ in range(partitions)]
+        for events in old_events:
+            for e in events:
+                groups[self._partition_of(e, partitions)].append(e)
+        if any(len(group) > self._size for group in groups):
+            # nothing is lost, the old partitions get their events back
+            for ring, events in zip(self._rings, old_events):
+                ring.put_many(events)
+            raise ValueError(f'{partitions} partitions of size '
+                             f'{self._size} cannot hold the events')
+        self._rings = self._create_rings(partitions)
+        for ring, group in zip(self._rings, groups):
+            ring.put_many(group)
+
+    def rebalance(self, partitions: int, timeout: t.Optional[float] = None):
+        """Change the number of partitions, stop the world: puts wait
+        until it is done. Consumers of the old partitions must be stopped
+        first, use PartitionedConsumer.rebalance when they run
+
+        Args:
+            partitions (int): new number of partitions
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                for puts in progress. Defaults to None.
+
+        Raises:
+            ValueError: invalid number of partitions, or the new
+                partitions cannot hold the events
+            TimeoutError: puts are still in progress after timeout
+        """
+        if partitions <= 0:
+            raise ValueError('partitions must be greater than 0')
+        if not self.pause(timeout):
+            raise TimeoutError('puts are still in progress')
+        try:
+            self.repartition(partitions)
+        finally:
+            self.resume()
+
+
+class PartitionedConsumer:
+    """One Consumer thread per partition of a PartitionedRingBuffer, the
+    same callback receives every event, events of a sid are handled in
+    order by one thread"""
+
+    def __init__(self,
+                 name: str,
+                 ring_buffer: PartitionedRingBuffer,
+                 wait_strategy: t.Optional[c.WaitStrategy] = None):
+        """Init PartitionedConsumer
+
+        Args:
+            name (str): name of the consumer, the consumer of partition i
+                is named name-i
+            ring_buffer (PartitionedRingBuffer): the partitioned ring
+            wait_strategy (t.Optional[c.WaitStrategy], optional): how to
+                wait on a drained partition. Defaults to None.
+        """
+        self.name = name
+        self._ring_buffer = ring_buffer
+        self._wait_strategy = wait_strategy
+        # registers the callback on a consumer of a partition
+        self._register: t.Optional[t.Callable[[c.Consumer], None]] = None
+        self._consumers: t.List[c.Consumer] = self._create_consumers()
+
+    def _create_consumers(self) -> t.List[c.Consumer]:
+        """Create a consumer per partition
+
+        Returns:
+            t.List[c.Consumer]: the consumers
+        """
+        return [c.Consumer(f'{self.name}-{i}',
+                           self._ring_buffer.partition(i),
+                           self._wait_strategy)
+                for i in range(self._ring_buffer.partitions)]
+
+    def set_wait_strategy(self, wait_strategy: c.WaitStrategy):
+        """Change how the consumers wait on a drained partition
+
+        Args:
+            wait_strategy (c.WaitStrategy): the new wait strategy
+        """
+        self._wait_strategy = wait_strategy
+        for _consumer in self._consumers:
+            _consumer.set_wait_strategy(wait_strategy)
+
+    def register_callback(self, callback: t.Callable[[Event], None]):
+        """Add callback function, it is called from every partition thread
+        so it must be thread safe across sids
+
+        Args:
+            callback (t.Callable[[Event], None]): callback function
+        """
+        self._register = lambda _consumer: \
+            _consumer.register_callback(callback)
+        for _consumer in self._consumers:
+            self._register(_consumer)
+
+    def register_batch_callback(
+            self,
+            callback: t.Callable[[t.List[Event]], None],
+            max_batch: int = 256,
+            max_linger_ms: float = 5.0):
+        """Add callback function which receives lists of events of one
+        partition, see Consumer.register_batch_callback
+
+        Args:
+            callback (t.Callable[[t.List[Event]], None]): callback function
+            max_batch (int, optional): maximum events of a batch.
+                Defaults to 256.
+            max_linger_ms (float, optional): maximum milliseconds the
+                first event of a batch waits for more events.
+                Defaults to 5.0.
+        """
+        self._register = lambda _consumer: _consumer.register_batch_callback(
+            callback, max_batch, max_linger_ms)
+        for _consumer in self._consumers:
+            self._register(_consumer)
+
+    def start(self):
+        """Start one consumer thread per partition"""
+        for _consumer in self._consumers:
+            _consumer.start()
+
+    def stop(self):
+        """Stop every consumer"""
+        for _consumer in self._consumers:
+            _consumer.stop()
+
+    def join(self, timeout: t.Optional[float] = None):
+        """Wait for every consumer to stop
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                for each consumer. Defaults to None.
+        """
+        for _consumer in self._consumers:
+            _consumer.join(timeout)
+
+    def is_running(self) -> bool:
+        """Check if a consumer is running
+
+        Returns:
+            bool: True if one is running
+        """
+        return any(_consumer.is_running() for _consumer in self._consumers)
+
+    def rebalance(self, partitions: int, timeout: t.Optional[float] = None):
+        """Change the number of partitions while consuming. Puts are
+        paused, the consumers finish the events they took and stop, the
+        events left are moved, then new consumers start
+
+        Args:
+            partitions (int): new number of partitions
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                for puts in progress. Defaults to None.
+
+        Raises:
+            ValueError: invalid number of partitions, or the new
+                partitions cannot hold the events
+            TimeoutError: puts are still in progress after timeout
+        """
+        if partitions <= 0:
+            raise ValueError('partitions must be greater than 0')
+        was_running = self.is_running()
+        # consumers keep running so that blocked puts can finish
+        if not self._ring_buffer.pause(timeout):
+            raise TimeoutError('puts are still in progress')
+        try:
+            self.stop()
+            self.join()
+            try:
+                self._ring_buffer.repartition(partitions)
+            finally:
+                self._consumers = self._create_consumers()
+                if self._register is not None:
+                    for _consumer in self._consumers:
+                        self._register(_consumer)
+                if was_running:
+                    self.start()
+        finally:
+            self._ring_buffer.resume()
@@ -0,0 +1,190 @@
+"""Pipeline of consumer stages over one MulticastRingBuffer, stages wait
+on the stages they depend on instead of copying events to other rings
+"""
+import time
+import typing as t
+
+from ring_buffer.model.event import Event
+from ring_buffer.services import buffer
+from ring_buffer.services import consumer as c
+from ring_buffer.services import multicast
+from ring_buffer.services import stats
+
+Callback = t.Callable[[Event], None]
+BatchCallback = t.Callable[[t.List[Event]], None]
+
+
+class _Stage:
+    """Reader and consumer of a stage, with the counters of its last
+    metrics snapshot"""
+
+    def __init__(self,
+                 reader: multicast.MulticastReader,
+                 _consumer: c.Consumer):
+        """Init _Stage
+
+        Args:
+            reader (multicast.MulticastReader): reader of the stage
+            _consumer (c.Consumer): consumer of the reader
+        """
+        self.reader = reader
+        self.consumer = _consumer
+        self.first_sequence = reader.sequence
+        self.last_sequence = reader.sequence
+        self.last_time = time.monotonic()
+
+
+class Pipeline:
+    """A graph of stages over the slots of one MulticastRingBuffer, each
+    stage is a Consumer thread on its own reader. A stage gets an event
+    only after every stage it depends on has handled it, so a diamond
+
+        decode -> (enrich, risk) -> persist
+
+    runs enrich and risk side by side on the decoded events, and persist
+    after both, while each event stays in its slot. Producers put in
+    ring and are gated on the slowest stage.
+
+    Stages must be added before producing, in order: a stage can only
+    depend on stages added before it. The pipeline has the consumer API,
+    so it can be given to a Pool.
+    """
+
+    def __init__(self,
+                 name: str = 'pipeline',
+                 size: int = 2**10,
+                 wait_strategy: t.Optional[c.WaitStrategy] = None):
+        """Init Pipeline
+
+        Args:
+            name (str, optional): name of the pipeline, the consumer of a
+                stage is named name-stage. Defaults to 'pipeline'.
+            size (int, optional): size of the ring, must be a power of two.
+                Defaults to 2**10.
+            wait_strategy (t.Optional[c.WaitStrategy], optional): how the
+                stages wait for events. Defaults to None.
+        """
+        self.name = name
+        self.ring = multicast.MulticastRingBuffer(size)
+        self._wait_strategy = wait_strategy
+        self._stages: t.Dict[str, _Stage] = {}
+
+    def stage(self,
+              name: str,
+              callback: t.Union[Callback, BatchCallback],
+              depends_on: t.Sequence[str] = (),
+              max_batch: int = 0) -> 'Pipeline':
+        """Add a stage
+
+        Args:
+            name (str): unique name of the stage
+            callback (t.Union[Callback, BatchCallback]): callback of each
+                event, or of each list of events with max_batch
+            depends_on (t.Sequence[str], optional): names of the stages
+                which handle an event before this one. Defaults to (),
+                which reads the events as they are put.
+            max_batch (int, optional): when greater than 0, callback
+                receives lists of up to max_batch events. Defaults to 0.
+
+        Returns:
+            Pipeline: the pipeline, to chain stage calls
+
+        Raises:
+            ValueError: a stage of depends_on is not added yet
+            ReaderAlreadyRegisteredError: name is already used
+        """
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError(f'stage {dependency} is not added yet')
+        reader = self.ring.register_reader(
+            name,
+            [self._stages[d].reader for d in depends_on],
+            lazy_commit=True)
+        # a reader has the consumer API of RingBuffer
+        _consumer = c.Consumer(f'{self.name}-{name}',
+                               t.cast(buffer.RingBuffer, reader),
+                               self._wait_strategy)
+        if max_batch > 0:
+            # no linger, a batch is handled before the next read commits it
+            _consumer.register_batch_callback(
+                t.cast(BatchCallback, callback), max_batch, 0)
+        else:
+            _consumer.register_callback(t.cast(Callback, callback))
+        self._stages[name] = _Stage(reader, _consumer)
+        return self
+
+    def set_wait_strategy(self, wait_strategy: c.WaitStrategy):
+        """Change how the stages wait for events
+
+        Args:
+            wait_strategy (c.WaitStrategy): the new wait strategy
+        """
+        self._wait_strategy = wait_strategy
+        for _stage in self._stages.values():
+            _stage.consumer.set_wait_strategy(wait_strategy)
+
+    def start(self):
+        """Start the consumer of every stage
+
+        Raises:
+            ValueError: the pipeline has no stage
+        """
+        if not self._stages:
+            raise ValueError('pipeline has no stage')
+        now = time.monotonic()
+        for _stage in self._stages.values():
+            _stage.last_sequence = _stage.reader.sequence
+            _stage.last_time = now
+            _stage.consumer.start()
+
+    def stop(self):
+        """Stop the consumer of every stage"""
+        for _stage in self._stages.values():
+            _stage.consumer.stop()
+
+    def join(self, timeout: t.Optional[float] = None):
+        """Wait for the stages to exit after stop, then commit the events
+        they handled last. A stage still alive after timeout is not
+        committed, it may still be handling its last read
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                for each stage, None waits forever. Defaults to None.
+        """
+        for _stage in self._stages.values():
+            _stage.consumer.join(timeout)
+            if not _stage.consumer.is_alive():
+                _stage.reader.commit()
+
+    def is_running(self) -> bool:
+        """Check if a stage is running
+
+        Returns:
+            bool: True if it's running
+        """
+        return any(_stage.consumer.is_running()
+                   for _stage in self._stages.values())
+
+    def metrics(self) -> t.List[stats.StageMetrics]:
+        """Return the throughput and lag of every stage, the throughput is
+        measured since the previous call, or since start
+
+        Returns:
+            t.List[stats.StageMetrics]: counters of each stage, in the
+                order they were added
+        """
+        now = time.monotonic()
+        producer_sequence = self.ring.producer_sequence
+        metrics = []
+        for name, _stage in self._stages.items():
+            sequence = _stage.reader.sequence
+            elapsed = now - _stage.last_time
+            metrics.append(stats.StageMetrics(
+                name,
+                sequence - _stage.first_sequence,
+                (sequence - _stage.last_sequence) / elapsed
+                if elapsed > 0 else 0.0,
+                producer_sequence - sequence))
+            _stage.last_sequence = sequence
+            _stage.last_time = now
+        return metrics
@@ -1,7 +1,22 @@
 """Pool contains producer and consumers, where they co-opreating
 """
+import dataclasses
+import itertools
+import logging
+import threading
+import time
+import typing as t
+
 from ring_buffer.interface import producer as p
 from ring_buffer.services import consumer as c
+from ring_buffer.services import pipeline as pl
+from ring_buffer.services import process_consumer as pc
+from ring_buffer.services import stats
+
+# consumers an AutoscalingPool can start and stop
+Consumer = t.Union[c.Consumer, c.ConsumerGroup, pc.ProcessConsumerGroup]
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class Pool:
@@ -10,19 +25,307 @@ class Pool:
 
     def __init__(self,
                  producer: p.ProducerInterface,
-                 consumer: c.Consumer):
+                 consumer: t.Union[c.Consumer, c.ConsumerGroup, pl.Pipeline],
+                 wait_strategy: t.Optional[c.WaitStrategy] = None):
         """Init Pool instance
 
         Args:
             producer (p.ProducerInterface):
                 implementation of producer interface
-            consumer (c.Consumer): Consumer
+            consumer (t.Union[c.Consumer, c.ConsumerGroup, pl.Pipeline]):
+                Consumer, ConsumerGroup of several worker threads, or
+                Pipeline of stages
+            wait_strategy (t.Optional[c.WaitStrategy], optional): override
+                the wait strategy of the consumer. Defaults to None.
         """
         self._producer = producer
         self._consumer = consumer
+        if wait_strategy is not None:
+            self._consumer.set_wait_strategy(wait_strategy)
 
     def start(self):
         """Start producer and consumer
         """
         self._consumer.start()
         self._producer.start()
+
+
+class Ring(t.Protocol):
+    """Ring an AutoscalingPool watches, such as a RingBuffer"""
+
+    @property
+    def size(self) -> int:
+        """Number of slots of the ring"""
+
+    def qsize(self) -> int:
+        """Number of events not taken by a consumer yet"""
+
+    def is_empty(self) -> bool:
+        """Check if every event was taken by a consumer"""
+
+
+@dataclasses.dataclass(frozen=True)
+class ScalingPolicy:
+    """When an AutoscalingPool adds or removes a consumer.
+
+    A consumer is added after scale_up_checks checks in a row with the
+    ring at least scale_up_occupancy full, and removed after
+    scale_down_checks checks in a row at most scale_down_occupancy full.
+    The gap between the two thresholds, and cooldown seconds after each
+    change, keep the pool from flapping on a bursty load.
+    """
+    # consumers on start, and the fewest the pool scales down to
+    min_consumers: int = 1
+    max_consumers: int = 4
+    # lag divided by the size of the ring from which a consumer is added
+    scale_up_occupancy: float = 0.5
+    # lag divided by the size of the ring up to which one is removed
+    scale_down_occupancy: float = 0.1
+    scale_up_checks: int = 3
+    scale_down_checks: int = 10
+    # seconds between two checks
+    check_interval: float = 0.1
+    # minimum seconds between two changes
+    cooldown: float = 1.0
+
+    def __post_init__(self):
+        """Check the thresholds"""
+        if not 0 < self.min_consumers <= self.max_consumers:
+            raise ValueError('need 0 < min_consumers <= max_consumers')
+        if not 0 <= self.scale_down_occupancy < self.scale_up_occupancy:
+            raise ValueError(
+                'need 0 <= scale_down_occupancy < scale_up_occupancy')
+        if self.scale_up_checks <= 0 or self.scale_down_checks <= 0:
+            raise ValueError('checks must be greater than 0')
+        if self.check_interval <= 0:
+            raise ValueError('check_interval must be greater than 0')
+
+
+class _Scaler:
+    """Checks in a row above and below the thresholds of a policy, and
+    the changes made, only used by the supervisor thread once started"""
+
+    def __init__(self, policy: ScalingPolicy):
+        """Init _Scaler
+
+        Args:
+            policy (ScalingPolicy): the thresholds
+        """
+        self.policy = policy
+        self.high_checks: int = 0
+        self.low_checks: int = 0
+        self.last_scale: float = 0
+        self.scale_ups: int = 0
+        self.scale_downs: int = 0
+        self.failed_scale_ups: int = 0
+
+    def reset(self):
+        """Forget the checks, and wait cooldown before the next change"""
+        self.high_checks = self.low_checks = 0
+        self.last_scale = time.monotonic()
+
+    def check(self, occupancy: float, consumers: int) -> int:
+        """Count a check of the occupancy of the ring
+
+        Args:
+            occupancy (float): lag divided by the size of the ring
+            consumers (int): number of running consumers
+
+        Returns:
+            int: 1 to add a consumer, -1 to remove one, else 0
+        """
+        policy = self.policy
+        if occupancy >= policy.scale_up_occupancy:
+            self.high_checks += 1
+            self.low_checks = 0
+        elif occupancy <= policy.scale_down_occupancy:
+            self.low_checks += 1
+            self.high_checks = 0
+        else:
+            self.high_checks = self.low_checks = 0
+        if time.monotonic() - self.last_scale < policy.cooldown:
+            return 0
+        if self.high_checks >= policy.scale_up_checks and \
+                consumers < policy.max_consumers:
+            return 1
+        if self.low_checks >= policy.scale_down_checks and \
+                consumers > policy.min_consumers:
+            return -1
+        return 0
+
+
+class AutoscalingPool:
+    """M producers and a number of consumers between min_consumers and
+    max_consumers of a ScalingPolicy, all on one ring.
+
+    A supervisor thread checks the lag of the ring, the events not taken
+    by a consumer yet, every check_interval seconds, and adds or removes
+    a consumer as the policy says. Events a consumer took but has not
+    handled yet are not in the lag, the ring only fills up when the
+    consumers fall behind the producers.
+
+    Consumers are made by consumer_factory, such as a Consumer or a
+    ProcessConsumerGroup of one worker, they compete for the events of
+    the ring, so it must allow several consumers. A factory which raises
+    while the pool runs is logged and counted in failed_scale_ups, the
+    pool keeps its consumers and tries again after the next checks. stop
+    lets the consumers drain the ring once the producers have ended.
+    """
+
+    def __init__(self,
+                 producers: t.Sequence[p.ProducerInterface],
+                 ring_buffer: Ring,
+                 consumer_factory: t.Callable[[str], Consumer],
+                 policy: t.Optional[ScalingPolicy] = None,
+                 name: str = 'pool'):
+        """Init AutoscalingPool
+
+        Args:
+            producers (t.Sequence[p.ProducerInterface]): producers of the
+                ring, they must end on stop or on their own
+            ring_buffer (Ring): the ring, such as a RingBuffer
+            consumer_factory (t.Callable[[str], Consumer]): returns a new
+                consumer of the ring with its callback registered, from
+                its name
+            policy (t.Optional[ScalingPolicy], optional): when to add or
+                remove a consumer. Defaults to ScalingPolicy().
+            name (str, optional): name of the pool, consumer i is named
+                name-i. Defaults to 'pool'.
+        """
+        self.name = name
+        self._producers = list(producers)
+        self._ring_buffer = ring_buffer
+        self._consumer_factory = consumer_factory
+        self._scaler = _Scaler(policy or ScalingPolicy())
+        # only changed by start and the supervisor thread
+        self._consumers: t.List[Consumer] = []
+        self._consumer_index = itertools.count()
+        self._stop_event = threading.Event()
+        self._supervisor: t.Optional[threading.Thread] = None
+
+    @property
+    def consumers(self) -> int:
+        """Number of running consumers"""
+        return len(self._consumers)
+
+    def _add_consumer(self):
+        """make, start and keep a new consumer, named after the pool"""
+        _consumer = self._consumer_factory(
+            f'{self.name}-{next(self._consumer_index)}')
+        _consumer.start()
+        self._consumers.append(_consumer)
+
+    def _remove_consumer(self):
+        """stop the newest consumer, the events left in the ring are
+        taken by the others"""
+        _consumer = self._consumers.pop()
+        _consumer.stop()
+        _consumer.join()
+
+    def _autoscale(self):
+        """check the lag, and add or remove a consumer"""
+        scaler = self._scaler
+        change = scaler.check(
+            self._ring_buffer.qsize() / self._ring_buffer.size,
+            len(self._consumers))
+        if change > 0:
+            try:
+                self._add_consumer()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception('consumer_factory of pool %s failed',
+                                  self.name)
+                scaler.failed_scale_ups += 1
+            else:
+                scaler.scale_ups += 1
+        elif change < 0:
+            self._remove_consumer()
+            scaler.scale_downs += 1
+        else:
+            return
+        scaler.reset()
+
+    def _supervise(self):
+        """autoscale until stop, then drain the ring and stop the
+        consumers"""
+        check_interval = self._scaler.policy.check_interval
+        while not self._stop_event.wait(check_interval):
+            self._autoscale()
+        for producer in self._producers:
+            producer.join()
+        # keep scaling while the consumers drain the ring
+        while not self._ring_buffer.is_empty():
+            self._autoscale()
+            time.sleep(check_interval)
+        self._stop_consumers()
+
+    def _stop_consumers(self):
+        """stop the consumers once they handled the events they took"""
+        for _consumer in self._consumers:
+            _consumer.stop()
+        for _consumer in self._consumers:
+            _consumer.join()
+        self._consumers = []
+
+    def start(self):
+        """Start min_consumers consumers, then the producers and the
+        supervisor
+
+        Raises:
+            ConsumerIsNotStopError: pool is not stopped
+        """
+        if self.is_running():
+            raise c.ConsumerIsNotStopError('pool is not stopped')
+        self._stop_event.clear()
+        self._scaler.reset()
+        try:
+            for _ in range(self._scaler.policy.min_consumers):
+                self._add_consumer()
+        except Exception:
+            # the pool is not started, nor are any of its consumers
+            self._stop_consumers()
+            raise
+        for producer in self._producers:
+            producer.start()
+        self._supervisor = threading.Thread(name=f'{self.name}-supervisor',
+                                            target=self._supervise,
+                                            daemon=True)
+        self._supervisor.start()
+
+    def stop(self):
+        """Stop the producers, the consumers stop once they drained the
+        ring, call join to wait for them"""
+        self._stop_event.set()
+        for producer in self._producers:
+            producer.stop()
+
+    def join(self, timeout: t.Optional[float] = None):
+        """Wait for the producers to end and the consumers to drain the
+        ring after stop
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait,
+                None waits forever. Defaults to None.
+        """
+        if self._supervisor is not None:
+            self._supervisor.join(timeout)
+
+    def is_running(self) -> bool:
+        """Check if the pool is running or draining
+
+        Returns:
+            bool: True if it's running
+        """
+        return self._supervisor is not None and self._supervisor.is_alive()
+
+    def metrics(self) -> stats.PoolMetrics:
+        """Return the number of consumers, the lag and the scaling counters
+
+        Returns:
+            stats.PoolMetrics: counters of the pool
+        """
+        lag = self._ring_buffer.qsize()
+        scaler = self._scaler
+        return stats.PoolMetrics(len(self._consumers), lag,
+                                 lag / self._ring_buffer.size,
+                                 scaler.scale_ups, scaler.scale_downs,
+                                 scaler.failed_scale_ups)
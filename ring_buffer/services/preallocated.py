@@ -0,0 +1,248 @@
+"""RingBuffer of preallocated slot objects with a claim/publish API
+"""
+import typing as t
+import threading
+
+from ring_buffer.services.buffer import RingEmptyError, RingFullError
+
+T = t.TypeVar('T')
+
+
+class PreallocatedRingBuffer(t.Generic[T]):
+    """A circular queue whose slot objects are created once by a factory
+    and reused, so no object is allocated per event.
+
+    Producers claim a sequence, mutate the slot in place and publish it::
+
+        seq = ring.next()
+        ring[seq].price = price
+        ring.publish(seq)
+
+    Several producers may claim and publish concurrently, a sequence is
+    visible to the consumer once it and every sequence before it are
+    published. There must be only one consumer. The slots returned by
+    get/get_many are reused by producers after release, which happens at
+    the next get/get_many call, so a consumer must copy what it keeps.
+    """
+
+    def __init__(self, event_factory: t.Callable[[], T], size: int = 2**10):
+        """Init PreallocatedRingBuffer
+
+        Args:
+            event_factory (t.Callable[[], T]): build one slot object, it is
+                called size times at construction
+            size (int, optional): size of the queue, must be a power of two.
+                Defaults to 2**10.
+        """
+        if size <= 0:
+            raise ValueError('Size cannot be lesser than 0')
+        if size & (size - 1):
+            raise ValueError('Size must be a power of two')
+        self._size: int = size
+        self._mask: int = size - 1
+        self._slots: t.List[T] = [event_factory() for _ in range(size)]
+        # sequence published in each slot, -1 if never published
+        self._published: t.List[int] = [-1] * size
+        # next sequence to claim by a producer
+        self._claim_sequence: int = 0
+        # next sequence to read by the consumer
+        self._consumer_sequence: int = 0
+        # slots before this sequence can be claimed again
+        self._released_sequence: int = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        # number of threads waiting on a condition, publish and release
+        # take the lock to notify only when somebody waits
+        self._empty_waiters: int = 0
+        self._full_waiters: int = 0
+
+    def __getitem__(self, sequence: int) -> T:
+        """Return the slot object of a sequence
+
+        Args:
+            sequence (int): claimed or read sequence
+
+        Returns:
+            T: the preallocated slot object
+        """
+        return self._slots[sequence & self._mask]
+
+    @property
+    def size(self) -> int:
+        """Number of slots in the ring"""
+        return self._size
+
+    def qsize(self) -> int:
+        """Return number of claimed sequences the consumer has not read
+
+        Returns:
+            int: the size of ring
+        """
+        return self._claim_sequence - self._consumer_sequence
+
+    def is_full(self) -> bool:
+        """Check if no slot can be claimed
+
+        Returns:
+            bool: True if the ring is full
+        """
+        return self._claim_sequence - self._released_sequence >= self._size
+
+    def is_empty(self) -> bool:
+        """Check if the next sequence of the consumer is not published
+
+        Returns:
+            bool: True if empty
+        """
+        sequence = self._consumer_sequence
+        return self._published[sequence & self._mask] != sequence
+
+    def _wait(self,
+              condition: threading.Condition,
+              predicate: t.Callable[[], bool],
+              timeout: t.Optional[float],
+              waiters: str) -> bool:
+        """wait on a condition and count the waiting thread
+
+        Args:
+            condition (threading.Condition): condition to wait on
+            predicate (t.Callable[[], bool]): stop waiting when True
+            timeout (t.Optional[float]): maximum seconds to wait
+            waiters (str): name of the waiter counter attribute
+
+        Returns:
+            bool: last value of predicate
+        """
+        with self._lock:
+            setattr(self, waiters, getattr(self, waiters) + 1)
+            try:
+                return condition.wait_for(predicate, timeout)
+            finally:
+                setattr(self, waiters, getattr(self, waiters) - 1)
+
+    def next(self,
+             block: bool = False,
+             timeout: t.Optional[float] = None) -> int:
+        """Claim the next sequence, its slot is owned by the caller until
+        publish
+
+        Args:
+            block (bool, optional): wait for a free slot if the ring is full.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            int: the claimed sequence
+
+        Raises:
+            RingFullError: Ring is full
+        """
+        while True:
+            with self._lock:
+                if not self.is_full():
+                    sequence = self._claim_sequence
+                    self._claim_sequence = sequence + 1
+                    return sequence
+            if not block or not self._wait(
+                    self._not_full, lambda: not self.is_full(), timeout,
+                    '_full_waiters'):
+                raise RingFullError('ring is full')
+
+    def publish(self, sequence: int):
+        """Make a claimed sequence visible to the consumer
+
+        Args:
+            sequence (int): sequence returned by next
+        """
+        self._published[sequence & self._mask] = sequence
+        if self._empty_waiters:
+            with self._lock:
+                self._not_empty.notify()
+
+    def release(self):
+        """Give the slots read by the consumer back to producers"""
+        if self._released_sequence == self._consumer_sequence:
+            return
+        self._released_sequence = self._consumer_sequence
+        if self._full_waiters:
+            with self._lock:
+                self._not_full.notify_all()
+
+    def wait_not_empty(self, timeout: t.Optional[float] = None) -> bool:
+        """block until the next sequence is published or the timeout
+        expires
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait,
+                None waits forever. Defaults to None.
+
+        Returns:
+            bool: True if the ring has an event
+        """
+        return self._wait(self._not_empty, lambda: not self.is_empty(),
+                          timeout, '_empty_waiters')
+
+    def get_many(self,
+                 max_n: t.Optional[int] = None,
+                 block: bool = False,
+                 timeout: t.Optional[float] = None) -> t.List[T]:
+        """release the previous batch and get up to max_n published slots,
+        only call from the consumer thread
+
+        Args:
+            max_n (t.Optional[int], optional): maximum number of slots.
+                Defaults to None, which takes every published slot.
+            block (bool, optional): wait for at least one slot.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            t.List[T]: slot objects in order, valid until the next call
+        """
+        self.release()
+        if self.is_empty() and (not block or
+                                not self.wait_not_empty(timeout)):
+            return []
+        start = self._consumer_sequence
+        end = self._claim_sequence
+        if max_n is not None:
+            end = min(end, start + max_n)
+        published = self._published
+        mask = self._mask
+        sequence = start
+        while sequence < end and published[sequence & mask] == sequence:
+            sequence += 1
+        n = sequence - start
+        index = start & mask
+        first_run = min(n, self._size - index)
+        slots = self._slots[index:index + first_run]
+        if first_run < n:
+            slots += self._slots[:n - first_run]
+        self._consumer_sequence = sequence
+        return slots
+
+    def get(self,
+            block: bool = False,
+            timeout: t.Optional[float] = None) -> T:
+        """release the previous batch and get the next published slot, only
+        call from the consumer thread
+
+        Args:
+            block (bool, optional): wait for a slot if none is published.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            T: slot object, valid until the next call
+
+        Raises:
+            RingEmptyError: Ring is Empty
+        """
+        slots = self.get_many(1, block, timeout)
+        if not slots:
+            raise RingEmptyError('Ring is empty')
+        return slots[0]
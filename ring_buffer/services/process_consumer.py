@@ -0,0 +1,247 @@
+"""Consumer group of worker processes over a SharedRingBuffer, for CPU
+bound callbacks which a single process cannot run in parallel
+"""
+import multiprocessing
+import threading
+import time
+import typing as t
+from multiprocessing import connection
+from multiprocessing import sharedctypes
+
+from ring_buffer.model import event
+from ring_buffer.services import consumer as c
+from ring_buffer.services import stats
+from ring_buffer.services.shared_ring_buffer import SharedRingBuffer
+
+# seconds a worker blocks on an empty ring before checking the stop flag
+_STOP_CHECK_INTERVAL = 0.1
+
+# counters of a worker in the shared array
+_EVENTS, _BATCHES, _BUSY_SECONDS, _IDLE_POLLS, _CLAIM = range(5)
+_COUNTERS = 5
+
+
+def _work(ring: SharedRingBuffer,
+          callback: t.Callable[[event.Event], None],
+          counters: t.Any,
+          row: int,
+          max_claim: int,
+          stop_event: t.Any):
+    """Loop of a worker process: claim and handle batches until the group
+    is stopped and the ring is drained
+
+    Args:
+        ring (SharedRingBuffer): the shared ring
+        callback (t.Callable[[event.Event], None]): callback function
+        counters (t.Any): shared array of the counters of the workers
+        row (int): index of the first counter of this worker
+        max_claim (int): maximum events of a claim
+        stop_event (t.Any): multiprocessing.Event set by stop
+    """
+    claim = 1
+    try:
+        while True:
+            events = ring.get_many(claim)
+            if not events:
+                if stop_event.is_set():
+                    return
+                counters[row + _IDLE_POLLS] += 1
+                ring.wait_not_empty(_STOP_CHECK_INTERVAL)
+                continue
+            claim = c.adapt_claim(claim, len(events), max_claim)
+            start = time.perf_counter()
+            for e in events:
+                callback(e)
+            counters[row + _BUSY_SECONDS] += time.perf_counter() - start
+            counters[row + _EVENTS] += len(events)
+            counters[row + _BATCHES] += 1
+            counters[row + _CLAIM] = claim
+    finally:
+        ring.close()
+
+
+class ProcessConsumerGroup:
+    """K worker processes competing for the events of a SharedRingBuffer.
+
+    Producers serialize an event once into a shared slot, a worker
+    unpickles it straight from shared memory, nothing goes through a
+    multiprocessing.Queue and its feeder thread. Claims adapt like the
+    ones of ConsumerGroup.
+
+    A supervisor thread waits on the process sentinels and restarts a
+    worker which dies. A claim leaves the ring before it is handled, so a
+    crash loses the rest of the claim in progress, up to max_claim
+    events. A callback exception ends the worker, so it is restarted too.
+    stop lets the workers drain the ring before they exit.
+
+    A multiprocessing.Lock has no owner, so nothing can release the lock
+    of the ring if a worker is killed while it holds it, for instance by
+    SIGKILL or the OOM killer during a get_many. Every producer and
+    worker, the restarted ones included, then blocks on it forever.
+    Workers hold it only for the copy of a claim, and a callback
+    exception never happens under it, but stop such a group with stop,
+    not by killing its processes.
+    """
+
+    def __init__(self,
+                 name: str,
+                 ring_buffer: SharedRingBuffer,
+                 workers: t.Optional[int] = None,
+                 max_claim: int = 64,
+                 context: t.Optional[t.Any] = None):
+        """Init ProcessConsumerGroup
+
+        Args:
+            name (str): name of the group, worker i is named name-i
+            ring_buffer (SharedRingBuffer): ring created with a
+                multiprocessing.Lock, the workers are several consumers
+            workers (t.Optional[int], optional): number of worker
+                processes. Defaults to None, the number of CPUs.
+            max_claim (int, optional): maximum events of a claim, so the
+                most events a crash of a worker loses. Defaults to 64.
+            context (t.Optional[t.Any], optional): multiprocessing context
+                of the processes, the lock of the ring must come from it.
+                Defaults to None, the default context.
+
+        Raises:
+            ValueError: the ring has no lock
+        """
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers <= 0:
+            raise ValueError('workers must be greater than 0')
+        if max_claim <= 0:
+            raise ValueError('max_claim must be greater than 0')
+        if ring_buffer.lock is None:
+            raise ValueError('the ring needs a lock for several consumers')
+        self.name = name
+        self._ring_buffer = ring_buffer
+        self._workers = workers
+        self._max_claim = max_claim
+        self._context = context or multiprocessing.get_context()
+        self._counters = sharedctypes.RawArray('d', workers * _COUNTERS)
+        self._stop_event = self._context.Event()
+        self._processes: t.List[t.Optional[multiprocessing.Process]] = \
+            [None] * workers
+        self._callback: t.Optional[t.Callable[[event.Event], None]] = None
+        self._supervisor: t.Optional[threading.Thread] = None
+        self._is_stop: bool = True
+        self._restarts: int = 0
+
+    @property
+    def workers(self) -> int:
+        """Number of worker processes"""
+        return self._workers
+
+    @property
+    def restarts(self) -> int:
+        """Number of workers restarted after they died"""
+        return self._restarts
+
+    def register_callback(self,
+                          callback: t.Callable[[event.Event], None]):
+        """Add callback function, it runs in the worker processes so it
+        must be picklable with the spawn and forkserver start methods
+
+        Args:
+            callback (t.Callable[[event.Event], None]): callback function
+                should receive Event and return None
+        """
+        self._callback = callback
+
+    def _start_worker(self, index: int):
+        """Start the worker process of a slot, on start and to replace a
+        dead worker
+
+        Args:
+            index (int): index of the worker
+        """
+        process = self._context.Process(
+            name=f'{self.name}-{index}',
+            target=_work,
+            args=(self._ring_buffer, self._callback, self._counters,
+                  index * _COUNTERS, self._max_claim, self._stop_event),
+            daemon=True)
+        process.start()
+        self._processes[index] = process
+
+    def _supervise(self):
+        """restart workers which die until the group is stopped"""
+        while not self._is_stop:
+            sentinels = {p.sentinel: i for i, p in enumerate(self._processes)}
+            ready = connection.wait(list(sentinels), _STOP_CHECK_INTERVAL)
+            for sentinel in ready:
+                if self._is_stop:
+                    return
+                index = sentinels[sentinel]
+                self._processes[index].join()
+                self._restarts += 1
+                self._start_worker(index)
+
+    def start(self):
+        """Start the worker processes and their supervisor
+
+        Raises:
+            ValueError: callback function cannot be None
+            ConsumerIsNotStopError: group is not stopped
+            ConsumerAlreadyRunningError: a worker process is still running
+        """
+        if self._callback is None:
+            raise ValueError("callback function cannot be None")
+        if self._is_stop is False:
+            raise c.ConsumerIsNotStopError('consumer group is not stopped')
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                raise c.ConsumerAlreadyRunningError(
+                    f'worker {process.name} is still running')
+        self._stop_event.clear()
+        self._is_stop = False
+        for index in range(self._workers):
+            self._start_worker(index)
+        self._supervisor = threading.Thread(name=f'{self.name}-supervisor',
+                                            target=self._supervise,
+                                            daemon=True)
+        self._supervisor.start()
+
+    def stop(self):
+        """Stop the workers once they drained the ring, stop the
+        producers first so that the ring gets empty"""
+        self._is_stop = True
+        self._stop_event.set()
+
+    def join(self, timeout: t.Optional[float] = None):
+        """Wait for the workers to exit after stop
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                for each worker, None waits forever. Defaults to None.
+        """
+        if self._supervisor is not None:
+            self._supervisor.join(timeout)
+        for process in self._processes:
+            if process is not None:
+                process.join(timeout)
+
+    def is_running(self) -> bool:
+        """Check if the group is running or stop
+
+        Returns:
+            bool: True if it's running
+        """
+        return not self._is_stop
+
+    def metrics(self) -> t.List[stats.WorkerMetrics]:
+        """Return a snapshot of the counters of every worker, the counters
+        of a restarted worker go on from the ones of the dead one
+
+        Returns:
+            t.List[stats.WorkerMetrics]: counters of each worker
+        """
+        metrics = []
+        for index in range(self._workers):
+            row = self._counters[index * _COUNTERS:(index + 1) * _COUNTERS]
+            metrics.append(stats.WorkerMetrics(
+                f'{self.name}-{index}', int(row[_EVENTS]),
+                int(row[_BATCHES]), row[_BUSY_SECONDS],
+                int(row[_IDLE_POLLS]), int(row[_CLAIM]) or 1))
+        return metrics
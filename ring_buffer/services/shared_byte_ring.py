@@ -0,0 +1,279 @@
+"""Ring of variable-length byte records in one shared memory segment
+"""
+import struct
+import typing as t
+from multiprocessing import shared_memory
+
+from ring_buffer.services.buffer import RingFullError
+from ring_buffer.services.shared_ring_buffer import attach_shared_memory
+
+# write and read positions sit on their own cache line
+_WRITE_POSITION_OFFSET = 0
+_READ_POSITION_OFFSET = 64
+_CAPACITY_OFFSET = 128
+_HEADER_SIZE = 192
+_POSITION = struct.Struct('<Q')
+_LENGTH = struct.Struct('<I')
+# a record length meaning the rest of the ring is skipped
+_WRAP_MARKER = 0xFFFFFFFF
+_ALIGNMENT = 8
+
+
+class RecordNotReservedError(Exception):
+    """commit is called without a reserved record"""
+
+
+def _record_size(length: int) -> int:
+    """Return bytes taken by a record, length prefix and padding included
+
+    Args:
+        length (int): length of the payload
+
+    Returns:
+        int: size of the record
+    """
+    size = _LENGTH.size + length
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class SharedByteRing:
+    """A contiguous byte ring of length-prefixed records in a SharedMemory.
+
+    A record is never split: when it does not fit before the end of the
+    ring, the tail is skipped with a wrap marker and the record starts at
+    the beginning (bip-buffer). Writers reserve bytes, fill them in place
+    through a memoryview and commit, readers get zero-copy memoryviews of
+    committed records and release them.
+
+    It is safe for one writer and one reader process. Memoryviews returned
+    by reserve and read must be released before close.
+    """
+
+    def __init__(self,
+                 name: t.Optional[str] = None,
+                 capacity: int = 2**20,
+                 create: bool = False):
+        """Init SharedByteRing
+
+        Args:
+            name (t.Optional[str], optional): name of the shared memory,
+                a random name is used when created without it.
+                Defaults to None.
+            capacity (int, optional): bytes of the ring, rounded up to a
+                multiple of 8, only used on create. Defaults to 2**20.
+            create (bool, optional): True if create new shared memory zone.
+                Defaults to False.
+        """
+        if create:
+            if capacity <= 0:
+                raise ValueError('capacity cannot be lesser than 0')
+            capacity = _record_size(capacity - _LENGTH.size)
+            self._shm = shared_memory.SharedMemory(
+                name, size=_HEADER_SIZE + capacity, create=True)
+            _POSITION.pack_into(self._shm.buf, _WRITE_POSITION_OFFSET, 0)
+            _POSITION.pack_into(self._shm.buf, _READ_POSITION_OFFSET, 0)
+            _POSITION.pack_into(self._shm.buf, _CAPACITY_OFFSET, capacity)
+        else:
+            if name is None:
+                raise ValueError('name is needed to attach')
+            self._shm = attach_shared_memory(name)
+            capacity = _POSITION.unpack_from(self._shm.buf,
+                                             _CAPACITY_OFFSET)[0]
+        self.name: str = self._shm.name
+        self._capacity: int = capacity
+        # (position, payload length) of the reserved record of the writer
+        self._reserved: t.Optional[t.Tuple[int, int]] = None
+        # (position, payload length) of the record read by the reader
+        self._pending: t.Optional[t.Tuple[int, int]] = None
+
+    def __reduce__(self):
+        """Pickle the ring as its name, it attaches to the same segment"""
+        return (self.__class__, (self.name, 0, False))
+
+    @property
+    def capacity(self) -> int:
+        """Bytes of the ring"""
+        return self._capacity
+
+    @property
+    def max_record_length(self) -> int:
+        """Maximum payload length of a record"""
+        return self._capacity - _LENGTH.size
+
+    def _write_position(self) -> int:
+        """position of the end of the last committed record"""
+        return _POSITION.unpack_from(self._shm.buf,
+                                     _WRITE_POSITION_OFFSET)[0]
+
+    def _read_position(self) -> int:
+        """position of the first record not released yet"""
+        return _POSITION.unpack_from(self._shm.buf,
+                                     _READ_POSITION_OFFSET)[0]
+
+    def used(self) -> int:
+        """Return bytes used by committed records not released yet
+
+        Returns:
+            int: used bytes, padding and skipped tails included
+        """
+        return self._write_position() - self._read_position()
+
+    def is_empty(self) -> bool:
+        """Check if every committed record is released
+
+        Returns:
+            bool: True if empty
+        """
+        return self.used() == 0
+
+    def reserve(self, length: int) -> memoryview:
+        """Reserve a record, only call from the writer process
+
+        Args:
+            length (int): maximum payload length of the record
+
+        Returns:
+            memoryview: writable view of length bytes to fill in place
+
+        Raises:
+            ValueError: length is bigger than max_record_length
+            RingFullError: not enough free bytes until the reader releases
+        """
+        if length < 0 or length > self.max_record_length:
+            raise ValueError(f'record length must be between 0 and '
+                             f'{self.max_record_length}, receive {length}')
+        size = _record_size(length)
+        position = self._write_position()
+        read_position = self._read_position()
+        offset = position % self._capacity
+        tail = self._capacity - offset
+        skip = tail if size > tail else 0
+        if skip and position == read_position:
+            # the ring is empty, the reader starts the next lap with the
+            # writer, so the skipped tail is not counted as used
+            self._skip_tail(position, offset, tail)
+            position = read_position = position + tail
+            offset = skip = 0
+        if position + skip + size - read_position > self._capacity:
+            raise RingFullError('ring is full')
+        if skip:
+            _LENGTH.pack_into(self._shm.buf, _HEADER_SIZE + offset,
+                              _WRAP_MARKER)
+            position += skip
+            offset = 0
+        self._reserved = (position, length)
+        start = _HEADER_SIZE + offset + _LENGTH.size
+        return self._shm.buf[start:start + length]
+
+    def _skip_tail(self, position: int, offset: int, tail: int):
+        """move both positions to the next lap of an empty ring. The
+        reader may still check the old position, so it finds a wrap
+        marker there until the read position moves, see read
+
+        Args:
+            position (int): write and read position
+            offset (int): offset of position in the ring
+            tail (int): bytes from offset to the end of the ring
+        """
+        _LENGTH.pack_into(self._shm.buf, _HEADER_SIZE + offset, _WRAP_MARKER)
+        _POSITION.pack_into(self._shm.buf, _WRITE_POSITION_OFFSET,
+                            position + tail)
+        _POSITION.pack_into(self._shm.buf, _READ_POSITION_OFFSET,
+                            position + tail)
+
+    def commit(self, length: t.Optional[int] = None):
+        """Publish the reserved record to the reader
+
+        Args:
+            length (t.Optional[int], optional): bytes actually written,
+                at most the reserved length. Defaults to None, which
+                commits the reserved length.
+
+        Raises:
+            RecordNotReservedError: nothing is reserved
+        """
+        if self._reserved is None:
+            raise RecordNotReservedError('reserve a record before commit')
+        position, reserved_length = self._reserved
+        if length is None:
+            length = reserved_length
+        elif length < 0 or length > reserved_length:
+            raise ValueError(f'length must be between 0 and '
+                             f'{reserved_length}, receive {length}')
+        _LENGTH.pack_into(self._shm.buf,
+                          _HEADER_SIZE + position % self._capacity, length)
+        self._reserved = None
+        # publish only after the record is written
+        _POSITION.pack_into(self._shm.buf, _WRITE_POSITION_OFFSET,
+                            position + _record_size(length))
+
+    def write(self, data: bytes) -> int:
+        """Copy data in a new record and commit it
+
+        Args:
+            data (bytes): payload of the record
+
+        Returns:
+            int: length of the payload
+
+        Raises:
+            RingFullError: not enough free bytes until the reader releases
+        """
+        view = self.reserve(len(data))
+        try:
+            view[:] = data
+        finally:
+            view.release()
+        self.commit()
+        return len(data)
+
+    def read(self) -> t.Optional[memoryview]:
+        """Return the next committed record without copying, only call
+        from the reader process. The same record is returned until release
+
+        Returns:
+            t.Optional[memoryview]: read only view of the payload, None if
+                there is no committed record
+        """
+        while self._pending is None:
+            read_position = self._read_position()
+            write_position = self._write_position()
+            if read_position == write_position:
+                return None
+            offset = read_position % self._capacity
+            length = _LENGTH.unpack_from(self._shm.buf,
+                                         _HEADER_SIZE + offset)[0]
+            position = read_position
+            if length == _WRAP_MARKER:
+                position += self._capacity - offset
+                if position == write_position:
+                    # an empty ring skipped by the writer
+                    return None
+                length = _LENGTH.unpack_from(self._shm.buf, _HEADER_SIZE)[0]
+            # the writer moves the read position only when it skips the
+            # tail of an empty ring, the length read may be overwritten
+            if self._read_position() == read_position:
+                self._pending = (position, length)
+        position, length = self._pending
+        start = _HEADER_SIZE + position % self._capacity + _LENGTH.size
+        return self._shm.buf[start:start + length].toreadonly()
+
+    def release(self):
+        """Give the bytes of the record returned by read back to the
+        writer, views of the record must not be used after that"""
+        if self._pending is None:
+            return
+        position, length = self._pending
+        self._pending = None
+        _POSITION.pack_into(self._shm.buf, _READ_POSITION_OFFSET,
+                            position + _record_size(length))
+
+    def close(self):
+        """Detach this process from the shared memory"""
+        self._shm.close()
+
+    def shutdown(self):
+        """Release the shared memory after use, call it from the creator
+        """
+        self._shm.close()
+        self._shm.unlink()
@@ -0,0 +1,584 @@
+"""RingBuffer in one shared memory segment, producers and consumers can
+run in different processes
+"""
+import contextlib
+import pickle
+import struct
+import time
+import typing as t
+from multiprocessing import resource_tracker, shared_memory
+
+from ring_buffer.model.event import Event
+from ring_buffer.services.arena import BytesLike
+from ring_buffer.services.buffer import RingEmptyError, RingFullError
+
+# producer, consumer and committed sequences sit on their own cache line
+_PRODUCER_SEQUENCE_OFFSET = 0
+_CONSUMER_SEQUENCE_OFFSET = 64
+_LAYOUT_OFFSET = 128
+_COMMITTED_SEQUENCE_OFFSET = 192
+_HEADER_SIZE = 256
+_SEQUENCE = struct.Struct('<Q')
+_LAYOUT = struct.Struct('<II')  # number of slots, payload size of a slot
+_LENGTH = struct.Struct('<I')
+# bit of the length of a slot which holds raw bytes instead of an event
+_RAW_FLAG = 0x80000000
+
+# sleep bounds of a blocking call polling the shared header
+_MIN_POLL_SLEEP = 0.0001
+_MAX_POLL_SLEEP = 0.001
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to a SharedMemory created by another process. The creator
+    owns the segment, so it is not registered to the resource tracker of
+    this process, which would unlink it when this process exits
+
+    Args:
+        name (str): name of the shared memory
+
+    Returns:
+        shared_memory.SharedMemory: the attached shared memory
+    """
+    shm = shared_memory.SharedMemory(name)
+    # the tracker knows the segment by its private name, with a leading /
+    tracked_name: str = getattr(shm, '_name')
+    resource_tracker.unregister(tracked_name, 'shared_memory')
+    return shm
+
+
+def remaining(deadline: t.Optional[float]) -> t.Optional[float]:
+    """Return the seconds left until a deadline
+
+    Args:
+        deadline (t.Optional[float]): time.monotonic() of the deadline,
+            None for no deadline
+
+    Returns:
+        t.Optional[float]: seconds left, at least 0, None without deadline
+    """
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def poll(predicate: t.Callable[[], bool],
+          timeout: t.Optional[float]) -> bool:
+    """poll predicate with a short growing sleep until it is True
+
+    Args:
+        predicate (t.Callable[[], bool]): condition to wait for
+        timeout (t.Optional[float]): maximum seconds to wait,
+            None waits forever
+
+    Returns:
+        bool: last value of predicate
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    sleep = _MIN_POLL_SLEEP
+    while not predicate():
+        if deadline is not None:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            sleep = min(sleep, left)
+        time.sleep(sleep)
+        sleep = min(sleep * 2, _MAX_POLL_SLEEP)
+    return True
+
+
+class SharedRingBuffer:
+    """A circular queue living in a single SharedMemory segment.
+
+    The segment has a header with the producer/consumer sequences and the
+    layout, followed by fixed-size slots which hold a length-prefixed
+    pickled event, or raw bytes put by put_bytes. Other processes attach
+    by name, or receive the instance through multiprocessing, which
+    attaches by name too.
+
+    Without a lock it is safe for one producer and one consumer process,
+    pass a multiprocessing.Lock for several producers or consumers.
+
+    Producers are gated on the committed sequence. A consumer with
+    auto_commit off commits the events it handled, so until then they stay
+    in their slots and a restarted consumer can seek back to them.
+    """
+
+    def __init__(self,
+                 name: t.Optional[str] = None,
+                 size: int = 2**10,
+                 slot_size: int = 256,
+                 create: bool = False,
+                 lock: t.Optional[t.ContextManager[t.Any]] = None,
+                 auto_commit: bool = True):
+        """Init SharedRingBuffer
+
+        Args:
+            name (t.Optional[str], optional): name of the shared memory,
+                a random name is used when created without it.
+                Defaults to None.
+            size (int, optional): number of slots, only used on create.
+                Defaults to 2**10.
+            slot_size (int, optional): maximum bytes of a pickled event,
+                only used on create. Defaults to 256.
+            create (bool, optional): True if create new shared memory zone.
+                Defaults to False.
+            lock (t.Optional[t.ContextManager[t.Any]], optional): lock
+                shared by every process, such as multiprocessing.Lock.
+                Needed with several producers or consumers.
+                Defaults to None.
+            auto_commit (bool, optional): commit events as soon as they
+                are taken, else call commit once they are handled.
+                Defaults to True.
+        """
+        if create:
+            if size <= 0:
+                raise ValueError('Size cannot be lesser than 0')
+            if slot_size <= 0:
+                raise ValueError('slot_size cannot be lesser than 0')
+            self._shm = shared_memory.SharedMemory(
+                name,
+                size=_HEADER_SIZE + size * (_LENGTH.size + slot_size),
+                create=True)
+            buf = self._shm.buf
+            _SEQUENCE.pack_into(buf, _PRODUCER_SEQUENCE_OFFSET, 0)
+            _SEQUENCE.pack_into(buf, _CONSUMER_SEQUENCE_OFFSET, 0)
+            _SEQUENCE.pack_into(buf, _COMMITTED_SEQUENCE_OFFSET, 0)
+            _LAYOUT.pack_into(buf, _LAYOUT_OFFSET, size, slot_size)
+        else:
+            if name is None:
+                raise ValueError('name is needed to attach')
+            self._shm = attach_shared_memory(name)
+            size, slot_size = _LAYOUT.unpack_from(self._shm.buf,
+                                                  _LAYOUT_OFFSET)
+        self.name: str = self._shm.name
+        self._size = size
+        self._slot_size = slot_size
+        self._stride = _LENGTH.size + slot_size
+        self._create = create
+        self._lock = lock
+        self._auto_commit = auto_commit
+        self._guard: t.ContextManager[t.Any] = lock if lock is not None \
+            else contextlib.nullcontext()
+
+    def __reduce__(self):
+        """Pickle the ring as its name, it attaches to the same segment"""
+        return (self.__class__,
+                (self.name, 0, 0, False, self._lock, self._auto_commit))
+
+    @property
+    def size(self) -> int:
+        """Number of slots in the ring"""
+        return self._size
+
+    @property
+    def lock(self) -> t.Optional[t.ContextManager[t.Any]]:
+        """Lock shared by the processes, None for one producer and one
+        consumer"""
+        return self._lock
+
+    @property
+    def slot_size(self) -> int:
+        """Maximum bytes of a pickled event"""
+        return self._slot_size
+
+    def _producer_sequence(self) -> int:
+        """sequence of the next event a producer puts"""
+        return _SEQUENCE.unpack_from(self._shm.buf,
+                                     _PRODUCER_SEQUENCE_OFFSET)[0]
+
+    def _consumer_sequence(self) -> int:
+        """sequence of the next event a consumer takes"""
+        return _SEQUENCE.unpack_from(self._shm.buf,
+                                     _CONSUMER_SEQUENCE_OFFSET)[0]
+
+    def _committed_sequence(self) -> int:
+        """sequence of the first event not committed, slots before are free"""
+        return _SEQUENCE.unpack_from(self._shm.buf,
+                                     _COMMITTED_SEQUENCE_OFFSET)[0]
+
+    def _set_consumer_sequence(self, sequence: int):
+        """move the consumer sequence, and the committed one with
+        auto_commit
+
+        Args:
+            sequence (int): sequence of the next event to take
+        """
+        _SEQUENCE.pack_into(self._shm.buf, _CONSUMER_SEQUENCE_OFFSET,
+                            sequence)
+        if self._auto_commit:
+            _SEQUENCE.pack_into(self._shm.buf, _COMMITTED_SEQUENCE_OFFSET,
+                                sequence)
+
+    @property
+    def sequence(self) -> int:
+        """Sequence of the next event to take"""
+        return self._consumer_sequence()
+
+    def commit(self, sequence: t.Optional[int] = None):
+        """Give the slots of handled events back to the producers, needed
+        only when auto_commit is off
+
+        Args:
+            sequence (t.Optional[int], optional): sequence of the first
+                event not handled yet. Defaults to None, which commits
+                every event taken.
+        """
+        with self._guard:
+            consumer_sequence = self._consumer_sequence()
+            sequence = consumer_sequence if sequence is None \
+                else min(sequence, consumer_sequence)
+            if sequence > self._committed_sequence():
+                _SEQUENCE.pack_into(self._shm.buf,
+                                    _COMMITTED_SEQUENCE_OFFSET, sequence)
+
+    def seek(self, sequence: int):
+        """Move the consumer to a sequence which is not committed yet,
+        so that a restarted consumer resumes from its checkpoint
+
+        Args:
+            sequence (int): sequence of the next event to take
+
+        Raises:
+            ValueError: the sequence is committed or not put yet
+        """
+        with self._guard:
+            committed = self._committed_sequence()
+            producer_sequence = self._producer_sequence()
+            if not committed <= sequence <= producer_sequence:
+                raise ValueError(
+                    f'sequence {sequence} is not in the ring, which holds '
+                    f'[{committed}, {producer_sequence})')
+            _SEQUENCE.pack_into(self._shm.buf, _CONSUMER_SEQUENCE_OFFSET,
+                                sequence)
+
+    def qsize(self) -> int:
+        """Return size of the ring buffer
+
+        Returns:
+            int: the size of ring
+        """
+        return self._producer_sequence() - self._consumer_sequence()
+
+    def is_full(self) -> bool:
+        """Check if the ring is full or not
+
+        Returns:
+            bool: True if the ring is full
+        """
+        return self._producer_sequence() - self._committed_sequence() >= \
+            self._size
+
+    def is_empty(self) -> bool:
+        """Check if the ring is empty or not
+
+        Returns:
+            bool: True if empty
+        """
+        return self.qsize() == 0
+
+    def wait_not_empty(self, timeout: t.Optional[float] = None) -> bool:
+        """block until the ring has an event or the timeout expires
+
+        Args:
+            timeout (t.Optional[float], optional): maximum seconds to wait,
+                None waits forever. Defaults to None.
+
+        Returns:
+            bool: True if the ring has an event
+        """
+        return poll(lambda: not self.is_empty(), timeout)
+
+    def _write_slot(self, sequence: int, payload: BytesLike, raw: bool):
+        """write a payload in the slot of a sequence
+
+        Args:
+            sequence (int): sequence of the event
+            payload (BytesLike): serialized event or raw bytes
+            raw (bool): True if payload is raw bytes
+        """
+        offset = _HEADER_SIZE + (sequence % self._size) * self._stride
+        _LENGTH.pack_into(self._shm.buf, offset,
+                          len(payload) | _RAW_FLAG if raw else len(payload))
+        start = offset + _LENGTH.size
+        self._shm.buf[start:start + len(payload)] = payload
+
+    def _slot(self, sequence: int) -> t.Tuple[memoryview, bool]:
+        """return a view of the payload in the slot of a sequence
+
+        Args:
+            sequence (int): sequence of the event
+
+        Returns:
+            t.Tuple[memoryview, bool]: the payload, True if it is raw bytes
+        """
+        offset = _HEADER_SIZE + (sequence % self._size) * self._stride
+        length = _LENGTH.unpack_from(self._shm.buf, offset)[0]
+        start = offset + _LENGTH.size
+        return (self._shm.buf[start:start + (length & ~_RAW_FLAG)],
+                bool(length & _RAW_FLAG))
+
+    def _read_slot(self, sequence: int) -> t.Tuple[bytes, bool]:
+        """read the payload in the slot of a sequence
+
+        Args:
+            sequence (int): sequence of the event
+
+        Returns:
+            t.Tuple[bytes, bool]: the payload, True if it is raw bytes
+        """
+        view, raw = self._slot(sequence)
+        with view:
+            return bytes(view), raw
+
+    def _serialize(self, event: Event) -> bytes:
+        """pickle an event and check that it fits in a slot
+
+        Args:
+            event (Event): the event
+
+        Returns:
+            bytes: serialized event
+        """
+        if not isinstance(event, Event):
+            raise ValueError('Cannot put anything other than Event in queue')
+        payload = pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self._slot_size:
+            raise ValueError(f'event is {len(payload)} bytes, '
+                             f'slot_size is {self._slot_size}')
+        return payload
+
+    def put(self,
+            event: Event,
+            block: bool = False,
+            timeout: t.Optional[float] = None) -> int:
+        """put a new event in ring buffer
+
+        Args:
+            event (Event): New event is put by a producer
+            block (bool, optional): wait for a free slot if the ring is full.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            int: index of event in ring buffer
+
+        Raises:
+            RingFullError: Ring is full
+            ValueError: event does not fit in a slot
+        """
+        sequence, _ = self._put_payloads([self._serialize(event)],
+                                         block, timeout)
+        return sequence % self._size
+
+    def put_bytes(self,
+                  payload: BytesLike,
+                  block: bool = False,
+                  timeout: t.Optional[float] = None) -> int:
+        """put raw bytes without pickling, they are copied once in the
+        slot. Consumers get them as bytes, or as a view with peek_bytes
+
+        Args:
+            payload (BytesLike): the bytes
+            block (bool, optional): see put. Defaults to False.
+            timeout (t.Optional[float], optional): see put.
+                Defaults to None.
+
+        Returns:
+            int: index of the payload in ring buffer
+
+        Raises:
+            RingFullError: Ring is full
+            ValueError: payload does not fit in a slot
+        """
+        if len(payload) > self._slot_size:
+            raise ValueError(f'payload is {len(payload)} bytes, '
+                             f'slot_size is {self._slot_size}')
+        sequence, _ = self._put_payloads([payload], block, timeout, raw=True)
+        return sequence % self._size
+
+    def put_many(self,
+                 events: t.Sequence[Event],
+                 block: bool = False,
+                 timeout: t.Optional[float] = None) -> int:
+        """put a run of events in ring buffer
+
+        Args:
+            events (t.Sequence[Event]): New events are put by a producer
+            block (bool, optional): wait for a free slot if the ring is full.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            int: number of events put, may be less than len(events) if the
+                ring is filled up. The caller should retry the rest
+
+        Raises:
+            RingFullError: Ring is full and no event can be put
+            ValueError: an event does not fit in a slot
+        """
+        if not events:
+            return 0
+        # serialize outside of the lock
+        _, n = self._put_payloads([self._serialize(e) for e in events],
+                                  block, timeout)
+        return n
+
+    def _put_payloads(self,
+                      payloads: t.List[BytesLike],
+                      block: bool,
+                      timeout: t.Optional[float],
+                      raw: bool = False) -> t.Tuple[int, int]:
+        """write serialized events in the free slots
+
+        Args:
+            payloads (t.List[BytesLike]): serialized events
+            block (bool): wait for a free slot if the ring is full
+            timeout (t.Optional[float]): maximum seconds to wait
+            raw (bool, optional): True if payloads are raw bytes.
+                Defaults to False.
+
+        Returns:
+            t.Tuple[int, int]: sequence of the first event and number of
+                events written
+
+        Raises:
+            RingFullError: Ring is full and no event can be put
+        """
+        # one deadline for every retry, another producer may win the race
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._guard:
+                sequence = self._producer_sequence()
+                free = self._size - (sequence - self._committed_sequence())
+                if free > 0:
+                    n = min(free, len(payloads))
+                    for i in range(n):
+                        self._write_slot(sequence + i, payloads[i], raw)
+                    # publish only after the slots are written
+                    _SEQUENCE.pack_into(self._shm.buf,
+                                        _PRODUCER_SEQUENCE_OFFSET,
+                                        sequence + n)
+                    return sequence, n
+            if not block or not poll(lambda: not self.is_full(),
+                                     remaining(deadline)):
+                raise RingFullError('ring is full')
+
+    def _take(self, max_n: t.Optional[int]) -> t.List[t.Tuple[bytes, bool]]:
+        """take up to max_n serialized events out of the ring
+
+        Args:
+            max_n (t.Optional[int]): maximum number of events, None for all
+
+        Returns:
+            t.List[t.Tuple[bytes, bool]]: serialized events in order, and
+                True for raw bytes
+        """
+        with self._guard:
+            sequence = self._consumer_sequence()
+            n = self._producer_sequence() - sequence
+            if max_n is not None:
+                n = min(n, max_n)
+            if n <= 0:
+                return []
+            payloads = [self._read_slot(sequence + i) for i in range(n)]
+            # release the slots only after they are read
+            self._set_consumer_sequence(sequence + n)
+            return payloads
+
+    def get(self,
+            block: bool = False,
+            timeout: t.Optional[float] = None) -> Event:
+        """get the first event in the queue
+
+        Args:
+            block (bool, optional): wait for an event if the ring is empty.
+                Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            Event: The first event
+
+        Raises:
+            RingEmptyError: Ring is Empty
+        """
+        events = self.get_many(1, block, timeout)
+        if not events:
+            raise RingEmptyError('Ring is empty')
+        return events[0]
+
+    def get_many(self,
+                 max_n: t.Optional[int] = None,
+                 block: bool = False,
+                 timeout: t.Optional[float] = None) -> t.List[Event]:
+        """get up to max_n events in one critical section
+
+        Args:
+            max_n (t.Optional[int], optional): maximum number of events.
+                Defaults to None, which takes every available event.
+            block (bool, optional): wait for at least one event if the ring
+                is empty. Defaults to False.
+            timeout (t.Optional[float], optional): maximum seconds to wait
+                when block is True, None waits forever. Defaults to None.
+
+        Returns:
+            t.List[Event]: events in order, empty if the ring is empty
+                or the timeout expired. Raw payloads are bytes
+        """
+        payloads = self._take(max_n)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not payloads and block and \
+                self.wait_not_empty(remaining(deadline)):
+            # another consumer may win the race, wait again
+            payloads = self._take(max_n)
+        # deserialize outside of the lock
+        return [p if raw else pickle.loads(p) for p, raw in payloads]
+
+    def peek_bytes(self) -> t.Optional[memoryview]:
+        """Return the payload of the first slot without copying, the same
+        one until release. Only for a single consumer, without other
+        consumers taking events
+
+        Returns:
+            t.Optional[memoryview]: read only view of the raw bytes, or of
+                the pickled event, None if the ring is empty
+        """
+        sequence = self._consumer_sequence()
+        if sequence == self._producer_sequence():
+            return None
+        view, _ = self._slot(sequence)
+        return view.toreadonly()
+
+    def release(self):
+        """Give the slot returned by peek_bytes back to the producers,
+        views of it must not be used after that"""
+        sequence = self._consumer_sequence()
+        if sequence == self._producer_sequence():
+            return
+        self._set_consumer_sequence(sequence + 1)
+
+    def drain_into(self, events: t.List[Event]) -> int:
+        """move every available event to the end of a list
+
+        Args:
+            events (t.List[Event]): list which receives the events
+
+        Returns:
+            int: number of events moved
+        """
+        taken = self.get_many()
+        events.extend(taken)
+        return len(taken)
+
+    def close(self):
+        """Detach this process from the shared memory"""
+        self._shm.close()
+
+    def shutdown(self):
+        """Release the shared memory after use, call it from the creator
+        """
+        self._shm.close()
+        self._shm.unlink()
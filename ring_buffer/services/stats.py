@@ -0,0 +1,360 @@
+"""Statistics of a RingBuffer
+"""
+import collections
+import dataclasses
+import heapq
+import itertools
+import time
+import typing as t
+
+# linear sub-buckets per power of two, the relative error of a recorded
+# value is at most 1 / _SUB_BUCKET_COUNT
+_SUB_BUCKET_BITS = 3
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_BUCKET_COUNT = (64 - _SUB_BUCKET_BITS) * _SUB_BUCKET_COUNT
+# event_type recorded for the timed calls of payloads without one, such
+# as the ArenaBlocks of put_bytes
+RAW_EVENT_TYPE = '<raw>'
+
+
+def _bucket_index(value: int) -> int:
+    """Return the bucket of a value
+
+    Args:
+        value (int): non negative value
+
+    Returns:
+        int: index of the bucket
+    """
+    if value < 2 * _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS - 1
+    return (shift + 1) * _SUB_BUCKET_COUNT + \
+        (value >> shift) - _SUB_BUCKET_COUNT
+
+
+def _bucket_highest_value(index: int) -> int:
+    """Return the highest value counted in a bucket
+
+    Args:
+        index (int): index of the bucket
+
+    Returns:
+        int: highest value of the bucket
+    """
+    if index < 2 * _SUB_BUCKET_COUNT:
+        return index
+    shift = index // _SUB_BUCKET_COUNT - 1
+    lowest = (index % _SUB_BUCKET_COUNT + _SUB_BUCKET_COUNT) << shift
+    return lowest + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """HDR-style histogram of non negative integers, usually nanoseconds.
+    Buckets are linear inside each power of two, so recording is O(1) and
+    memory is fixed whatever the range of values"""
+
+    def __init__(self):
+        """Init an empty LatencyHistogram"""
+        self._counts: t.List[int] = [0] * _BUCKET_COUNT
+        self._count: int = 0
+        self._total: int = 0
+        self._min: int = 0
+        self._max: int = 0
+
+    @property
+    def count(self) -> int:
+        """Number of recorded values"""
+        return self._count
+
+    def record(self, value: int):
+        """Record a value
+
+        Args:
+            value (int): non negative value, negative values count as 0
+        """
+        value = max(int(value), 0)
+        self._counts[_bucket_index(value)] += 1
+        if self._count == 0 or value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+        self._count += 1
+        self._total += value
+
+    def percentile(self, percent: float) -> int:
+        """Return the value below which percent of the values fall
+
+        Args:
+            percent (float): between 0 and 100
+
+        Returns:
+            int: highest value of the bucket of the percentile, 0 if
+                nothing is recorded
+        """
+        if self._count == 0:
+            return 0
+        rank = max(1, int(self._count * percent / 100 + 0.5))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_highest_value(index), self._max)
+        return self._max
+
+    def snapshot(self) -> t.Dict[str, float]:
+        """Return count, min, max, mean and usual percentiles
+
+        Returns:
+            t.Dict[str, float]: summary of the histogram
+        """
+        return {
+            'count': self._count,
+            'min': self._min,
+            'max': self._max,
+            'mean': self._total / self._count if self._count else 0.0,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+        }
+
+
+@dataclasses.dataclass
+class RingStats:
+    """Snapshot of the statistics of a ring"""
+    size: int
+    occupancy: int
+    high_water_mark: int
+    total_puts: int
+    total_gets: int
+    full_rejections: int
+    # get calls which raised RingEmptyError, an empty get_many is not
+    # counted since consumers poll with it
+    empty_rejections: int
+    dropped: int
+    # put-to-get latency in nanoseconds of sampled events
+    latency: t.Optional[t.Dict[str, float]] = None
+
+
+@dataclasses.dataclass
+class WorkerMetrics:
+    """Snapshot of the counters of a worker of a ConsumerGroup"""
+    name: str
+    events: int
+    batches: int
+    # seconds spent in the callback
+    busy_seconds: float
+    # polls which found the ring empty
+    idle_polls: int
+    # events the worker claims in its next get_many
+    claim: int
+
+
+@dataclasses.dataclass
+class StageMetrics:
+    """Snapshot of the counters of a stage of a Pipeline"""
+    name: str
+    # events handled since the pipeline started
+    events: int
+    # events handled per second since the last snapshot
+    events_per_second: float
+    # events put in the ring and not handled by the stage yet
+    lag: int
+
+
+@dataclasses.dataclass
+class PoolMetrics:
+    """Snapshot of the counters of an AutoscalingPool"""
+    consumers: int
+    # events in the ring not taken by a consumer yet
+    lag: int
+    # lag divided by the size of the ring
+    occupancy: float
+    scale_ups: int
+    scale_downs: int
+    # consumers consumer_factory failed to make, see AutoscalingPool
+    failed_scale_ups: int
+
+
+@dataclasses.dataclass
+class ConsumerMetrics:
+    """Snapshot of the metrics of a Consumer"""
+    name: str
+    # events handled since the consumer was created
+    events: int
+    # events handled per second since the last snapshot
+    events_per_second: float
+    # events in the ring not taken by the consumer yet
+    lag: int
+    # duration in nanoseconds of sampled callback calls
+    callback_time: t.Dict[str, float]
+    # (duration in nanoseconds, event_type) of the slowest sampled calls,
+    # slowest first, RAW_EVENT_TYPE for payloads without event_type
+    slowest: t.List[t.Tuple[int, str]]
+
+
+class ConsumerStats:
+    """Counters of a Consumer, only written by the consumer thread. One
+    callback call every sample_every is timed, so timing costs a small
+    fraction of the calls"""
+
+    def __init__(self, sample_every: int = 64, slowest_n: int = 10):
+        """Init ConsumerStats
+
+        Args:
+            sample_every (int, optional): time one callback call every
+                this number of calls. Defaults to 64.
+            slowest_n (int, optional): number of slowest calls to keep.
+                Defaults to 10.
+        """
+        if sample_every <= 0:
+            raise ValueError('sample_every must be greater than 0')
+        self.sample_every = sample_every
+        # calls before the next timed one
+        self.until_sample: int = sample_every - 1
+        self.events: int = 0
+        self.callback_time = LatencyHistogram()
+        self._slowest_n = slowest_n
+        # min-heap of (duration, tie breaker, event_type)
+        self._slowest: t.List[t.Tuple[int, int, str]] = []
+        self._tie_breaker = itertools.count()
+        self._last_events: int = 0
+        self._last_time = time.monotonic()
+
+    def on_callback(self, duration: int, event_type: str):
+        """Record a timed callback call
+
+        Args:
+            duration (int): duration in nanoseconds
+            event_type (str): event_type of the event of the call
+        """
+        self.callback_time.record(duration)
+        slowest = self._slowest
+        if len(slowest) < self._slowest_n:
+            heapq.heappush(slowest,
+                           (duration, next(self._tie_breaker), event_type))
+        elif slowest and duration > slowest[0][0]:
+            heapq.heapreplace(slowest,
+                              (duration, next(self._tie_breaker), event_type))
+
+    def snapshot(self, name: str, lag: int) -> ConsumerMetrics:
+        """Build a ConsumerMetrics, the throughput is measured since the
+        previous snapshot
+
+        Args:
+            name (str): name of the consumer
+            lag (int): events in the ring not taken yet
+
+        Returns:
+            ConsumerMetrics: metrics of the consumer
+        """
+        now = time.monotonic()
+        events = self.events
+        elapsed = now - self._last_time
+        events_per_second = (events - self._last_events) / elapsed \
+            if elapsed > 0 else 0.0
+        self._last_events, self._last_time = events, now
+        return ConsumerMetrics(
+            name=name,
+            events=events,
+            events_per_second=events_per_second,
+            lag=lag,
+            callback_time=self.callback_time.snapshot(),
+            slowest=[(duration, event_type) for duration, _, event_type in
+                     sorted(self._slowest, reverse=True)],
+        )
+
+
+class RingBufferStats:
+    """Counters of a RingBuffer, the ring calls them under its lock"""
+
+    def __init__(self, latency_sample_every: int = 0):
+        """Init RingBufferStats
+
+        Args:
+            latency_sample_every (int, optional): measure put-to-get
+                latency of one event every this number of puts, 0 turns
+                latency sampling off. Defaults to 0.
+        """
+        if latency_sample_every < 0:
+            raise ValueError('latency_sample_every cannot be lesser than 0')
+        self.high_water_mark: int = 0
+        self.total_puts: int = 0
+        self.total_gets: int = 0
+        self.full_rejections: int = 0
+        self.empty_rejections: int = 0
+        # events which left the ring, taken or overwritten
+        self._taken: int = 0
+        self._sample_every = latency_sample_every
+        # (put sequence, put time) of sampled events still in the ring
+        self._samples: t.Deque[t.Tuple[int, int]] = collections.deque()
+        self.latency: t.Optional[LatencyHistogram] = \
+            LatencyHistogram() if latency_sample_every else None
+
+    def on_put(self, n: int, occupancy: int):
+        """Count n events put in the ring
+
+        Args:
+            n (int): number of events
+            occupancy (int): number of events in the ring after the put
+        """
+        if self._sample_every:
+            first = self.total_puts
+            # sequence of the first sampled event in [first, first + n)
+            sampled = -(-first // self._sample_every) * self._sample_every
+            if sampled < first + n:
+                now = time.perf_counter_ns()
+                for sequence in range(sampled, first + n,
+                                      self._sample_every):
+                    self._samples.append((sequence, now))
+        self.total_puts += n
+        if occupancy > self.high_water_mark:
+            self.high_water_mark = occupancy
+
+    def on_take(self, n: int, dropped: bool = False):
+        """Count n events leaving the ring
+
+        Args:
+            n (int): number of events
+            dropped (bool, optional): True if the events are overwritten
+                instead of read. Defaults to False.
+        """
+        latency = self.latency
+        self._taken += n
+        if not dropped:
+            self.total_gets += n
+        # samples stay empty when the latency is not sampled
+        samples = self._samples
+        if not samples or samples[0][0] >= self._taken:
+            return
+        now = time.perf_counter_ns()
+        while samples and samples[0][0] < self._taken:
+            _, put_time = samples.popleft()
+            if latency is not None and not dropped:
+                latency.record(now - put_time)
+
+    def snapshot(self,
+                 size: int,
+                 occupancy: int,
+                 dropped: int) -> RingStats:
+        """Build a RingStats
+
+        Args:
+            size (int): size of the ring
+            occupancy (int): number of events in the ring
+            dropped (int): number of dropped events
+
+        Returns:
+            RingStats: statistics of the ring
+        """
+        return RingStats(
+            size=size,
+            occupancy=occupancy,
+            high_water_mark=self.high_water_mark,
+            total_puts=self.total_puts,
+            total_gets=self.total_gets,
+            full_rejections=self.full_rejections,
+            empty_rejections=self.empty_rejections,
+            dropped=dropped,
+            latency=self.latency.snapshot() if self.latency else None,
+        )
@@ -0,0 +1,103 @@
+"""Module for testing asyncio ring buffer and consumer"""
+import asyncio
+import threading
+
+from ring_buffer.model import event
+from ring_buffer.services import async_buffer
+from ring_buffer.services import async_consumer
+
+
+def test_async_ring_buffer_iteration():
+    async def _run():
+        ring = async_buffer.AsyncRingBuffer(4)
+        received = []
+
+        async def _read():
+            async for e in ring:
+                received.append(e.data)
+
+        reader = asyncio.ensure_future(_read())
+        # more events than slots, put waits for the reader
+        await ring.put_many([event.Event('test', i) for i in range(10)])
+        ring.close()
+        await asyncio.wait_for(reader, 5)
+        return received
+
+    assert asyncio.run(_run()) == list(range(10))
+
+
+def test_async_ring_buffer_rejects_non_events():
+    ring = async_buffer.AsyncRingBuffer(4)
+    try:
+        ring.put_many_nowait([event.Event('test', 0), None])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('put_many_nowait must reject non Event items')
+    assert ring.is_empty()
+
+
+def test_async_consumer_fed_by_threads():
+    async def _run():
+        ring = async_buffer.AsyncRingBuffer(8, asyncio.get_running_loop())
+        _consumer = async_consumer.AsyncConsumer('test', ring, concurrency=4)
+        received = []
+        running = [0, 0]
+
+        async def _callback(e: event.Event):
+            running[0] += 1
+            running[1] = max(running)
+            await asyncio.sleep(0.001)
+            received.append(e.data)
+            running[0] -= 1
+
+        def _produce(start: int):
+            for i in range(start, start + 50, 10):
+                batch = [event.Event('test', j) for j in range(i, i + 10)]
+                ring.put_threadsafe(batch).result(timeout=5)
+
+        _consumer.register_callback(_callback)
+        task = _consumer.start()
+        threads = [threading.Thread(target=_produce, args=(start,))
+                   for start in (0, 50)]
+        for thread in threads:
+            thread.start()
+        while len(received) < 100:
+            await asyncio.sleep(0.01)
+        for thread in threads:
+            thread.join()
+        ring.close()
+        await asyncio.wait_for(task, 5)
+        return received, running[1]
+
+    received, max_running = asyncio.run(_run())
+    assert sorted(received) == list(range(100))
+    assert 1 < max_running <= 4
+
+
+def test_async_consumer_stop_dispatches_taken_events():
+    async def _run():
+        ring = async_buffer.AsyncRingBuffer(8)
+        _consumer = async_consumer.AsyncConsumer('test', ring, concurrency=1)
+        received = []
+        gate = asyncio.Event()
+
+        async def _callback(e: event.Event):
+            await gate.wait()
+            received.append(e.data)
+
+        _consumer.register_callback(_callback)
+        ring.put_many_nowait([event.Event('test', i) for i in range(5)])
+        task = _consumer.start()
+        # the batch is taken, the consumer waits for the first callback
+        while not _consumer.is_running() or not ring.is_empty():
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.01)
+        _consumer.stop()
+        gate.set()
+        await asyncio.wait_for(_consumer.join(), 5)
+        return received, task.cancelled()
+
+    received, cancelled = asyncio.run(_run())
+    assert received == list(range(5))
+    assert cancelled
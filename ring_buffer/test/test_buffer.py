@@ -1,4 +1,8 @@
 """Module for testing ring buffer"""
+import threading
+import time
+
+from ring_buffer.services import arena
 from ring_buffer.services import buffer
 from ring_buffer.model import event
 
@@ -31,3 +35,191 @@ def test_ring_is_full():
     ring.get()
     assert ring.qsize() == 0
     assert ring.is_empty() is True
+
+
+def test_put_many_get_many_wrap_around():
+    ring = create_test_ring_buffer()
+    for i in range(7):
+        ring.put(event.Event('test', i))
+    assert [e.data for e in ring.get_many(5)] == [0, 1, 2, 3, 4]
+
+    # 3 slots left at the end of the list, the rest wraps to the front
+    put_count = ring.put_many([event.Event('test', i) for i in range(7, 20)])
+    assert put_count == 8
+    assert ring.is_full() is True
+    assert ring.qsize() == 10
+
+    drained = []
+    assert ring.drain_into(drained) == 10
+    assert [e.data for e in drained] == list(range(5, 15))
+    assert ring.is_empty() is True
+    assert ring.get_many() == []
+    assert ring.count_none_pointer() == 10
+
+
+def test_put_many_full_ring():
+    ring = create_test_ring_buffer()
+    ring.put_many([event.Event('test', i) for i in range(10)])
+    try:
+        ring.put_many([event.Event('test', 10)])
+    except buffer.RingFullError:
+        pass
+    else:
+        raise AssertionError('put_many on a full ring must raise')
+
+
+def test_put_many_rejects_non_events():
+    for ring in (create_test_ring_buffer(), buffer.SPSCRingBuffer(8)):
+        try:
+            ring.put_many([event.Event('test', 0), None])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('put_many of a None must raise')
+        assert ring.is_empty() is True
+
+
+def test_spsc_ring_buffer():
+    ring = buffer.SPSCRingBuffer(8)
+    assert ring.is_empty() is True
+    for i in range(6):
+        ring.put(event.Event('test', i))
+    assert ring.get().data == 0
+    assert [e.data for e in ring.get_many(3)] == [1, 2, 3]
+    assert ring.put_many([event.Event('test', i) for i in range(6, 20)]) == 6
+    assert ring.is_full() is True
+    assert ring.qsize() == 8
+    assert [e.data for e in ring.get_many()] == list(range(4, 12))
+    assert ring.is_empty() is True
+
+
+def test_spsc_ring_buffer_size_power_of_two():
+    try:
+        buffer.SPSCRingBuffer(10)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('size 10 must be rejected')
+
+
+def test_blocking_get_is_woken_by_put():
+    ring = create_test_ring_buffer()
+    received = []
+    consumer_thread = threading.Thread(
+        target=lambda: received.append(ring.get(block=True, timeout=5)))
+    consumer_thread.start()
+    time.sleep(0.05)
+    ring.put(event.Event('test', 'wake up'))
+    consumer_thread.join(timeout=5)
+    assert [e.data for e in received] == ['wake up']
+
+
+def test_blocking_put_timeout():
+    ring = create_test_ring_buffer()
+    ring.put_many([event.Event('test', i) for i in range(10)])
+    start = time.monotonic()
+    try:
+        ring.put(event.Event('test', 10), block=True, timeout=0.05)
+    except buffer.RingFullError:
+        pass
+    else:
+        raise AssertionError('put on a full ring must time out')
+    assert time.monotonic() - start >= 0.05
+    assert ring.get_many(block=True, timeout=0.01)[0].data == 0
+    assert ring.put(event.Event('test', 10), block=True, timeout=0.05) == 0
+
+
+def test_overflow_policy_overwrite_oldest():
+    ring = buffer.RingBuffer(4, overflow_policy='overwrite_oldest')
+    for i in range(6):
+        assert ring.put(event.Event('test', i)) != -1
+    assert ring.dropped_count == 2
+    assert ring.put_many([event.Event('test', i) for i in range(6, 13)]) == 4
+    assert ring.dropped_count == 9
+    assert [e.data for e in ring.get_many()] == [9, 10, 11, 12]
+
+
+def test_overflow_policy_drop_newest():
+    ring = buffer.RingBuffer(
+        4, overflow_policy=buffer.OverflowPolicy.DROP_NEWEST)
+    assert ring.put_many([event.Event('test', i) for i in range(3)]) == 3
+    assert ring.put_many([event.Event('test', i) for i in range(3, 6)]) == 1
+    assert ring.put(event.Event('test', 6)) == -1
+    assert ring.dropped_count == 3
+    assert [e.data for e in ring.get_many()] == [0, 1, 2, 3]
+
+
+def test_overflow_policy_block():
+    ring = buffer.RingBuffer(2, overflow_policy='block')
+    ring.put_many([event.Event('test', i) for i in range(2)])
+    timer = threading.Timer(0.05, ring.get)
+    timer.start()
+    assert ring.put(event.Event('test', 2), timeout=5) == 0
+    timer.join()
+    try:
+        ring.put(event.Event('test', 3), block=False)
+    except buffer.RingFullError:
+        pass
+    else:
+        raise AssertionError('put with block=False must raise')
+
+
+def test_ring_stats():
+    assert create_test_ring_buffer().stats() is None
+
+    ring = buffer.RingBuffer(4, enable_stats=True, latency_sample_every=2)
+    ring.put_many([event.Event('test', i) for i in range(3)])
+    ring.get()
+    ring.put_many([event.Event('test', i) for i in range(3, 6)])
+    try:
+        ring.put(event.Event('test', 6))
+    except buffer.RingFullError:
+        pass
+    assert ring.get_many() != []
+    # an idle poll is not a rejection
+    assert ring.get_many() == []
+    try:
+        ring.get()
+    except buffer.RingEmptyError:
+        pass
+    else:
+        raise AssertionError('get on an empty ring must raise')
+
+    stats = ring.stats()
+    assert stats.size == 4
+    assert stats.occupancy == 0
+    assert stats.high_water_mark == 4
+    assert stats.total_puts == 5
+    assert stats.total_gets == 5
+    assert stats.full_rejections == 1
+    assert stats.empty_rejections == 1
+    # events 0, 2 and 4 are sampled
+    assert stats.latency['count'] == 3
+    assert stats.latency['p50'] <= stats.latency['max']
+
+
+def test_put_bytes_through_arena():
+    _arena = arena.ByteArena(((16, 2), (64, 1)))
+    _ring = buffer.RingBuffer(2, buffer.OverflowPolicy.OVERWRITE_OLDEST,
+                              arena=_arena)
+    # filled in place, such as with recv_into
+    _block = _arena.alloc(64)
+    _block.view[:5] = b'hello'
+    _block.set_length(5)
+    _ring.put_bytes(_block)
+    _ring.put_bytes(b'world')
+    assert _arena.free_blocks() == {16: 1, 64: 0}
+    # overwrites the oldest payload, its block goes back to the arena
+    _ring.put_bytes(b'!')
+    assert _arena.free_blocks() == {16: 0, 64: 1}
+    blocks = _ring.get_many()
+    assert [bytes(b.view) for b in blocks] == [b'world', b'!']
+    for b in blocks:
+        b.release()
+    assert _arena.free_blocks() == {16: 2, 64: 1}
+    try:
+        blocks[0].release()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
@@ -0,0 +1,122 @@
+"""Module for testing consumer checkpoints"""
+import time
+
+from ring_buffer.model import event
+from ring_buffer.services import buffer
+from ring_buffer.services import checkpoint
+from ring_buffer.services import consumer
+from ring_buffer.services import journal
+from ring_buffer.services import shared_ring_buffer as srb
+
+
+def test_checkpoint_commits_in_batches(tmp_path):
+    path = str(tmp_path / 'checkpoint')
+    _checkpoint = checkpoint.Checkpoint(path, commit_every=4,
+                                        commit_interval_ms=10**6)
+    assert _checkpoint.committed_sequence is None
+    _checkpoint.seek(10)
+    assert _checkpoint.advance(3) is False
+    assert _checkpoint.committed_sequence is None
+    assert _checkpoint.advance(1) is True
+    assert _checkpoint.committed_sequence == 14
+    _checkpoint.advance(2)
+    assert _checkpoint.position == 16
+    _checkpoint.close()
+
+    # restart, close committed the position
+    _checkpoint = checkpoint.Checkpoint(path, commit_interval_ms=0)
+    assert _checkpoint.committed_sequence == 16
+    assert _checkpoint.advance(1) is True
+    _checkpoint.close()
+
+    # a torn write fails its crc32
+    with open(path, 'r+b') as f:
+        f.write(b'\xff')
+    assert checkpoint.Checkpoint(path).committed_sequence is None
+
+
+def test_checkpoint_of_an_empty_file(tmp_path):
+    # created but not extended yet when the process died
+    path = tmp_path / 'checkpoint'
+    path.write_bytes(b'')
+    _checkpoint = checkpoint.Checkpoint(str(path))
+    assert _checkpoint.committed_sequence is None
+    _checkpoint.seek(3)
+    _checkpoint.close()
+    assert checkpoint.Checkpoint(str(path)).committed_sequence == 3
+
+
+def _consume(ring, _checkpoint: checkpoint.Checkpoint, n: int) -> list:
+    handled = []
+    _consumer = consumer.Consumer('test', ring)
+    _consumer.register_callback(lambda e: handled.append(e.data))
+    _consumer.set_checkpoint(_checkpoint)
+    _consumer.start()
+    deadline = time.monotonic() + 5
+    while len(handled) < n and time.monotonic() < deadline:
+        time.sleep(0.001)
+    _consumer.stop()
+    _consumer.join()
+    return handled
+
+
+def test_consumer_resumes_from_journal(tmp_path):
+    _journal = journal.Journal(str(tmp_path / 'journal'))
+    ring = buffer.RingBuffer(16, journal=_journal, journal_auto_commit=False)
+    ring.put_many([event.Event('test', i) for i in range(10)])
+    # the process died after handling 6 events, the ring committed only
+    # the first 4 of them
+    ring.get_many(6)
+    ring.commit(4)
+    _checkpoint = checkpoint.Checkpoint(str(tmp_path / 'checkpoint'))
+    _checkpoint.seek(6)
+    _checkpoint.commit()
+    _journal.close()
+
+    _journal = journal.Journal(str(tmp_path / 'journal'))
+    ring = buffer.RingBuffer(16, journal=_journal, journal_auto_commit=False)
+    assert ring.sequence == 4 and ring.qsize() == 6
+    assert _consume(ring, _checkpoint, 4) == [6, 7, 8, 9]
+    assert _checkpoint.committed_sequence == 10
+    assert _journal.committed_sequence == 10
+    _journal.close()
+
+    try:
+        buffer.RingBuffer(4).seek(0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('seek without journal must raise')
+
+
+def test_consumer_resumes_from_shared_ring(tmp_path):
+    ring = srb.SharedRingBuffer(size=4, slot_size=128, create=True,
+                                auto_commit=False)
+    try:
+        ring.put_many([event.Event('test', i) for i in range(4)])
+        assert len(ring.get_many()) == 4
+        # taken but not committed, the slots are not free
+        try:
+            ring.put(event.Event('test', 4))
+        except buffer.RingFullError:
+            pass
+        else:
+            raise AssertionError('uncommitted slots must not be reused')
+        ring.commit(1)
+        ring.put(event.Event('test', 4))
+        try:
+            ring.seek(0)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('seek before the committed sequence')
+
+        _checkpoint = checkpoint.Checkpoint(str(tmp_path / 'checkpoint'))
+        _checkpoint.seek(2)
+        _checkpoint.commit()
+        assert _consume(ring, _checkpoint, 3) == [2, 3, 4]
+        assert _checkpoint.committed_sequence == 5
+        assert ring.sequence == 5 and ring.is_empty()
+        assert ring.put_many([event.Event('test', i) for i in range(4)]) == 4
+    finally:
+        ring.shutdown()
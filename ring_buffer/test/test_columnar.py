@@ -0,0 +1,69 @@
+"""Module for testing columnar ring buffer"""
+import time
+
+import pytest
+
+from ring_buffer.services import buffer
+from ring_buffer.services import columnar
+from ring_buffer.services import consumer
+
+np = pytest.importorskip('numpy')
+
+_TRADE = [('id', 'i8'), ('symbol', 'S8'), ('qty', 'i8'), ('price', 'f8')]
+
+
+def test_put_many_get_batch_zero_copy():
+    ring = columnar.ColumnarRingBuffer(_TRADE, 8)
+    trades = np.zeros(6, dtype=_TRADE)
+    trades['id'] = np.arange(6)
+    trades['qty'] = np.arange(6) * 10
+    assert ring.put_many(trades) == 6
+    batch = ring.get_batch()
+    assert batch['qty'].sum() == 150
+    assert np.shares_memory(batch, ring._ring)
+    ring.release()
+
+    # 2 records left at the end of the array, the rest wraps to the front
+    assert ring.put_many([(i, b'stock', i * 10, 2.0)
+                          for i in range(6, 20)]) == 8
+    try:
+        ring.put((20, b'stock', 200, 2.0))
+    except buffer.RingFullError:
+        pass
+    else:
+        raise AssertionError('put on a full ring must raise')
+    assert list(ring.get_batch()['id']) == [6, 7]
+    assert list(ring.get_batch()['id']) == list(range(8, 14))
+    assert ring.is_empty() is True
+
+
+def test_consumer_over_columnar_ring():
+    ring = columnar.ColumnarRingBuffer(_TRADE, 8)
+    qty = []
+    _consumer = consumer.Consumer('test', ring)
+    _consumer.register_callback(lambda record: qty.append(int(record['qty'])))
+    _consumer.start()
+    for i in range(20):
+        ring.put((i, b'stock', i, 1.0), block=True, timeout=5)
+    deadline = time.monotonic() + 5
+    while len(qty) < 20 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    _consumer.stop()
+    _consumer.join()
+    assert qty == list(range(20))
+
+    # records of a batch stay valid while the consumer lingers
+    batches = []
+    _consumer = consumer.Consumer('test', ring)
+    _consumer.register_batch_callback(
+        lambda records: batches.append([int(r['id']) for r in records]),
+        max_batch=16, max_linger_ms=20)
+    _consumer.start()
+    for i in range(16):
+        ring.put((i, b'stock', i, 1.0), block=True, timeout=5)
+    deadline = time.monotonic() + 5
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.001)
+    _consumer.stop()
+    _consumer.join()
+    assert [i for batch in batches for i in batch] == list(range(16))
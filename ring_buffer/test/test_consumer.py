@@ -1,8 +1,12 @@
 import typing as t
 import json
+import threading
+import time
 
+from ring_buffer.services import arena
 from ring_buffer.services import buffer
 from ring_buffer.services import consumer
+from ring_buffer.services import stats
 from ring_buffer.model import event
 
 
@@ -38,3 +42,217 @@ def test_consumer():
     _ring = buffer.RingBuffer(100)
     _consumer = consumer.Consumer('test', _ring)
     total_quantity = 0
+
+
+def _consume_with_wait_strategy(wait_strategy: consumer.WaitStrategy,
+                                n: int = 200) -> t.List[event.Event]:
+    _ring = buffer.RingBuffer(16)
+    _consumer = consumer.Consumer('test', _ring, wait_strategy)
+    received: t.List[t.Any] = []
+    _consumer.register_callback(received.append)
+    _consumer.start()
+    for i in range(n):
+        _ring.put(event.Event('test', i), block=True, timeout=5)
+    deadline = time.monotonic() + 5
+    while len(received) < n and time.monotonic() < deadline:
+        time.sleep(0.001)
+    _consumer.stop()
+    return received
+
+
+def test_consumer_wait_strategies():
+    for wait_strategy in (consumer.BusySpinWaitStrategy(),
+                          consumer.YieldingWaitStrategy(spin_tries=10),
+                          consumer.SleepingWaitStrategy(0.0001, 0.001),
+                          consumer.BlockingWaitStrategy(timeout=0.01)):
+        received = _consume_with_wait_strategy(wait_strategy)
+        assert [e.data for e in received] == list(range(200)), wait_strategy
+
+
+def test_consumer_batch_callback():
+    _ring = buffer.RingBuffer(64)
+    _consumer = consumer.Consumer('test', _ring)
+    batches = []
+    _consumer.register_batch_callback(batches.append, max_batch=10,
+                                      max_linger_ms=20)
+    _consumer.start()
+    _ring.put_many([event.Event('test', i) for i in range(25)])
+    # 2 full batches at once, the last 5 events after the linger time
+    deadline = time.monotonic() + 5
+    while sum(len(b) for b in batches) < 25 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    _consumer.stop()
+    _consumer.join()
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [e.data for b in batches for e in b] == list(range(25))
+
+
+def test_consumer_group():
+    _ring = buffer.RingBuffer(256)
+    group = consumer.ConsumerGroup('test', _ring, workers=3,
+                                   wait_strategy=consumer.
+                                   BlockingWaitStrategy(timeout=0.01),
+                                   max_claim=16)
+    received = []
+    lock = threading.Lock()
+
+    def on_event(e: event.Event):
+        with lock:
+            received.append(e.data)
+        # release the GIL like an I/O callback
+        time.sleep(0.0001)
+
+    group.register_callback(on_event)
+    group.start()
+    n = 1000
+    events = [event.Event('test', i) for i in range(n)]
+    while events:
+        events = events[_ring.put_many(events, block=True, timeout=5):]
+    deadline = time.monotonic() + 10
+    while len(received) < n and time.monotonic() < deadline:
+        time.sleep(0.001)
+    group.stop()
+    group.join()
+    assert sorted(received) == list(range(n))
+    metrics = group.metrics()
+    assert [m.name for m in metrics] == ['test-0', 'test-1', 'test-2']
+    assert sum(m.events for m in metrics) == n
+    # every worker took part
+    assert all(m.events > 0 for m in metrics)
+    assert all(1 <= m.claim <= 16 for m in metrics)
+
+
+def test_consumer_group_batch_callback():
+    _ring = buffer.RingBuffer(256)
+    group = consumer.ConsumerGroup('test', _ring, workers=2, max_claim=64)
+    batches = []
+    lock = threading.Lock()
+
+    def on_batch(events):
+        with lock:
+            batches.append([e.data for e in events])
+
+    # same signature as Consumer.register_batch_callback
+    group.register_batch_callback(on_batch, max_batch=8, max_linger_ms=0)
+    _ring.put_many([event.Event('test', i) for i in range(200)])
+    group.start()
+    deadline = time.monotonic() + 5
+    while sum(map(len, batches)) < 200 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    group.stop()
+    group.join()
+    assert sorted(sum(batches, [])) == list(range(200))
+    assert max(map(len, batches)) <= 8
+
+    try:
+        group.register_batch_callback(on_batch, max_linger_ms=5.0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('a ConsumerGroup cannot linger')
+
+
+def test_consumer_dispatches_by_event_type():
+    _ring = buffer.RingBuffer(64)
+    _consumer = consumer.Consumer('test', _ring)
+    orders, fills, others = [], [], []
+    _consumer.register_handler('order', orders.append)
+    _consumer.register_handler('fill', fills.extend, batch=True)
+    _consumer.register_fallback_handler(others.append)
+    _consumer.start()
+    _ring.put_many([event.Event(event_type, i) for i, event_type in
+                    enumerate(['order', 'fill', 'cancel', 'order'] * 5)])
+    deadline = time.monotonic() + 5
+    while len(orders) + len(fills) + len(others) < 20 and \
+            time.monotonic() < deadline:
+        time.sleep(0.001)
+    _consumer.stop()
+    _consumer.join()
+    # order is kept inside each event type
+    assert [e.data for e in orders] == \
+        [i for i in range(20) if i % 4 in (0, 3)]
+    assert [e.data for e in fills] == list(range(1, 20, 4))
+    assert [e.data for e in others] == list(range(2, 20, 4))
+
+
+def test_dispatcher_routes_arena_blocks_to_fallback():
+    _ring = buffer.RingBuffer(8, arena=arena.ByteArena(((16, 4),)))
+    _ring.put(event.Event('order', 0))
+    _ring.put_bytes(b'raw')
+    _ring.put(event.Event('order', 1))
+    items = _ring.get_many()
+    dispatcher = consumer.EventDispatcher()
+    orders, raw = [], []
+    dispatcher.register('order', orders.append)
+    # an ArenaBlock has no event_type
+    dispatcher(items)
+    assert [e.data for e in orders] == [0, 1]
+    assert dispatcher.unhandled == 1
+
+    dispatcher.register_fallback(raw.append)
+    dispatcher(items)
+    assert [bytes(b.view) for b in raw] == [b'raw']
+
+    dispatcher.register('order', orders.extend, batch=True)
+    dispatcher(items)
+    assert len(orders) == 6
+    assert len(raw) == 2 and raw[1] is raw[0]
+    raw[0].release()
+
+
+def test_consumer_metrics():
+    _ring = buffer.RingBuffer(64)
+    _consumer = consumer.Consumer('test', _ring, enable_metrics=True,
+                                  metrics_sample_every=2,
+                                  slowest_callbacks=2)
+    reports = []
+    _consumer.set_reporter(reports.append, interval=0.01)
+
+    def on_event(e: event.Event):
+        if e.event_type == 'slow':
+            time.sleep(0.01)
+
+    _consumer.register_callback(on_event)
+    assert consumer.Consumer('test', _ring).metrics() is None
+    _ring.put_many([event.Event('fast', i) for i in range(7)] +
+                   [event.Event('slow', 7)])
+    _consumer.start()
+    deadline = time.monotonic() + 5
+    while (_consumer.metrics().events < 8 or not reports) and \
+            time.monotonic() < deadline:
+        time.sleep(0.001)
+    _consumer.stop()
+    _consumer.join()
+    metrics = _consumer.metrics()
+    assert metrics.name == 'test'
+    assert metrics.events == 8
+    assert metrics.lag == 0
+    # one call every 2 is timed, the slow event is the 8th call
+    assert metrics.callback_time['count'] == 4
+    assert [event_type for _, event_type in metrics.slowest] == \
+        ['slow', 'fast']
+    assert metrics.slowest[0][0] >= 10**7
+    assert reports and reports[-1].name == 'test'
+
+
+def test_consumer_metrics_of_arena_blocks():
+    _ring = buffer.RingBuffer(8, arena=arena.ByteArena(((16, 4),)))
+    _consumer = consumer.Consumer('test', _ring, enable_metrics=True,
+                                  metrics_sample_every=1)
+    payloads = []
+
+    def on_payload(block):
+        payloads.append(bytes(block.view))
+        block.release()
+
+    _consumer.register_callback(on_payload)
+    _ring.put_bytes(b'raw')
+    _consumer.start()
+    deadline = time.monotonic() + 5
+    while not payloads and time.monotonic() < deadline:
+        time.sleep(0.001)
+    _consumer.stop()
+    _consumer.join()
+    assert payloads == [b'raw']
+    assert [event_type for _, event_type in _consumer.metrics().slowest] == \
+        [stats.RAW_EVENT_TYPE]
@@ -0,0 +1,32 @@
+"""Module for testing event models"""
+import pickle
+
+from ring_buffer.model import event
+from ring_buffer.services import buffer
+
+
+def test_event_has_no_dict():
+    e = event.Event('test', {'qty': 1})
+    assert not hasattr(e, '__dict__')
+    assert e == event.Event('test', {'qty': 1}, '')
+    assert pickle.loads(pickle.dumps(e)) == e
+
+
+def test_binary_event_pack_unpack():
+    e = event.BinaryEvent('trade', '{"qty": 10}', sid='AAA')
+    assert isinstance(e, event.Event)
+    assert e.data == b'{"qty": 10}'
+    assert e.sid == b'AAA'
+    assert e.event_type is event.BinaryEvent('trade', b'').event_type
+    assert event.BinaryEvent.unpack(e.pack()) == e
+
+    ring = buffer.RingBuffer(2)
+    ring.put(e)
+    assert ring.get() is e
+    assert pickle.loads(pickle.dumps(e)).type_id == e.type_id
+    try:
+        event.BinaryEvent('trade', b'', sid=b'x' * 2**16)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('sid longer than 65535 bytes must raise')
@@ -0,0 +1,131 @@
+"""Module for testing the journal of ring buffer"""
+import os
+
+from ring_buffer.model import event
+from ring_buffer.services import buffer
+from ring_buffer.services import journal
+
+
+def _segment_files(directory) -> list:
+    return sorted(f for f in os.listdir(directory) if f.endswith('.journal'))
+
+
+def test_ring_buffer_replays_unconsumed_events(tmp_path):
+    _journal = journal.Journal(str(tmp_path))
+    ring = buffer.RingBuffer(8, journal=_journal, journal_commit_every=1)
+    ring.put_many([event.Event('test', i) for i in range(5)])
+    ring.put(event.Event('test', 5))
+    assert [e.data for e in ring.get_many(2)] == [0, 1]
+    _journal.close()
+
+    # restart
+    _journal = journal.Journal(str(tmp_path))
+    assert _journal.committed_sequence == 2
+    assert _journal.next_sequence == 6
+    ring = buffer.RingBuffer(8, journal=_journal)
+    assert ring.qsize() == 4
+    ring.put(event.Event('test', 6))
+    assert [e.data for e in ring.get_many()] == [2, 3, 4, 5, 6]
+    _journal.close()
+
+
+def test_manual_commit(tmp_path):
+    _journal = journal.Journal(str(tmp_path))
+    ring = buffer.RingBuffer(8, journal=_journal, journal_auto_commit=False)
+    ring.put_many([event.Event('test', i) for i in range(3)])
+    ring.get_many()
+    assert _journal.committed_sequence == 0
+    ring.commit(1)
+    assert _journal.committed_sequence == 1
+    ring.commit()
+    assert _journal.committed_sequence == 3
+    _journal.close()
+
+
+def test_auto_commit_is_batched(tmp_path):
+    _journal = journal.Journal(str(tmp_path))
+    ring = buffer.RingBuffer(8, journal=_journal, journal_commit_every=4)
+    ring.put_many([event.Event('test', i) for i in range(6)])
+    ring.get()
+    ring.get_many(2)
+    assert _journal.committed_sequence == 0
+    ring.get()
+    assert _journal.committed_sequence == 4
+    ring.get()
+    # commit flushes the batch
+    ring.commit()
+    assert _journal.committed_sequence == 5
+    _journal.close()
+
+    try:
+        buffer.RingBuffer(8, journal_commit_every=0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('journal_commit_every must be positive')
+
+
+def test_segment_rotation(tmp_path):
+    _journal = journal.Journal(str(tmp_path), segment_size=256,
+                               sync_every=4)
+    for i in range(20):
+        _journal.append(event.Event('test', i))
+    assert len(_segment_files(tmp_path)) > 2
+    assert [e.data for _, e in _journal.replay(15)] == list(range(15, 20))
+
+    _journal.commit(19)
+    # only the segment of the last event is kept
+    assert len(_segment_files(tmp_path)) == 1
+    assert [s for s, _ in _journal.replay()] == [19]
+    _journal.close()
+
+    _journal = journal.Journal(str(tmp_path), segment_size=256)
+    assert _journal.next_sequence == 20
+    assert [e.data for _, e in _journal.replay()] == [19]
+    _journal.close()
+
+
+def test_batch_is_split_across_segments(tmp_path):
+    _journal = journal.Journal(str(tmp_path), segment_size=1024)
+    assert _journal.append_many(
+        [event.Event('test', f'{i:050d}', str(i)) for i in range(100)]) == 0
+    assert len(_segment_files(tmp_path)) > 1
+    assert _journal.next_sequence == 100
+    assert [e.sid for _, e in _journal.replay(42)] == \
+        [str(i) for i in range(42, 100)]
+    _journal.close()
+
+    _journal = journal.Journal(str(tmp_path), segment_size=1024)
+    assert _journal.next_sequence == 100
+    assert len(list(_journal.replay())) == 100
+    _journal.close()
+
+
+def test_replayed_events_keep_their_fields(tmp_path):
+    batches = [
+        [event.Event('test', b'raw', b'sid')],
+        [event.Event('test', 'café\ud800', 'sid')],
+        [event.Event('test', -2**63)],
+        [event.Event('test', 2**64)],
+        [event.Event('test', True)],
+        [event.Event('test', {'a': [1]})],
+        [event.Event('test', i, 'sid') for i in range(3)],
+        [event.Event('test', 1), event.Event('other', 2, 'sid')],
+        [event.Event('t' * 2**16, 1)],
+        [event.BinaryEvent('test', b'binary', b'sid'),
+         event.Event('test', 1)],
+    ]
+    _journal = journal.Journal(str(tmp_path))
+    ring = buffer.RingBuffer(32, journal=_journal)
+    for batch in batches:
+        ring.put_many(batch)
+    _journal.close()
+
+    _journal = journal.Journal(str(tmp_path))
+    ring = buffer.RingBuffer(32, journal=_journal)
+    replayed = ring.get_many()
+    expected = [e for batch in batches for e in batch]
+    assert replayed == expected
+    assert [e.data.__class__ for e in replayed] == \
+        [e.data.__class__ for e in expected]
+    _journal.close()
@@ -0,0 +1,61 @@
+"""Module for testing multicast ring buffer"""
+import time
+
+from ring_buffer.model import event
+from ring_buffer.services import buffer
+from ring_buffer.services import consumer
+from ring_buffer.services import multicast
+
+
+def test_every_reader_sees_every_event():
+    ring = multicast.MulticastRingBuffer(4)
+    audit = ring.register_reader('audit')
+    risk = ring.register_reader('risk')
+    assert ring.put_many([event.Event('test', i) for i in range(4)]) == 4
+
+    # producer is gated on the slowest reader
+    assert ring.is_full() is True
+    assert [e.data for e in audit.get_many()] == [0, 1, 2, 3]
+    assert ring.is_full() is True
+    try:
+        ring.put(event.Event('test', 4))
+    except buffer.RingFullError:
+        pass
+    else:
+        raise AssertionError('slowest reader must gate the producer')
+
+    assert risk.get().data == 0
+    ring.put(event.Event('test', 4))
+    assert [e.data for e in risk.get_many()] == [1, 2, 3, 4]
+    assert [e.data for e in audit.get_many()] == [4]
+    assert audit.is_empty() is True
+
+    # a None would be taken for an empty slot by the readers
+    try:
+        ring.put_many([event.Event('test', 5), None])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
+    assert audit.is_empty() is True and risk.is_empty() is True
+
+
+def test_multicast_consumers():
+    ring = multicast.MulticastRingBuffer(8)
+    received = {'audit': [], 'risk': [], 'persist': []}
+    consumers = []
+    for name, events in received.items():
+        _consumer = consumer.Consumer(name, ring.register_reader(name))
+        _consumer.register_callback(events.append)
+        _consumer.start()
+        consumers.append(_consumer)
+    for i in range(100):
+        ring.put(event.Event('test', i), block=True, timeout=5)
+    deadline = time.monotonic() + 5
+    while (any(len(v) < 100 for v in received.values())
+           and time.monotonic() < deadline):
+        time.sleep(0.001)
+    for _consumer in consumers:
+        _consumer.stop()
+    for events in received.values():
+        assert [e.data for e in events] == list(range(100))
@@ -0,0 +1,103 @@
+"""Module for testing the partitioned ring buffer"""
+import collections
+import threading
+import time
+
+from ring_buffer.model import event
+from ring_buffer.services import buffer
+from ring_buffer.services import partitioned
+
+
+def _wait_for(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_events_of_a_sid_go_to_one_partition():
+    ring = partitioned.PartitionedRingBuffer(partitions=4, size=64)
+    events = [event.Event('test', i, f'key-{i % 8}') for i in range(64)]
+    assert ring.put_many(events[:32]) == 32
+    for e in events[32:]:
+        ring.put(e)
+    assert ring.qsize() == 64
+    for i in range(ring.partitions):
+        by_sid = collections.defaultdict(list)
+        for e in ring.partition(i).get_many():
+            assert partitioned.partition_of(e.sid, 4) == i
+            by_sid[e.sid].append(e.data)
+        for data in by_sid.values():
+            assert data == sorted(data)
+    assert ring.is_empty()
+
+
+def test_put_many_reports_events_of_full_partitions():
+    ring = partitioned.PartitionedRingBuffer(partitions=2, size=2)
+    full = partitioned.partition_of('a', 2)
+    other = next(sid for sid in 'bcdefgh'
+                 if partitioned.partition_of(sid, 2) != full)
+    ring.put_many([event.Event('test', 0, 'a')])
+    events = [event.Event('test', 1, 'a'), event.Event('test', 2, other),
+              event.Event('test', 3, 'a'), event.Event('test', 4, other)]
+    try:
+        ring.put_many(events)
+    except partitioned.PartitionFullError as e:
+        assert e.put_count == 3
+        assert [x.data for x in e.events] == [3]
+    else:
+        raise AssertionError('PartitionFullError not raised')
+    assert ring.partition(full).qsize() == 2
+    assert ring.partition(1 - full).qsize() == 2
+
+    # every partition is full, still a RingFullError
+    try:
+        ring.put_many([event.Event('test', 5, 'a')])
+    except buffer.RingFullError as e:
+        assert isinstance(e, partitioned.PartitionFullError)
+    else:
+        raise AssertionError('RingFullError not raised')
+
+    lossy = partitioned.PartitionedRingBuffer(partitions=2, size=2,
+                                              overflow_policy='drop_newest')
+    assert lossy.put_many([event.Event('test', i, 'a')
+                           for i in range(3)]) == 2
+
+
+def test_consumer_keeps_order_across_rebalance():
+    ring = partitioned.PartitionedRingBuffer(partitions=2, size=256)
+    _consumer = partitioned.PartitionedConsumer('test', ring)
+    received = collections.defaultdict(list)
+    lock = threading.Lock()
+
+    def on_event(e: event.Event):
+        with lock:
+            received[e.sid].append(e.data)
+
+    _consumer.register_callback(on_event)
+    _consumer.start()
+    n = 2000
+    for i in range(n):
+        if i == n // 2:
+            _consumer.rebalance(3)
+            assert ring.partitions == 3
+        ring.put(event.Event('test', i, f'key-{i % 10}'), block=True,
+                 timeout=5)
+    _wait_for(lambda: sum(len(v) for v in received.values()) == n)
+    _consumer.stop()
+    _consumer.join()
+    assert sum(len(v) for v in received.values()) == n
+    for data in received.values():
+        assert data == sorted(data)
+
+
+def test_rebalance_keeps_events_when_they_do_not_fit():
+    ring = partitioned.PartitionedRingBuffer(partitions=4, size=4)
+    ring.put_many([event.Event('test', i) for i in range(16)])
+    try:
+        ring.rebalance(2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
+    assert ring.partitions == 4
+    assert ring.qsize() == 16
@@ -0,0 +1,97 @@
+"""Module for testing the pipeline of stages"""
+import threading
+import time
+
+from ring_buffer.model import event
+from ring_buffer.services import consumer
+from ring_buffer.services import multicast
+from ring_buffer.services import pipeline
+
+
+def test_reader_waits_for_its_dependency():
+    ring = multicast.MulticastRingBuffer(4)
+    decode = ring.register_reader('decode', lazy_commit=True)
+    persist = ring.register_reader('persist', [decode])
+    ring.put_many([event.Event('test', i) for i in range(3)])
+    assert persist.get_many() == []
+    assert [e.data for e in decode.get_many(2)] == [0, 1]
+    # decode is still handling 0 and 1
+    assert persist.is_empty() is True
+    assert [e.data for e in decode.get_many()] == [2]
+    assert [e.data for e in persist.get_many()] == [0, 1]
+    decode.commit()
+    assert [e.data for e in persist.get_many()] == [2]
+    assert ring.qsize() == 0
+
+
+def test_diamond_pipeline():
+    _pipeline = pipeline.Pipeline(
+        'test', 64, consumer.BlockingWaitStrategy(timeout=0.01))
+    persisted = []
+
+    def decode(e: event.Event):
+        e.data = {'id': e.data}
+
+    def enrich(e: event.Event):
+        e.data['enriched'] = True
+
+    def risk(e: event.Event):
+        e.data['risk'] = True
+
+    def persist(events):
+        for e in events:
+            assert e.data['enriched'] and e.data['risk']
+            persisted.append(e.data['id'])
+
+    _pipeline.stage('decode', decode) \
+        .stage('enrich', enrich, depends_on=['decode']) \
+        .stage('risk', risk, depends_on=['decode']) \
+        .stage('persist', persist, depends_on=['enrich', 'risk'],
+               max_batch=16)
+    try:
+        _pipeline.stage('audit', persist, depends_on=['unknown'])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ValueError not raised')
+    _pipeline.start()
+    n = 500
+    for i in range(n):
+        _pipeline.ring.put(event.Event('test', i), block=True, timeout=5)
+    deadline = time.monotonic() + 5
+    while len(persisted) < n and time.monotonic() < deadline:
+        time.sleep(0.001)
+    _pipeline.stop()
+    _pipeline.join()
+    assert persisted == list(range(n))
+    metrics = _pipeline.metrics()
+    assert [m.name for m in metrics] == ['decode', 'enrich', 'risk',
+                                         'persist']
+    assert all(m.events == n and m.lag == 0 for m in metrics)
+    assert _pipeline.ring.qsize() == 0
+    # stages released every slot
+    assert _pipeline.ring.put_many(
+        [event.Event('test', i) for i in range(65)]) == 64
+
+
+def test_join_timeout_does_not_commit_a_running_stage():
+    _pipeline = pipeline.Pipeline(
+        'test', 4, consumer.BlockingWaitStrategy(timeout=0.01))
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(_: event.Event):
+        started.set()
+        release.wait(5)
+
+    _pipeline.stage('slow', slow)
+    _pipeline.start()
+    _pipeline.ring.put(event.Event('test', 0))
+    assert started.wait(5)
+    _pipeline.stop()
+    _pipeline.join(timeout=0.01)
+    # the stage is still handling the event, its slot is not released
+    assert _pipeline.ring.qsize() == 1
+    release.set()
+    _pipeline.join()
+    assert _pipeline.ring.qsize() == 0
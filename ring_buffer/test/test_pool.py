@@ -0,0 +1,150 @@
+"""Module for testing the autoscaling pool"""
+import threading
+import time
+import typing as t
+
+from ring_buffer.interface.producer import ProducerInterface
+from ring_buffer.model import event
+from ring_buffer.services import buffer
+from ring_buffer.services import consumer
+from ring_buffer.services import pool
+
+
+class _Producer(ProducerInterface):
+    """Put events until it is stopped or limit events are put"""
+
+    def __init__(self,
+                 name: str,
+                 ring: buffer.RingBuffer,
+                 limit: t.Optional[int] = None):
+        self.name = name
+        self._limit = limit
+        self.produced: t.List[t.Tuple[str, int]] = []
+        self._ring = ring
+        self._is_stop = False
+        self._thread: t.Optional[threading.Thread] = None
+
+    def produce(self, e: event.Event) -> bool:
+        try:
+            self._ring.put(e, block=True, timeout=0.01)
+        except buffer.RingFullError:
+            return False
+        return True
+
+    def _produce_loop(self):
+        i = 0
+        while not self._is_stop and i != self._limit:
+            if self.produce(event.Event('test', (self.name, i))):
+                self.produced.append((self.name, i))
+                i += 1
+
+    def start(self):
+        self._thread = threading.Thread(name=self.name,
+                                        target=self._produce_loop,
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._is_stop = True
+
+    def join(self, timeout: t.Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def _wait_for(predicate: t.Callable[[], bool], timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('timeout')
+        time.sleep(0.001)
+
+
+def _consumer_factory(ring: buffer.RingBuffer, handled: list):
+
+    def on_event(e: event.Event):
+        time.sleep(0.0005)
+        handled.append(e.data)
+
+    def factory(name: str) -> consumer.Consumer:
+        _consumer = consumer.Consumer(name, ring)
+        _consumer.register_callback(on_event)
+        return _consumer
+
+    return factory
+
+
+def test_pool_scales_up_and_drains_on_stop():
+    ring = buffer.RingBuffer(64)
+    handled = []
+    producers = [_Producer('p0', ring), _Producer('p1', ring)]
+    policy = pool.ScalingPolicy(min_consumers=1, max_consumers=3,
+                                scale_up_checks=2, check_interval=0.005,
+                                cooldown=0.01)
+    _pool = pool.AutoscalingPool(producers, ring,
+                                 _consumer_factory(ring, handled), policy)
+    _pool.start()
+    assert _pool.consumers == 1
+    _wait_for(lambda: _pool.consumers == 3)
+    _pool.stop()
+    _pool.join()
+    assert not _pool.is_running()
+    assert ring.is_empty()
+    produced = producers[0].produced + producers[1].produced
+    assert sorted(handled) == sorted(produced)
+    assert _pool.metrics().scale_ups == 2
+    assert _pool.consumers == 0
+
+
+def test_pool_scales_down_when_idle():
+    ring = buffer.RingBuffer(64)
+    handled = []
+    # ends on its own, then the ring stays empty
+    producer = _Producer('p0', ring, limit=300)
+    policy = pool.ScalingPolicy(min_consumers=1, max_consumers=2,
+                                scale_up_checks=1, scale_down_checks=3,
+                                check_interval=0.005, cooldown=0.01)
+    _pool = pool.AutoscalingPool([producer], ring,
+                                 _consumer_factory(ring, handled), policy)
+    _pool.start()
+    _wait_for(lambda: _pool.metrics().scale_ups == 1)
+    _wait_for(lambda: _pool.metrics().scale_downs == 1)
+    assert _pool.consumers == 1
+    _pool.stop()
+    _pool.join()
+    assert sorted(handled) == [('p0', i) for i in range(300)]
+    assert _pool.metrics().consumers == 0
+
+    try:
+        pool.ScalingPolicy(min_consumers=2, max_consumers=1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('min_consumers above max_consumers must raise')
+
+
+def test_pool_keeps_supervising_when_the_factory_fails():
+    ring = buffer.RingBuffer(64)
+    handled = []
+    factory = _consumer_factory(ring, handled)
+    calls = []
+
+    def failing_factory(name: str) -> consumer.Consumer:
+        calls.append(name)
+        # the first consumer starts, the scale ups fail
+        if len(calls) > 1:
+            raise RuntimeError('no more consumers')
+        return factory(name)
+
+    producer = _Producer('p0', ring)
+    policy = pool.ScalingPolicy(min_consumers=1, max_consumers=2,
+                                scale_up_checks=1, check_interval=0.005,
+                                cooldown=0.01)
+    _pool = pool.AutoscalingPool([producer], ring, failing_factory, policy)
+    _pool.start()
+    _wait_for(lambda: _pool.metrics().failed_scale_ups >= 1)
+    assert _pool.is_running() and _pool.consumers == 1
+    _pool.stop()
+    _pool.join()
+    assert sorted(handled) == sorted(producer.produced)
+    assert _pool.metrics().scale_ups == 0
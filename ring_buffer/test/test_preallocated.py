@@ -0,0 +1,57 @@
+"""Module for testing preallocated ring buffer"""
+import threading
+
+from ring_buffer.model import event
+from ring_buffer.services import buffer
+from ring_buffer.services import preallocated
+
+
+def _new_event() -> event.Event:
+    return event.Event('trade', None)
+
+
+def test_claim_publish_reuses_slots():
+    ring = preallocated.PreallocatedRingBuffer(_new_event, 4)
+    slots = {id(ring[i]) for i in range(4)}
+    for i in range(4):
+        seq = ring.next()
+        ring[seq].data = i
+        ring.publish(seq)
+    try:
+        ring.next()
+    except buffer.RingFullError:
+        pass
+    else:
+        raise AssertionError('claim on a full ring must raise')
+
+    assert [e.data for e in ring.get_many(2)] == [0, 1]
+    # the batch is released by the next read
+    assert ring.is_full() is True
+    assert ring.get().data == 2
+    seq = ring.next()
+    assert seq == 4
+    assert id(ring[seq]) in slots
+
+
+def test_out_of_order_publish():
+    ring = preallocated.PreallocatedRingBuffer(_new_event, 8)
+    first, second = ring.next(), ring.next()
+    ring[second].data = 'second'
+    ring.publish(second)
+    assert ring.get_many() == []
+    ring[first].data = 'first'
+    ring.publish(first)
+    assert [e.data for e in ring.get_many()] == ['first', 'second']
+
+
+def test_blocking_get_is_woken_by_publish():
+    ring = preallocated.PreallocatedRingBuffer(_new_event, 8)
+    received = []
+    consumer_thread = threading.Thread(
+        target=lambda: received.append(ring.get(block=True, timeout=5).data))
+    consumer_thread.start()
+    seq = ring.next()
+    ring[seq].data = 'wake up'
+    ring.publish(seq)
+    consumer_thread.join(timeout=5)
+    assert received == ['wake up']
@@ -0,0 +1,40 @@
+"""Module for testing the consumer group of worker processes"""
+import multiprocessing
+import os
+import time
+
+from ring_buffer.model import event
+from ring_buffer.services import process_consumer
+from ring_buffer.services import shared_ring_buffer as srb
+
+
+def _crash_on_poison(e: event.Event):
+    if e.data == 'poison':
+        os._exit(1)  # pylint: disable=protected-access
+
+
+def test_process_consumer_group_restarts_and_drains():
+    ring = srb.SharedRingBuffer(size=64, slot_size=128, create=True,
+                                lock=multiprocessing.Lock())
+    group = process_consumer.ProcessConsumerGroup('test', ring, workers=2,
+                                                  max_claim=1)
+    try:
+        group.register_callback(_crash_on_poison)
+        group.start()
+        ring.put(event.Event('test', 'poison'), block=True, timeout=5)
+        for i in range(200):
+            ring.put(event.Event('test', i), block=True, timeout=5)
+        deadline = time.monotonic() + 10
+        while group.restarts == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert group.restarts == 1
+        group.stop()
+        group.join(10)
+        assert ring.is_empty()
+        metrics = group.metrics()
+        # only the poison event is lost
+        assert sum(m.events for m in metrics) == 200
+        assert all(m.claim == 1 for m in metrics)
+    finally:
+        group.stop()
+        ring.shutdown()
@@ -0,0 +1,82 @@
+"""Module for testing shared memory byte ring"""
+from ring_buffer.services import buffer
+from ring_buffer.services import shared_byte_ring as sbr
+
+
+def _read_all(ring: sbr.SharedByteRing):
+    records = []
+    view = ring.read()
+    while view is not None:
+        records.append(bytes(view))
+        view.release()
+        ring.release()
+        view = ring.read()
+    return records
+
+
+def test_variable_length_records_wrap_around():
+    ring = sbr.SharedByteRing(capacity=64, create=True)
+    try:
+        assert ring.capacity == 64
+        ring.write(b'a' * 20)
+        ring.write(b'b' * 20)
+        try:
+            ring.write(b'c' * 20)
+        except buffer.RingFullError:
+            pass
+        else:
+            raise AssertionError('write on a full ring must raise')
+        assert _read_all(ring) == [b'a' * 20, b'b' * 20]
+
+        # does not fit in the tail, the record starts at the beginning
+        ring.write(b'c' * 30)
+        ring.write(b'')
+        assert _read_all(ring) == [b'c' * 30, b'']
+        assert ring.is_empty() is True
+    finally:
+        ring.shutdown()
+
+
+def test_record_larger_than_tail_in_empty_ring():
+    ring = sbr.SharedByteRing(capacity=64, create=True)
+    attached = sbr.SharedByteRing(ring.name)
+    try:
+        ring.write(b'a' * 20)
+        assert _read_all(attached) == [b'a' * 20]
+        # bigger than the 40 bytes of tail and the 24 bytes before it
+        for _ in range(3):
+            ring.write(b'x' * 44)
+            assert _read_all(attached) == [b'x' * 44]
+        ring.write(b'y' * ring.max_record_length)
+        assert _read_all(attached) == [b'y' * ring.max_record_length]
+        assert ring.is_empty() is True
+    finally:
+        attached.close()
+        ring.shutdown()
+
+
+def test_reserve_commit_in_place():
+    ring = sbr.SharedByteRing(capacity=256, create=True)
+    attached = sbr.SharedByteRing(ring.name)
+    try:
+        view = ring.reserve(100)
+        view[:5] = b'hello'
+        view.release()
+        assert attached.read() is None
+        ring.commit(5)
+
+        record = attached.read()
+        assert bytes(record) == b'hello'
+        assert record.readonly is True
+        record.release()
+        attached.release()
+        assert ring.is_empty() is True
+        try:
+            ring.reserve(ring.max_record_length + 1)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('record bigger than the ring must raise')
+    finally:
+        attached.close()
+        ring.shutdown()
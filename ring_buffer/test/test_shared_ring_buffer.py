@@ -0,0 +1,93 @@
+"""Module for testing shared memory ring buffer"""
+import multiprocessing
+import time
+
+from ring_buffer.model import event
+from ring_buffer.services import buffer
+from ring_buffer.services import shared_ring_buffer as srb
+
+
+def _produce(ring: srb.SharedRingBuffer, n: int):
+    for i in range(n):
+        ring.put(event.Event('test', i, sid=str(i)), block=True, timeout=10)
+    ring.close()
+
+
+def test_shared_ring_buffer_wrap_around():
+    ring = srb.SharedRingBuffer(size=4, slot_size=128, create=True)
+    try:
+        assert ring.is_empty() is True
+        assert ring.put_many([event.Event('test', i) for i in range(6)]) == 4
+        assert ring.is_full() is True
+        try:
+            ring.put(event.Event('test', 6))
+        except buffer.RingFullError:
+            pass
+        else:
+            raise AssertionError('put on a full ring must raise')
+        assert [e.data for e in ring.get_many(3)] == [0, 1, 2]
+        ring.put_many([event.Event('test', i) for i in range(4, 7)])
+        assert [e.data for e in ring.get_many()] == [3, 4, 5, 6]
+        try:
+            ring.put(event.Event('test', 'x' * 200))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('event larger than slot must be rejected')
+    finally:
+        ring.shutdown()
+
+
+def test_shared_ring_buffer_raw_bytes():
+    ring = srb.SharedRingBuffer(size=4, slot_size=128, create=True)
+    try:
+        ring.put_bytes(b'raw payload')
+        ring.put(event.Event('test', 1))
+        view = ring.peek_bytes()
+        assert view.readonly and bytes(view) == b'raw payload'
+        view.release()
+        ring.release()
+        ring.put_bytes(bytearray(b'more'))
+        assert [e.data for e in ring.get_many(1)] == [1]
+        assert ring.get() == b'more'
+        assert ring.peek_bytes() is None
+    finally:
+        ring.shutdown()
+
+
+def test_shared_ring_buffer_across_processes():
+    ring = srb.SharedRingBuffer(size=16, slot_size=128, create=True)
+    try:
+        attached = srb.SharedRingBuffer(ring.name)
+        assert attached.size == 16
+        attached.close()
+
+        process = multiprocessing.Process(target=_produce, args=(ring, 200))
+        process.start()
+        received = []
+        while len(received) < 200:
+            received += ring.get_many(block=True, timeout=10)
+        process.join(timeout=10)
+        assert [e.data for e in received] == list(range(200))
+        assert received[-1].sid == '199'
+    finally:
+        ring.shutdown()
+
+
+def test_shared_ring_buffer_blocking_timeout():
+    ring = srb.SharedRingBuffer(size=2, slot_size=128, create=True)
+    try:
+        start = time.monotonic()
+        assert ring.get_many(block=True, timeout=0.05) == []
+        ring.put_many([event.Event('test', i) for i in range(2)])
+        try:
+            ring.put(event.Event('test', 2), block=True, timeout=0.05)
+        except buffer.RingFullError:
+            pass
+        else:
+            raise AssertionError('put on a full ring must time out')
+        assert time.monotonic() - start < 1
+        assert srb.remaining(None) is None
+        assert srb.remaining(time.monotonic() - 1) == 0
+    finally:
+        ring.shutdown()